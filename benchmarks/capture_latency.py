@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+capture_latency.py - End-to-end capture latency: in-process screencopy vs the grim PNG path
+
+Starts a mock compositor serving a recorded (synthetic) frame and times:
+
+    screencopy        ScreencopyClient.capture() into memory, persistent connection
+    screencopy cold   connect + bind globals + capture, as a one-shot launch would
+    png round trip    what the grim path adds on top of the copy itself: encode the
+                      same frame to PNG and decode it again (needs PySide6)
+    grim              the real `grim -t ppm -` backend, only when a compositor and grim exist
+
+    python3 benchmarks/capture_latency.py [--outputs 3840x2160,3840x2160] [--runs N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, ROOT)
+
+from core.backends import GrimBackend  # noqa: E402
+from core.screencopy import ScreencopyClient  # noqa: E402
+from benchmarks.fakes.mock_compositor import MockCompositor, MockOutput  # noqa: E402
+
+
+def timed(fn, runs):
+    samples = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def report(name, samples, frame=None):
+    ms = [s * 1000 for s in samples]
+    extra = f"  {frame.width}x{frame.height}" if frame is not None else ''
+    print(f"{name:<20} median {statistics.median(ms):8.1f} ms   min {min(ms):8.1f} ms{extra}")
+
+
+def parse_outputs(spec):
+    outputs, x = [], 0
+    for i, size in enumerate(spec.split(',')):
+        w, h = (int(v) for v in size.split('x'))
+        outputs.append(MockOutput(f'MOCK-{i + 1}', x, 0, w, h))
+        x += w
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--outputs', default='1920x1080', help='comma separated output sizes, laid out left to right')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    real_display = os.environ.get('WAYLAND_DISPLAY')
+    with tempfile.TemporaryDirectory() as tmp:
+        compositor = MockCompositor(os.path.join(tmp, 'wayland-mock'), parse_outputs(args.outputs)).start()
+        try:
+            client = ScreencopyClient(compositor.socket_path)
+            samples, frame = timed(lambda: client.capture(None), args.runs)
+            report('screencopy', samples, frame)
+            first = compositor.outputs[0]
+            region = (first.x + 100, first.y + 100, first.width // 2, first.height // 2)
+            samples, region_frame = timed(lambda: client.capture(region), args.runs)
+            report('screencopy region', samples, region_frame)
+            client.close()
+
+            def cold():
+                c = ScreencopyClient(compositor.socket_path)
+                try:
+                    return c.capture(None)
+                finally:
+                    c.close()
+            samples, _ = timed(cold, args.runs)
+            report('screencopy cold', samples, frame)
+        finally:
+            compositor.stop()
+
+    try:
+        from PySide6.QtCore import QBuffer, QByteArray, QIODevice
+        from PySide6.QtGui import QImage
+    except ImportError:
+        print("png round trip       skipped (PySide6 not installed)")
+    else:
+        def png_round_trip():
+            payload = QByteArray()
+            buf = QBuffer(payload)
+            buf.open(QIODevice.WriteOnly)
+            frame.to_qimage().save(buf, 'PNG')
+            return QImage.fromData(payload, 'PNG')
+        samples, _ = timed(png_round_trip, max(1, args.runs // 2))
+        report('png round trip', samples, frame)
+
+    grim = GrimBackend()
+    if real_display and grim.available():
+        samples, grim_frame = timed(lambda: grim.capture(None), args.runs)
+        report('grim (real)', samples, grim_frame)
+    else:
+        print("grim (real)          skipped (no compositor or grim not installed)")
+
+
+if __name__ == '__main__':
+    main()
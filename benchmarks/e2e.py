@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+e2e.py - End-to-end capture benchmark and regression check, without a compositor
+
+Each scenario runs the real toolbar flows (SnipperWindow with the native region
+selector or slurp, WindowSelectorOverlay, FullDisplayCapture, AllDisplaysCapture)
+in a worker process under the offscreen Qt platform, with the screens of the chosen
+layout. grim, slurp, hyprctl, wl-copy and notify-send are the stand-ins from
+benchmarks/fakes/wayland_tools.py, serving a deterministic frame of the layout and a
+synthetic client list; notifications go to the stand-in server in
+benchmarks/fakes/notification_server.py and count as Notify calls. Settings are the
+defaults, with CAPTURE_BACKEND: grim and TRACE on.
+
+For every scenario it reports the trigger-to-last-sink latency (from the capture
+trace), the worker's peak RSS, the files written and the tool calls per capture, and
+compares them with benchmarks/e2e_baseline.json; a regression exits with status 1.
+
+    python3 benchmarks/e2e.py                                   # default matrix vs baseline
+    python3 benchmarks/e2e.py --layouts 3x4k --modes window --clients 200
+    python3 benchmarks/e2e.py --update-baseline                 # after an intended change
+
+The baseline is machine-specific: record it on the machine that runs the check.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+sys.path.insert(0, SRC)
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes.hyprland_ipc import FakeHyprland, synthetic_clients  # noqa: E402
+from benchmarks.fakes.notification_server import FakeNotificationServer  # noqa: E402
+from benchmarks.fakes.wayland_tools import LAYOUTS, install, monitors, read_calls  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'e2e_baseline.json')
+
+# mode: (trigger mode, REGION_SELECTOR)
+MODES = {
+    'region': ('region', 'native'),
+    'region-slurp': ('region', 'slurp'),
+    'window': ('window', 'native'),
+    'full': ('full', 'native'),
+    'all': ('all', 'native'),
+}
+
+# Clients for the modes that do not list windows
+DEFAULT_CLIENTS = 8
+
+# Latency within this many ms of the baseline never counts as a regression (timer noise)
+MIN_LATENCY_DELTA_MS = 15
+MIN_RSS_DELTA_MB = 8
+
+
+def scenario_key(mode, layout, clients):
+    return f"{mode}/{layout}" + (f"/{clients}w" if mode == 'window' else '')
+
+
+def _settings_yaml(region_selector, freeze):
+    """The default settings.yaml with the benchmark's overrides."""
+    with open(os.path.join(ROOT, 'config', 'settings.yaml')) as f:
+        text = f.read()
+    overrides = {'CAPTURE_BACKEND': 'grim', 'TRACE': 'true', 'REGION_SELECTOR': region_selector,
+                 'FREEZE_SCREEN': 'true' if freeze else 'false'}
+    for key, value in overrides.items():
+        text, found = re.subn(rf'^{key}:.*$', f'{key}: {value}', text, flags=re.M)
+        if not found:
+            text += f'\n{key}: {value}\n'
+    return text
+
+
+def _offscreen_config(path, outputs):
+    screens = [{'name': f'FAKE-{i + 1}', 'x': x, 'y': y, 'width': w, 'height': h,
+                'logicalDpi': 96, 'logicalBaseDpi': 96, 'dpr': 1}
+               for i, (x, y, w, h) in enumerate(outputs)]
+    with open(path, 'w') as f:
+        json.dump({'synchronousWindowSystemEvents': False, 'windowFrameMargins': False, 'screens': screens}, f)
+
+
+def run_scenario(mode, layout, clients, runs, warmup=1, freeze=True, ipc='hyprctl', timeout=300):
+    """Run one scenario in a worker process; returns its result dict (see worker())."""
+    outputs = LAYOUTS[layout]
+    trigger_mode, region_selector = MODES[mode]
+    with tempfile.TemporaryDirectory(prefix='hyprsnipper-e2e-') as directory:
+        home = os.path.join(directory, 'home')
+        runtime_dir = os.path.join(directory, 'run')
+        fakes_dir = os.path.join(directory, 'fakes')
+        config_dir = os.path.join(home, '.config', 'hyprsnipper')
+        for path in (config_dir, runtime_dir, fakes_dir):
+            os.makedirs(path, mode=0o700, exist_ok=True)
+        with open(os.path.join(config_dir, 'settings.yaml'), 'w') as f:
+            f.write(_settings_yaml(region_selector, freeze))
+        qpa_config = os.path.join(directory, 'screens.json')
+        _offscreen_config(qpa_config, outputs)
+
+        client_list = synthetic_clients(clients, monitor=outputs[0])
+        env = {k: v for k, v in os.environ.items()
+               if k not in ('WAYLAND_DISPLAY', 'DISPLAY', 'HYPRLAND_INSTANCE_SIGNATURE', 'XDG_DATA_HOME',
+                            'XDG_CONFIG_HOME', 'SNIP_SAVE_DIR', 'SNIP_EDITOR')}
+        env.update(install(fakes_dir, outputs, client_list))
+        env.update(HOME=home, XDG_RUNTIME_DIR=runtime_dir, QT_QPA_PLATFORM=f'offscreen:configfile={qpa_config}',
+                   PYTHONDONTWRITEBYTECODE='1')
+        notifications = FakeNotificationServer(os.path.join(runtime_dir, 'bus')).start()
+        env.update(notifications.env)
+        fake = None
+        if ipc == 'socket':
+            fake = FakeHyprland(runtime_dir, clients=client_list, monitors=monitors(outputs)).start()
+            env.update(fake.env)
+        spec = {'mode': trigger_mode, 'runs': runs, 'warmup': warmup, 'fakes': fakes_dir,
+                'save_dir': os.path.join(home, 'Pictures', 'Screenshots')}
+        try:
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', json.dumps(spec)],
+                                  cwd=SRC, env=env, capture_output=True, text=True, timeout=timeout)
+        finally:
+            notifications.stop()
+            if fake is not None:
+                fake.stop()
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            raise RuntimeError(f"{scenario_key(mode, layout, clients)} failed:\n{proc.stderr[-2000:]}")
+        result = json.loads(lines[-1])
+        # The server saw the warm-up captures too
+        result['tool_calls']['Notify'] = round(len(notifications.notifications) / (runs + warmup), 2)
+        return result
+
+
+def worker(spec):
+    """
+    Runs inside the scenario process: trigger warmup + runs captures back to back, driving
+    the selectors like a user would, and print one JSON line with the results.
+    """
+    import resource
+    if sys.version_info < (3, 12):
+        # Some PySide6 builds drop a reference to None on every void call (QPainter.drawRect,
+        # setBrush, ...); a few thousand selector paints would then free None and abort.
+        # None is immortal from Python 3.12 on.
+        import ctypes
+        ctypes.c_ssize_t.from_address(id(None)).value += 1 << 40
+    from PySide6.QtCore import QPoint, Qt, QTimer
+    from PySide6.QtTest import QTest
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication([sys.argv[0]])
+    from core.trace import TRACE_FILE, read_traces
+    from ui.snipper_window import SnipperWindow
+
+    window = SnipperWindow()
+    mode, total = spec['mode'], spec['warmup'] + spec['runs']
+    with open(os.path.join(spec['fakes'], 'config.json')) as f:
+        rx, ry, rw, rh = json.load(f)['region']
+    # 'driven' keeps the last region selector handled, so a new one is never mistaken for it
+    state = {'captures': [], 'driven': None, 'error': None, 'started': 0.0, 'baseline': None}
+
+    def snapshot():
+        files = [os.path.join(d, name) for d, _dirs, names in os.walk(spec['save_dir']) for name in names]
+        return len(read_calls(spec['fakes'])), len(files), sum(os.path.getsize(p) for p in files)
+
+    def start_capture():
+        if len(state['captures']) == spec['warmup'] and state['baseline'] is None:
+            state['baseline'] = snapshot()
+        if len(state['captures']) == total:
+            app.quit()
+            return
+        state['started'] = time.perf_counter()
+        window.trigger(mode)
+        QTimer.singleShot(1, poll)
+
+    def drive():
+        """Make the selection a user would once the selector is up."""
+        selector = window._region_selector
+        if selector is not None and selector is not state['driven']:
+            state['driven'] = selector
+            selector.press(QPoint(rx, ry), snap=False)
+            selector.move(QPoint(rx + rw // 2, ry + rh // 2), snap=False)
+            selector.release(QPoint(rx + rw, ry + rh), snap=False)
+        overlay = window._window_selector_overlay
+        # The overlay may be reused; a newly opened one has nothing selected yet
+        if overlay is not None and overlay.isVisible() and overlay._items and overlay.selected_idx is None:
+            # The topmost window, clicked in the middle of its preview
+            QTest.mouseClick(overlay, Qt.LeftButton, Qt.NoModifier, overlay._items[-1][0].center())
+
+    def poll():
+        if time.perf_counter() - state['started'] > 60:
+            state['error'] = f"capture {len(state['captures']) + 1} did not finish"
+            app.quit()
+            return
+        drive()
+        records = read_traces(TRACE_FILE)
+        if len(records) <= len(state['captures']):
+            QTimer.singleShot(2, poll)
+            return
+        record = records[len(state['captures'])]
+        if record['outcome'] != 'ok':
+            state['error'] = f"capture {len(state['captures']) + 1} ended {record['outcome']}"
+            app.quit()
+            return
+        state['captures'].append(record)
+        # Let the toolbar restore (it is queued 100 ms after the sinks start) before the next trigger
+        QTimer.singleShot(150, wait_idle)
+
+    def wait_idle():
+        if window._pending_task is not None or window._trace is not None:
+            QTimer.singleShot(10, wait_idle)
+        else:
+            start_capture()
+
+    QTimer.singleShot(0, start_capture)
+    app.exec()
+    if state['error']:
+        print(state['error'], file=sys.stderr)
+        return 1
+
+    calls_before, files_before, bytes_before = state['baseline']
+    calls_after, files_after, bytes_after = snapshot()
+    measured = state['captures'][spec['warmup']:]
+    tools = {}
+    for call in read_calls(spec['fakes'])[calls_before:calls_after]:
+        tools[call['tool']] = tools.get(call['tool'], 0) + 1
+    phases = {}
+    for record in measured:
+        for name, _at, taken in record['phases']:
+            phases.setdefault(name, []).append(taken)
+    runs = len(measured)
+    print(json.dumps({
+        'latency_ms': [max(at for _name, at, _taken in r['phases']) for r in measured],
+        'phases_ms': {name: statistics.median(values) for name, values in phases.items()},
+        # ru_maxrss is in KiB on Linux
+        'rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'files_per_capture': round((files_after - files_before) / runs, 2),
+        'kb_per_capture': round((bytes_after - bytes_before) / runs / 1024, 1),
+        'tool_calls': {tool: round(count / runs, 2) for tool, count in sorted(tools.items())},
+    }))
+    return 0
+
+
+def summarize(result):
+    latency = sorted(result['latency_ms'])
+    p95 = latency[min(len(latency) - 1, -(-len(latency) * 95 // 100) - 1)]
+    return {'p50_ms': round(statistics.median(latency), 1), 'p95_ms': round(p95, 1),
+            'rss_mb': result['rss_mb'], 'files_per_capture': result['files_per_capture'],
+            'kb_per_capture': result['kb_per_capture'], 'tool_calls': result['tool_calls']}
+
+
+def regressions(current, baseline, tolerance, rss_tolerance):
+    """Reasons `current` is worse than `baseline` (both from summarize()); empty if it is not."""
+    reasons = []
+    delta = current['p50_ms'] - baseline['p50_ms']
+    if delta > MIN_LATENCY_DELTA_MS and current['p50_ms'] > baseline['p50_ms'] * (1 + tolerance):
+        reasons.append(f"p50 {current['p50_ms']:.1f} ms vs {baseline['p50_ms']:.1f} ms")
+    delta = current['rss_mb'] - baseline['rss_mb']
+    if delta > MIN_RSS_DELTA_MB and current['rss_mb'] > baseline['rss_mb'] * (1 + rss_tolerance):
+        reasons.append(f"RSS {current['rss_mb']:.0f} MB vs {baseline['rss_mb']:.0f} MB")
+    if current['files_per_capture'] != baseline['files_per_capture']:
+        reasons.append(f"{current['files_per_capture']} files per capture vs {baseline['files_per_capture']}")
+    for tool in sorted(set(current['tool_calls']) | set(baseline['tool_calls'])):
+        now, before = current['tool_calls'].get(tool, 0), baseline['tool_calls'].get(tool, 0)
+        # Background refreshes make fractions vary; a whole extra call per capture is a regression
+        if now >= before + 1:
+            reasons.append(f"{now} {tool} calls per capture vs {before}")
+    return reasons
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--worker':
+        code = worker(json.loads(sys.argv[2]))
+        sys.stdout.flush()
+        # The results are out; skip interpreter teardown, where PySide can crash freeing widgets
+        os._exit(code)
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default=','.join(MODES), help=f"comma-separated, from {', '.join(MODES)}")
+    parser.add_argument('--layouts', default='1080p,4k,3x4k', help=f"comma-separated, from {', '.join(LAYOUTS)}")
+    parser.add_argument('--clients', default='1,50,200', help='window counts for the window mode')
+    parser.add_argument('--runs', type=int, default=5, help='measured captures per scenario (after one warmup)')
+    parser.add_argument('--live', action='store_true', help='FREEZE_SCREEN off (adds WINDOW_ANIMATION_DELAY)')
+    parser.add_argument('--ipc', choices=('hyprctl', 'socket'), default='hyprctl',
+                        help='list windows with the fake hyprctl or a fake Hyprland socket')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p50 latency increase (0.25 = 25%%)')
+    parser.add_argument('--rss-tolerance', type=float, default=0.10, help='allowed peak RSS increase')
+    args = parser.parse_args()
+
+    modes = args.modes.split(',')
+    layouts = args.layouts.split(',')
+    unknown = [m for m in modes if m not in MODES] + [lay for lay in layouts if lay not in LAYOUTS]
+    if unknown:
+        parser.error(f"unknown mode or layout: {', '.join(unknown)}")
+
+    try:
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        baseline = stored['scenarios']
+    except (OSError, ValueError, KeyError):
+        stored, baseline = {}, {}
+    if baseline and not args.update_baseline and stored.get('runs') != args.runs:
+        # Peak RSS grows with the number of captures when memory is retained between them
+        print(f"Note: the baseline was recorded with --runs {stored.get('runs')}")
+
+    results, failed = {}, []
+    print(f"{'scenario':<24} {'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>7} {'files':>6} {'KiB':>8}  tool calls per capture")
+    for layout in layouts:
+        for mode in modes:
+            for clients in ([int(c) for c in args.clients.split(',')] if mode == 'window' else [DEFAULT_CLIENTS]):
+                key = scenario_key(mode, layout, clients)
+                try:
+                    result = summarize(run_scenario(mode, layout, clients, args.runs, freeze=not args.live,
+                                                    ipc=args.ipc))
+                except (RuntimeError, subprocess.TimeoutExpired) as e:
+                    print(f"{key:<24} FAILED: {e}")
+                    failed.append(key)
+                    continue
+                results[key] = result
+                calls = ', '.join(f"{tool} {count:g}" for tool, count in result['tool_calls'].items())
+                line = (f"{key:<24} {result['p50_ms']:8.1f} {result['p95_ms']:8.1f} {result['rss_mb']:7.0f} "
+                        f"{result['files_per_capture']:6g} {result['kb_per_capture']:8.0f}  {calls}")
+                if key in baseline and not args.update_baseline:
+                    reasons = regressions(result, baseline[key], args.tolerance, args.rss_tolerance)
+                    if reasons:
+                        failed.append(key)
+                        line += f"\n{'':<24} REGRESSION: {'; '.join(reasons)}"
+                print(line, flush=True)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump({'runs': args.runs, 'freeze': not args.live, 'ipc': args.ipc, 'scenarios': baseline}, f,
+                      indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+    if failed:
+        print(f"{len(failed)} scenario(s) failed or regressed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
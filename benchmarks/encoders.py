@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+encoders.py - Encode time against output size for every format and level
+
+Synthetic screen-like images (xrgb8888, as screencopy delivers them):
+
+    desktop    flat panels and title bars with text-like glyph rows (terminal, editor)
+    gradient   smooth wallpaper gradients with a little noise
+    photo      high-entropy content (video frame, photo viewer)
+
+PNG is timed with the striped parallel zlib and, for comparison, as a single stream.
+From level 2 up the PNG rows are filtered where that compresses better (see png_scanlines).
+Formats whose library or plugin is missing are reported as unavailable.
+
+    python3 benchmarks/encoders.py [--size 3840x2160] [--runs 3] [--images desktop,photo]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from core import encoders  # noqa: E402
+from core.frame import Frame  # noqa: E402
+
+CASES = [
+    ('png', 0), ('png', 1), ('png', 3), ('png', 4), ('png', 6), ('png', 9),
+    ('qoi', 0),
+    ('webp', 100), ('webp', 90), ('avif', 80), ('jpeg', 90), ('jpeg', 75),
+]
+
+
+def _pixel(r, g, b):
+    return bytes((b, g, r, 255))
+
+
+def desktop_image(width, height, rng):
+    """Panels, title bars and rows of glyph-like runs, built row by row."""
+    bg, panel, bar, fg = _pixel(30, 30, 30), _pixel(40, 42, 54), _pixel(68, 71, 90), _pixel(230, 230, 230)
+    cols = 2
+    pane_w = width // cols
+    glyph_rows = {}
+    rows = []
+    for y in range(height):
+        if y < 32:
+            rows.append(bar * width)
+            continue
+        line, offset = divmod(y - 32, 20)
+        if 4 <= offset < 16:
+            # Same glyph pattern for the whole text line, varied per scanline of the glyphs
+            key = (line % 37, offset)
+            if key not in glyph_rows:
+                glyph_rng = random.Random(hash(key))
+                pane = bytearray()
+                while len(pane) < pane_w * 4:
+                    run = glyph_rng.choice((1, 1, 2, 3))
+                    pane += (fg if glyph_rng.random() < 0.35 else panel) * run
+                glyph_rows[key] = bytes(pane[:pane_w * 4])
+            text = glyph_rows[key]
+            length = (line * 7919) % pane_w
+            row = text[:length * 4] + panel * (pane_w - length)
+            row = (row * cols)[:width * 4]
+            rows.append(row + bg * (width - len(row) // 4))
+        else:
+            rows.append(panel * width)
+    return Frame(b''.join(rows), width, height, width * 4, 'xrgb8888')
+
+
+def gradient_image(width, height, rng):
+    rows = []
+    for y in range(height):
+        g = 40 + 120 * y // height
+        row = bytearray(width * 4)
+        # Per-row gradient with a noisy low bit
+        row[0::4] = bytes((x * 200 // width) & 0xfe | rng.getrandbits(1) for x in range(width))
+        row[1::4] = bytes([g]) * width
+        row[2::4] = bytes([180 - g // 2]) * width
+        row[3::4] = b'\xff' * width
+        rows.append(bytes(row))
+    return Frame(b''.join(rows), width, height, width * 4, 'xrgb8888')
+
+
+def photo_image(width, height, rng):
+    return Frame(rng.randbytes(width * height * 4), width, height, width * 4, 'xrgb8888')
+
+
+IMAGES = {'desktop': desktop_image, 'gradient': gradient_image, 'photo': photo_image}
+
+
+def timed(fn, runs):
+    samples = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='3840x2160')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--images', default=','.join(IMAGES))
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    rng = random.Random(1)
+    raw_size = width * height * 3
+
+    print(f"{width}x{height}, {os.cpu_count()} CPUs, raw RGB {raw_size / 1e6:.1f} MB")
+    for name in args.images.split(','):
+        frame = IMAGES[name](width, height, rng)
+        print(f"\n{name}")
+        print(f"  {'format':<16} {'median ms':>10} {'size KB':>10} {'ratio':>7}")
+        for fmt, level in CASES:
+            label = f"{fmt} {level}" if fmt != 'qoi' else fmt
+            try:
+                samples, payload = timed(lambda: encoders.encode(frame, fmt, level), args.runs)
+            except encoders.EncoderError as e:
+                print(f"  {label:<16} unavailable ({e})")
+                continue
+            ms = statistics.median(samples) * 1000
+            print(f"  {label:<16} {ms:10.1f} {len(payload) / 1024:10.0f} {raw_size / len(payload):7.1f}")
+            if fmt == 'png' and (os.cpu_count() or 1) > 1:
+                # The same PNG as one zlib stream, to show what the stripes buy
+                stripes = encoders.MIN_STRIPE_BYTES
+                encoders.MIN_STRIPE_BYTES = float('inf')
+                try:
+                    samples, payload = timed(lambda: encoders.encode(frame, fmt, level), args.runs)
+                finally:
+                    encoders.MIN_STRIPE_BYTES = stripes
+                ms = statistics.median(samples) * 1000
+                print(f"  {label + ' 1 stream':<16} {ms:10.1f} {len(payload) / 1024:10.0f} "
+                      f"{raw_size / len(payload):7.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+# __init__.py for benchmark stand-ins (mock compositor, fake tools)
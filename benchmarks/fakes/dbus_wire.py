@@ -0,0 +1,235 @@
+"""
+dbus_wire.py - D-Bus message marshalling for the stand-in notification server
+
+Encodes and decodes D-Bus messages (the basic types plus arrays, structs, dicts and
+variants, either byte order) and splits a socket's byte stream into messages. Enough
+for notification_server.py to serve QtDBus clients without a real bus.
+"""
+import struct
+
+BUS_NAME = 'org.freedesktop.DBus'
+BUS_PATH = '/org/freedesktop/DBus'
+
+METHOD_CALL, METHOD_RETURN, ERROR, SIGNAL = 1, 2, 3, 4
+NO_REPLY_EXPECTED = 1
+
+# Header field codes and their types
+FIELDS = {1: ('path', 'o'), 2: ('interface', 's'), 3: ('member', 's'), 4: ('error_name', 's'),
+          5: ('reply_serial', 'u'), 6: ('destination', 's'), 7: ('sender', 's'), 8: ('signature', 'g')}
+_FIELD_CODES = {name: (code, sig) for code, (name, sig) in FIELDS.items()}
+
+# type code: (struct format, size); size is also the alignment
+_FIXED = {'y': ('B', 1), 'b': ('I', 4), 'n': ('h', 2), 'q': ('H', 2), 'i': ('i', 4), 'u': ('I', 4),
+          'x': ('q', 8), 't': ('Q', 8), 'd': ('d', 8), 'h': ('I', 4)}
+_ALIGN = {'s': 4, 'o': 4, 'g': 1, 'v': 1, 'a': 4, '(': 8, '{': 8}
+
+
+class DBusError(Exception):
+    """The bus cannot be reached, or a call failed (name is the D-Bus error name, if any)."""
+
+    def __init__(self, message, name=None):
+        super().__init__(message)
+        self.name = name
+
+
+# --- Wire encoding -------------------------------------------------------
+
+def _type_end(signature, start):
+    """Index just past the single complete type starting at signature[start]."""
+    code = signature[start]
+    if code == 'a':
+        return _type_end(signature, start + 1)
+    if code in '({':
+        close = ')' if code == '(' else '}'
+        pos = start + 1
+        while signature[pos] != close:
+            pos = _type_end(signature, pos)
+        return pos + 1
+    return start + 1
+
+
+def split_signature(signature):
+    """'sa{sv}i' -> ['s', 'a{sv}', 'i']"""
+    types, pos = [], 0
+    while pos < len(signature):
+        end = _type_end(signature, pos)
+        types.append(signature[pos:end])
+        pos = end
+    return types
+
+
+def _alignment(code):
+    return _FIXED[code][1] if code in _FIXED else _ALIGN[code]
+
+
+class _Writer:
+    def __init__(self):
+        self.buf = bytearray()
+
+    def align(self, n):
+        self.buf += b'\0' * (-len(self.buf) % n)
+
+    def write(self, signature, value):
+        code = signature[0]
+        if code in _FIXED:
+            fmt, size = _FIXED[code]
+            self.align(size)
+            self.buf += struct.pack('<' + fmt, value)
+        elif code in 'so':
+            raw = value.encode('utf-8')
+            self.align(4)
+            self.buf += struct.pack('<I', len(raw)) + raw + b'\0'
+        elif code == 'g':
+            raw = value.encode('ascii')
+            self.buf += bytes([len(raw)]) + raw + b'\0'
+        elif code == 'v':
+            inner, value = value  # variants are passed as (signature, value)
+            self.write('g', inner)
+            self.write(inner, value)
+        elif code == 'a':
+            self.align(4)
+            length_at = len(self.buf)
+            self.buf += b'\0\0\0\0'
+            element = signature[1:]
+            # Padding before the first element is not counted in the length
+            self.align(_alignment(element[0]))
+            start = len(self.buf)
+            if element == 'y':
+                self.buf += value
+            else:
+                for item in (value.items() if element[0] == '{' else value):
+                    self.write(element, item)
+            struct.pack_into('<I', self.buf, length_at, len(self.buf) - start)
+        elif code in '({':
+            self.align(8)
+            for member, item in zip(split_signature(signature[1:-1]), value):
+                self.write(member, item)
+        else:
+            raise DBusError(f"Unsupported type {code!r}")
+
+
+class _Reader:
+    def __init__(self, data, endian='<', pos=0):
+        self.data = data
+        self.endian = endian
+        self.pos = pos
+
+    def align(self, n):
+        self.pos += -self.pos % n
+
+    def _unpack(self, fmt, size):
+        self.align(size)
+        value = struct.unpack_from(self.endian + fmt, self.data, self.pos)[0]
+        self.pos += size
+        return value
+
+    def read(self, signature):
+        code = signature[0]
+        if code in _FIXED:
+            value = self._unpack(*_FIXED[code])
+            return bool(value) if code == 'b' else value
+        if code in 'so':
+            length = self._unpack('I', 4)
+            value = bytes(self.data[self.pos:self.pos + length]).decode('utf-8', 'replace')
+            self.pos += length + 1
+            return value
+        if code == 'g':
+            length = self.data[self.pos]
+            value = bytes(self.data[self.pos + 1:self.pos + 1 + length]).decode('ascii')
+            self.pos += length + 2
+            return value
+        if code == 'v':
+            return self.read(self.read('g'))
+        if code == 'a':
+            length = self._unpack('I', 4)
+            element = signature[1:]
+            self.align(_alignment(element[0]))
+            end = self.pos + length
+            if element == 'y':
+                value = bytes(self.data[self.pos:end])
+                self.pos = end
+                return value
+            items = []
+            while self.pos < end:
+                items.append(self.read(element))
+            return dict(items) if element[0] == '{' else items
+        if code in '({':
+            self.align(8)
+            return tuple(self.read(member) for member in split_signature(signature[1:-1]))
+        raise DBusError(f"Unsupported type {code!r}")
+
+
+class Message:
+    """A decoded message. Header fields are attributes (path, member, sender, ...)."""
+
+    def __init__(self, msg_type, serial, fields, body, flags=0):
+        self.type = msg_type
+        self.serial = serial
+        self.flags = flags
+        self.fields = fields
+        self.body = body
+
+    def __getattr__(self, name):
+        if name in _FIELD_CODES:
+            return self.fields.get(name)
+        raise AttributeError(name)
+
+    def __repr__(self):
+        return f"<Message type={self.type} serial={self.serial} {self.fields} body={self.body!r}>"
+
+
+def encode_message(msg_type, serial, signature='', args=(), flags=0, **fields):
+    """Bytes of one message; fields are header fields by name (path=, member=, ...)."""
+    body = _Writer()
+    for member, value in zip(split_signature(signature), args):
+        body.write(member, value)
+    if signature:
+        fields['signature'] = signature
+    header = _Writer()
+    header.buf += struct.pack('<cBBBII', b'l', msg_type, flags, 1, len(body.buf), serial)
+    header.write('a(yv)', [(_FIELD_CODES[name][0], (_FIELD_CODES[name][1], value))
+                           for name, value in fields.items() if value is not None])
+    header.align(8)
+    return bytes(header.buf) + bytes(body.buf)
+
+
+def decode_message(data):
+    """Message from the bytes of exactly one message."""
+    endian = '<' if data[0:1] == b'l' else '>'
+    msg_type, flags = data[1], data[2]
+    reader = _Reader(data, endian, pos=8)
+    serial = reader.read('u')
+    fields = {}
+    for code, value in reader.read('a(yv)'):
+        if code in FIELDS:
+            fields[FIELDS[code][0]] = value
+    reader.align(8)
+    signature = fields.get('signature') or ''
+    body = tuple(reader.read(member) for member in split_signature(signature))
+    return Message(msg_type, serial, fields, body, flags)
+
+
+class MessageStream:
+    """Splits a byte stream from a socket into messages. initial: bytes already read from it."""
+
+    def __init__(self, sock, initial=b''):
+        self.sock = sock
+        self._buffer = bytearray(initial)
+
+    def _fill(self, size):
+        while len(self._buffer) < size:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise DBusError("Connection closed")
+            self._buffer += chunk
+
+    def read(self):
+        self._fill(16)
+        endian = '<' if self._buffer[0:1] == b'l' else '>'
+        body_length, _serial, fields_length = struct.unpack_from(endian + 'III', self._buffer, 4)
+        header_length = 16 + fields_length + (-(16 + fields_length) % 8)
+        total = header_length + body_length
+        self._fill(total)
+        data = bytes(self._buffer[:total])
+        del self._buffer[:total]
+        return decode_message(data)
@@ -0,0 +1,137 @@
+"""
+hyprland_ipc.py - Stand-in for Hyprland's command and event sockets
+
+Serves `j/clients`, `j/activeworkspace`, `j/monitors` and `j/activewindow` (alone or
+in a [[BATCH]] request) on .socket.sock from an in-memory model and broadcasts events on .socket2.sock.
+Point HYPRLAND_INSTANCE_SIGNATURE and XDG_RUNTIME_DIR at it to drive
+core.hyprland without a compositor.
+"""
+import json
+import os
+import socket
+import threading
+
+
+def synthetic_clients(count, workspace_id=1, monitor=(0, 0, 1920, 1080), workspaces=1):
+    """Deterministic client list: a tiled grid plus every fifth window floating on top."""
+    mx, my, mw, mh = monitor
+    clients = []
+    per_ws = max(1, count // workspaces)
+    for i in range(count):
+        ws = workspace_id + i // per_ws if workspaces > 1 else workspace_id
+        idx = i % per_ws
+        cols = max(1, int(per_ws ** 0.5))
+        rows = max(1, -(-per_ws // cols))
+        floating = i % 5 == 4
+        if floating:
+            w, h = mw // 3, mh // 3
+            x, y = mx + (idx * 37) % (mw - w), my + (idx * 53) % (mh - h)
+        else:
+            w, h = mw // cols, mh // rows
+            x, y = mx + (idx % cols) * w, my + (idx // cols) * h
+        clients.append({
+            'address': f'0x{0x5000 + i:x}',
+            'mapped': True,
+            'hidden': False,
+            'at': [x, y],
+            'size': [w, h],
+            'workspace': {'id': ws, 'name': str(ws)},
+            'floating': floating,
+            'monitor': 0,
+            'class': 'kitty' if i % 2 else 'firefox',
+            'title': f'Window {i}',
+            'pid': 1000 + i,
+            'focusHistoryID': i,
+            'creationTimestamp': i,
+        })
+    return clients
+
+
+class FakeHyprland:
+    def __init__(self, runtime_dir, signature='fake', clients=None, monitors=None, active_workspace=1):
+        self.directory = os.path.join(runtime_dir, 'hypr', signature)
+        os.makedirs(self.directory, exist_ok=True)
+        self.signature = signature
+        self.runtime_dir = runtime_dir
+        self.clients = clients if clients is not None else synthetic_clients(8)
+        self.monitors = monitors or [{
+            'id': 0, 'name': 'FAKE-1', 'x': 0, 'y': 0, 'width': 1920, 'height': 1080,
+            'scale': 1.0, 'transform': 0, 'focused': True,
+            'activeWorkspace': {'id': active_workspace, 'name': str(active_workspace)},
+        }]
+        self.active_workspace = active_workspace
+        self.requests = 0
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._servers = []
+
+    @property
+    def env(self):
+        return {'HYPRLAND_INSTANCE_SIGNATURE': self.signature, 'XDG_RUNTIME_DIR': self.runtime_dir}
+
+    def start(self):
+        for name, handler in (('.socket.sock', self._handle_request), ('.socket2.sock', self._add_subscriber)):
+            path = os.path.join(self.directory, name)
+            if os.path.exists(path):
+                os.unlink(path)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(path)
+            server.listen(16)
+            self._servers.append(server)
+            threading.Thread(target=self._accept, args=(server, handler), daemon=True).start()
+        return self
+
+    def stop(self):
+        for server in self._servers:
+            server.close()
+        with self._lock:
+            for conn in self._subscribers:
+                conn.close()
+            self._subscribers = []
+
+    def _accept(self, server, handler):
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            handler(conn)
+
+    def _reply(self, command):
+        if command == 'j/clients':
+            return self.clients
+        if command == 'j/activeworkspace':
+            return {'id': self.active_workspace, 'name': str(self.active_workspace)}
+        if command == 'j/monitors':
+            return self.monitors
+        if command == 'j/activewindow':
+            on_ws = [c for c in self.clients if c['workspace']['id'] == self.active_workspace]
+            return on_ws[-1] if on_ws else {}
+        return None
+
+    def _handle_request(self, conn):
+        with conn:
+            command = conn.recv(4096).decode('utf-8')
+            self.requests += 1
+            if command.startswith('[[BATCH]]'):
+                # Hyprland separates the replies of a batch with blank lines
+                replies = [self._reply(c.strip()) for c in command[len('[[BATCH]]'):].split(';')]
+                text = '\n\n\n'.join('unknown request' if r is None else json.dumps(r) for r in replies)
+            else:
+                reply = self._reply(command)
+                text = 'unknown request' if reply is None else json.dumps(reply)
+            conn.sendall(text.encode('utf-8'))
+
+    def _add_subscriber(self, conn):
+        with self._lock:
+            self._subscribers.append(conn)
+
+    def emit(self, event, data):
+        """Broadcast 'event>>data' to every .socket2.sock listener."""
+        line = f'{event}>>{data}\n'.encode('utf-8')
+        with self._lock:
+            for conn in list(self._subscribers):
+                try:
+                    conn.sendall(line)
+                except OSError:
+                    self._subscribers.remove(conn)
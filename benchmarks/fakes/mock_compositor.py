@@ -0,0 +1,214 @@
+"""
+mock_compositor.py - Just enough of a Wayland compositor to serve wlr-screencopy
+
+Advertises wl_shm, one wl_output per configured output, zxdg_output_manager_v1 and
+zwlr_screencopy_manager_v1, and answers copies from a pre-rendered ("recorded")
+XRGB8888 frame. Used to benchmark the in-process screencopy backend on machines
+without a compositor.
+"""
+import array
+import mmap
+import os
+import socket
+import struct
+import threading
+
+from core.screencopy import ArgReader, pack_int, pack_message, pack_string, pack_uint
+
+GLOBALS = (
+    'wl_shm',
+    'zxdg_output_manager_v1',
+    'zwlr_screencopy_manager_v1',
+)
+
+
+def synthetic_frame(width, height):
+    """A screen-like XRGB8888 image: flat panels, a gradient band and some text-like noise."""
+    row_pattern = bytearray()
+    for x in range(width):
+        if x < width // 5:
+            px = (0x2e, 0x27, 0x23)  # dark side panel
+        elif x % 97 < 3:
+            px = (0x80, 0x80, 0x80)  # vertical rules
+        else:
+            shade = 0xe0 + (x * 31 // width)
+            px = (shade, shade, shade)
+        row_pattern += bytes(px) + b'\xff'
+    rows = []
+    for y in range(height):
+        if y % 24 in (8, 9, 10) and y < height * 3 // 4:
+            # "text" line: alternate dark runs over the light area
+            row = bytearray(row_pattern)
+            for x in range(width // 5 + 8, width - 8, 7):
+                row[x * 4:x * 4 + 12] = b'\x20\x20\x20\xff' * 3
+            rows.append(bytes(row))
+        else:
+            rows.append(bytes(row_pattern))
+    return b''.join(rows)
+
+
+class MockOutput:
+    def __init__(self, name, x, y, width, height, scale=1):
+        self.name = name
+        self.x, self.y = x, y
+        self.width, self.height = width, height  # logical size
+        self.scale = scale
+        self.pixels = synthetic_frame(width * scale, height * scale)
+
+
+class MockCompositor:
+    def __init__(self, socket_path, outputs):
+        self.socket_path = socket_path
+        self.outputs = outputs
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.server.bind(socket_path)
+        self.server.listen(4)
+        self.copies = 0
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=_Client(self, conn).run, daemon=True).start()
+
+
+class _Client:
+    def __init__(self, compositor, conn):
+        self.compositor = compositor
+        self.conn = conn
+        self.objects = {1: ('wl_display', None)}
+        self.fds = []
+        self.buffer = b''
+        self.globals = [(i + 1, name, 3) for i, name in enumerate(GLOBALS)]
+        for output in compositor.outputs:
+            self.globals.append((len(self.globals) + 1, 'wl_output', 4))
+
+    def send(self, object_id, opcode, payload=b''):
+        self.conn.sendall(pack_message(object_id, opcode, payload))
+
+    def run(self):
+        try:
+            while True:
+                data, ancdata, _flags, _addr = self.conn.recvmsg(65536, socket.CMSG_SPACE(16 * 4))
+                for level, kind, cdata in ancdata:
+                    if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                        fds = array.array('i')
+                        fds.frombytes(cdata[:len(cdata) - (len(cdata) % fds.itemsize)])
+                        self.fds.extend(fds)
+                if not data:
+                    break
+                self.buffer += data
+                while len(self.buffer) >= 8:
+                    object_id, word = struct.unpack_from('<II', self.buffer)
+                    size, opcode = word >> 16, word & 0xFFFF
+                    if len(self.buffer) < size:
+                        break
+                    payload, self.buffer = self.buffer[8:size], self.buffer[size:]
+                    self.handle(object_id, opcode, ArgReader(payload))
+        except OSError:
+            pass
+        finally:
+            for fd in self.fds:
+                os.close(fd)
+            self.conn.close()
+
+    def handle(self, object_id, opcode, args):
+        interface, state = self.objects.get(object_id, (None, None))
+        handler = getattr(self, f'on_{interface}', None)
+        if handler is not None:
+            handler(object_id, state, opcode, args)
+
+    def on_wl_display(self, _oid, _state, opcode, args):
+        new_id = args.uint()
+        if opcode == 0:  # sync
+            self.send(new_id, 0, pack_uint(0))
+        elif opcode == 1:  # get_registry
+            self.objects[new_id] = ('wl_registry', None)
+            for name, interface, version in self.globals:
+                self.send(new_id, 0, pack_uint(name) + pack_string(interface) + pack_uint(version))
+
+    def on_wl_registry(self, _oid, _state, opcode, args):
+        name, interface, _version, new_id = args.uint(), args.string(), args.uint(), args.uint()
+        if interface == 'wl_output':
+            output = self.compositor.outputs[name - len(GLOBALS) - 1]
+            self.objects[new_id] = ('wl_output', output)
+            self.send(new_id, 0, pack_int(output.x) + pack_int(output.y) + pack_int(0) + pack_int(0) +
+                      pack_int(0) + pack_string('Mock') + pack_string('Output') + pack_int(0))
+            self.send(new_id, 1, pack_uint(0x3) + pack_int(output.width * output.scale) +
+                      pack_int(output.height * output.scale) + pack_int(60000))
+            self.send(new_id, 3, pack_int(output.scale))
+            self.send(new_id, 4, pack_string(output.name))
+            self.send(new_id, 2)
+        else:
+            self.objects[new_id] = (interface, None)
+            if interface == 'wl_shm':
+                self.send(new_id, 0, pack_uint(0))
+                self.send(new_id, 0, pack_uint(1))
+
+    def on_zxdg_output_manager_v1(self, _oid, _state, opcode, args):
+        if opcode == 1:  # get_xdg_output
+            new_id, output_id = args.uint(), args.uint()
+            output = self.objects[output_id][1]
+            self.objects[new_id] = ('zxdg_output_v1', output)
+            self.send(new_id, 0, pack_int(output.x) + pack_int(output.y))
+            self.send(new_id, 1, pack_int(output.width) + pack_int(output.height))
+            self.send(new_id, 2)
+
+    def on_zwlr_screencopy_manager_v1(self, _oid, _state, opcode, args):
+        if opcode not in (0, 1):
+            return
+        frame_id, _cursor, output_id = args.uint(), args.int(), args.uint()
+        output = self.objects[output_id][1]
+        if opcode == 1:
+            region = (args.int(), args.int(), args.int(), args.int())
+        else:
+            region = (0, 0, output.width, output.height)
+        s = output.scale
+        width, height = region[2] * s, region[3] * s
+        self.objects[frame_id] = ('zwlr_screencopy_frame_v1', (output, region))
+        self.send(frame_id, 0, pack_uint(1) + pack_uint(width) + pack_uint(height) + pack_uint(width * 4))
+        self.send(frame_id, 6)  # buffer_done
+
+    def on_wl_shm(self, _oid, _state, opcode, args):
+        if opcode == 0:  # create_pool
+            new_id, size = args.uint(), args.int()
+            self.objects[new_id] = ('wl_shm_pool', {'fd': self.fds.pop(0), 'size': size})
+
+    def on_wl_shm_pool(self, _oid, pool, opcode, args):
+        if opcode == 0:  # create_buffer
+            new_id = args.uint()
+            offset, width, height, stride = args.int(), args.int(), args.int(), args.int()
+            self.objects[new_id] = ('wl_buffer', (pool, offset, width, height, stride))
+        elif opcode == 1:  # destroy
+            os.close(pool['fd'])
+
+    def on_zwlr_screencopy_frame_v1(self, frame_id, state, opcode, args):
+        if opcode != 0:  # only copy matters
+            return
+        output, region = state
+        pool, offset, width, height, stride = self.objects[args.uint()][1]
+        s = output.scale
+        src_stride = output.width * s * 4
+        x0, y0 = region[0] * s, region[1] * s
+        with mmap.mmap(pool['fd'], pool['size'], mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE) as mapped:
+            for row in range(height):
+                src = (y0 + row) * src_stride + x0 * 4
+                dst = offset + row * stride
+                mapped[dst:dst + width * 4] = output.pixels[src:src + width * 4]
+        self.compositor.copies += 1
+        self.send(frame_id, 1, pack_uint(0))  # flags
+        self.send(frame_id, 2, pack_uint(0) + pack_uint(0) + pack_uint(0))  # ready
@@ -0,0 +1,183 @@
+"""
+notification_server.py - Stand-in for the session bus with a notification daemon on it
+
+Listens on a Unix socket and plays both the bus (SASL, Hello, AddMatch, GetNameOwner) and
+org.freedesktop.Notifications (Notify, CloseNotification, GetCapabilities,
+GetServerInformation) for every client that connects. Received notifications are
+kept in `notifications`; invoke_action() and close() send the signals a real server
+sends when the user clicks a button or dismisses a popup. Point
+DBUS_SESSION_BUS_ADDRESS at it (see `env`) to exercise ui.notify without a desktop.
+"""
+import os
+import socket
+import threading
+
+from .dbus_wire import (BUS_NAME, ERROR, METHOD_CALL, METHOD_RETURN, NO_REPLY_EXPECTED, SIGNAL, DBusError,
+                        MessageStream, encode_message)
+
+NOTIFICATIONS = 'org.freedesktop.Notifications'
+NOTIFICATIONS_PATH = '/org/freedesktop/Notifications'
+
+# Unique bus name of the notification server
+SERVER_NAME = ':1.0'
+
+CAPABILITIES = ['actions', 'body', 'body-markup', 'icon-static', 'persistence']
+
+
+class FakeNotificationServer:
+    def __init__(self, socket_path, capabilities=CAPABILITIES):
+        self.socket_path = socket_path
+        self.capabilities = list(capabilities)
+        # dicts: id, app_name, replaces_id, icon, summary, body, actions, hints, timeout, signature
+        self.notifications = []
+        self.calls = 0
+        self._next_id = 1
+        self._clients = []
+        self._lock = threading.Lock()
+        self._serial = 0
+        self._server = None
+        self.received = threading.Condition(self._lock)
+
+    @property
+    def env(self):
+        return {'DBUS_SESSION_BUS_ADDRESS': f'unix:path={self.socket_path}'}
+
+    def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.socket_path)
+        self._server.listen(8)
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.close()
+        with self._lock:
+            for conn in self._clients:
+                conn.close()
+            self._clients = []
+
+    def wait_for(self, count, timeout=5.0):
+        """Block until `count` notifications have been received; returns whether they were."""
+        with self.received:
+            return self.received.wait_for(lambda: len(self.notifications) >= count, timeout)
+
+    def _accept(self):
+        n = 0
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            n += 1
+            threading.Thread(target=self._serve, args=(conn, f':1.{n}'), daemon=True).start()
+
+    def _handshake(self, conn):
+        """SASL: accept any AUTH; returns what the client sent after BEGIN, or None if it hung up."""
+        data = b''
+        while True:
+            chunk = conn.recv(4096)
+            if not chunk:
+                return None
+            data += chunk
+            while b'\r\n' in data:
+                line, data = data.split(b'\r\n', 1)
+                line = line.lstrip(b'\0')
+                if line.startswith(b'AUTH'):
+                    conn.sendall(b'OK 00000000000000000000000000000000\r\n')
+                elif line == b'BEGIN':
+                    # The first message may have arrived in the same read
+                    return data
+                else:
+                    conn.sendall(b'ERROR\r\n')
+
+    def _send(self, conn, msg_type, signature='', args=(), **fields):
+        with self._lock:
+            self._serial += 1
+            data = encode_message(msg_type, self._serial, signature, args, **fields)
+        conn.sendall(data)
+
+    def _serve(self, conn, unique_name):
+        with conn:
+            initial = self._handshake(conn)
+            if initial is None:
+                return
+            with self._lock:
+                self._clients.append(conn)
+            stream = MessageStream(conn, initial)
+            try:
+                while True:
+                    message = stream.read()
+                    if message.type == METHOD_CALL:
+                        self._handle(conn, unique_name, message)
+            except (OSError, DBusError):
+                pass
+            finally:
+                with self._lock:
+                    if conn in self._clients:
+                        self._clients.remove(conn)
+
+    def _handle(self, conn, unique_name, message):
+        self.calls += 1
+        reply = None
+        if message.interface == BUS_NAME:
+            if message.member == 'Hello':
+                reply = ('s', (unique_name,))
+            elif message.member in ('AddMatch', 'RemoveMatch'):
+                reply = ('', ())
+            elif message.member == 'GetNameOwner' and message.body[0] == NOTIFICATIONS:
+                reply = ('s', (SERVER_NAME,))
+        elif message.interface == NOTIFICATIONS:
+            reply = self._notifications_call(message)
+        if message.flags & NO_REPLY_EXPECTED:
+            return
+        if reply is None:
+            self._send(conn, ERROR, 's', (f'{message.member} is not supported',), reply_serial=message.serial,
+                       destination=unique_name, error_name='org.freedesktop.DBus.Error.UnknownMethod')
+            return
+        signature, args = reply
+        self._send(conn, METHOD_RETURN, signature, args, reply_serial=message.serial, destination=unique_name,
+                   sender=NOTIFICATIONS if message.interface == NOTIFICATIONS else BUS_NAME)
+
+    def _notifications_call(self, message):
+        if message.member == 'Notify':
+            app_name, replaces_id, icon, summary, body, actions, hints, timeout = message.body
+            with self._lock:
+                notification_id = replaces_id or self._next_id
+                if not replaces_id:
+                    self._next_id += 1
+                self.notifications.append({
+                    'id': notification_id, 'app_name': app_name, 'replaces_id': replaces_id, 'icon': icon,
+                    'summary': summary, 'body': body, 'actions': dict(zip(actions[::2], actions[1::2])),
+                    'hints': hints, 'timeout': timeout, 'signature': message.signature})
+                self.received.notify_all()
+            return 'u', (notification_id,)
+        if message.member == 'CloseNotification':
+            self.close(message.body[0], reason=3)
+            return '', ()
+        if message.member == 'GetCapabilities':
+            return 'as', (self.capabilities,)
+        if message.member == 'GetServerInformation':
+            return 'ssss', ('fake-notifications', 'hyprsnipper', '0', '1.2')
+        return None
+
+    def _broadcast(self, member, signature, args):
+        with self._lock:
+            clients = list(self._clients)
+        for conn in clients:
+            try:
+                self._send(conn, SIGNAL, signature, args, path=NOTIFICATIONS_PATH, interface=NOTIFICATIONS,
+                           member=member, sender=NOTIFICATIONS)
+            except OSError:
+                pass
+
+    def invoke_action(self, notification_id, key):
+        """The user clicked the action `key` (or 'default', the popup itself)."""
+        self._broadcast('ActionInvoked', 'us', (notification_id, key))
+        self.close(notification_id, reason=2)
+
+    def close(self, notification_id, reason=1):
+        """The popup went away: 1 expired, 2 dismissed by the user, 3 closed by a call."""
+        self._broadcast('NotificationClosed', 'uu', (notification_id, reason))
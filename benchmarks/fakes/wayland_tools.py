@@ -0,0 +1,226 @@
+"""
+wayland_tools.py - Stand-ins for grim, slurp, hyprctl, wl-copy and notify-send
+
+install() writes small executables named after the real tools into a bin directory,
+plus a config.json (outputs, clients, the region slurp answers with) and one
+pre-rendered PPM of the whole output layout. Put the bin directory first on PATH and
+HyprSnipper's capture paths run without a compositor:
+
+    grim        `-t ppm [-g "x,y wxh"] -`: the layout frame, cropped to the geometry
+    slurp       prints the configured region; with -r, the box it is fed that is
+                closest to the region's center
+    hyprctl     clients, activeworkspace, monitors and activewindow as JSON
+    wl-copy     reads the image from stdin and discards it
+    notify-send does nothing
+
+Every call is logged as a JSON line to calls.jsonl (tool, arguments, bytes read or written).
+"""
+import json
+import mmap
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+TOOLS = ('grim', 'slurp', 'hyprctl', 'wl-copy', 'notify-send')
+
+# name: logical output rects, left to right
+LAYOUTS = {
+    '1080p': [(0, 0, 1920, 1080)],
+    '1440p': [(0, 0, 2560, 1440)],
+    '4k': [(0, 0, 3840, 2160)],
+    '2x1080p': [(0, 0, 1920, 1080), (1920, 0, 1920, 1080)],
+    '3x4k': [(0, 0, 3840, 2160), (3840, 0, 3840, 2160), (7680, 0, 3840, 2160)],
+}
+
+
+def layout_rect(outputs):
+    x0 = min(x for x, _y, _w, _h in outputs)
+    y0 = min(y for _x, y, _w, _h in outputs)
+    x1 = max(x + w for x, _y, w, _h in outputs)
+    y1 = max(y + h for _x, y, _w, h in outputs)
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def monitors(outputs, active_workspace=1):
+    """`hyprctl monitors -j` entries for the outputs; the first one is focused."""
+    return [{
+        'id': i, 'name': f'FAKE-{i + 1}', 'x': x, 'y': y, 'width': w, 'height': h,
+        'scale': 1.0, 'transform': 0, 'focused': i == 0,
+        'activeWorkspace': {'id': active_workspace + i, 'name': str(active_workspace + i)},
+    } for i, (x, y, w, h) in enumerate(outputs)]
+
+
+def _output_rows(index, width, height):
+    """Row patterns for one output: a side panel, rules, a gradient and text-like lines (RGB)."""
+    tint = (index * 40) % 120
+    row = bytearray()
+    for x in range(width):
+        if x < width // 5:
+            px = (0x23 + tint // 4, 0x27, 0x2e)  # dark side panel
+        elif x % 97 < 3:
+            px = (0x80, 0x80, 0x80)  # vertical rules
+        else:
+            shade = 0xe0 + (x * 31 // width)
+            px = (shade, shade - tint // 8, shade)
+        row += bytes(px)
+    plain = bytes(row)
+    for x in range(width // 5 + 8, width - 8, 7):
+        row[x * 3:x * 3 + 9] = b'\x20' * 9
+    text = bytes(row)
+    return [text if y % 24 in (8, 9, 10) and y < height * 3 // 4 else plain for y in range(height)]
+
+
+def write_layout_ppm(path, outputs):
+    """Render the whole layout once as a binary PPM; gaps between outputs are black."""
+    lx, ly, lw, lh = layout_rect(outputs)
+    rows = [_output_rows(i, w, h) for i, (_x, _y, w, h) in enumerate(outputs)]
+    with open(path, 'wb') as f:
+        f.write(b'P6\n%d %d\n255\n' % (lw, lh))
+        for y in range(ly, ly + lh):
+            line = bytearray(lw * 3)
+            for (ox, oy, ow, oh), output_rows in zip(outputs, rows):
+                if oy <= y < oy + oh:
+                    start = (ox - lx) * 3
+                    line[start:start + ow * 3] = output_rows[y - oy]
+            f.write(line)
+
+
+def install(directory, outputs, clients, region=None, active_workspace=1):
+    """
+    Set up the fake tools in `directory`; returns the environment to run HyprSnipper with
+    (PATH and HYPRSNIPPER_FAKE_DIR). region: (x, y, w, h) slurp answers with, by default
+    a quarter of the first output around its center.
+    """
+    bin_dir = os.path.join(directory, 'bin')
+    os.makedirs(bin_dir, exist_ok=True)
+    if region is None:
+        x, y, w, h = outputs[0]
+        region = (x + w // 4, y + h // 4, w // 2, h // 2)
+    config = {'outputs': outputs, 'clients': clients, 'region': region, 'active_workspace': active_workspace}
+    with open(os.path.join(directory, 'config.json'), 'w') as f:
+        json.dump(config, f)
+    write_layout_ppm(os.path.join(directory, 'screen.ppm'), outputs)
+    for tool in TOOLS:
+        path = os.path.join(bin_dir, tool)
+        with open(path, 'w') as f:
+            f.write(f"#!{sys.executable}\n"
+                    f"import sys\n"
+                    f"sys.path.insert(0, {ROOT!r})\n"
+                    f"from benchmarks.fakes.wayland_tools import main\n"
+                    f"sys.exit(main())\n")
+        os.chmod(path, 0o755)
+    return {'PATH': bin_dir + os.pathsep + os.environ.get('PATH', ''), 'HYPRSNIPPER_FAKE_DIR': directory}
+
+
+def read_calls(directory):
+    """Logged calls as dicts: {'tool', 'args', 'bytes', 'time'}."""
+    try:
+        with open(os.path.join(directory, 'calls.jsonl')) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def _log(directory, tool, args, nbytes=0):
+    with open(os.path.join(directory, 'calls.jsonl'), 'a') as f:
+        f.write(json.dumps({'tool': tool, 'args': args, 'bytes': nbytes, 'time': time.time()}) + '\n')
+
+
+def _parse_geometry(text):
+    position, size = text.split(' ')
+    x, y = position.split(',')
+    w, h = size.split('x')
+    return int(x), int(y), int(w), int(h)
+
+
+def _grim(directory, config, args):
+    geometry = None
+    if '-g' in args:
+        geometry = _parse_geometry(args[args.index('-g') + 1])
+    target = args[-1] if args and args[-1] != '-' and not args[-1].startswith('-') else '-'
+    lx, ly, lw, lh = layout_rect(config['outputs'])
+    with open(os.path.join(directory, 'screen.ppm'), 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as screen:
+        header = b'P6\n%d %d\n255\n' % (lw, lh)
+        if geometry is None:
+            payload = screen[:]
+        else:
+            x, y, w, h = geometry
+            x0, y0 = max(x, lx), max(y, ly)
+            x1, y1 = min(x + w, lx + lw), min(y + h, ly + lh)
+            if x1 <= x0 or y1 <= y0:
+                print("grim: geometry is outside every output", file=sys.stderr)
+                return None
+            stride = lw * 3
+            rows = [screen[len(header) + (row - ly) * stride + (x0 - lx) * 3:
+                           len(header) + (row - ly) * stride + (x1 - lx) * 3] for row in range(y0, y1)]
+            payload = b'P6\n%d %d\n255\n' % (x1 - x0, y1 - y0) + b''.join(rows)
+    if target == '-':
+        sys.stdout.buffer.write(payload)
+        sys.stdout.buffer.flush()
+    else:
+        with open(target, 'wb') as out:
+            out.write(payload)
+    return len(payload)
+
+
+def _slurp(config, args):
+    x, y, w, h = config['region']
+    if '-r' in args:
+        # Pick the offered box closest to the region's center, like a click there
+        cx, cy = x + w / 2, y + h / 2
+        boxes = [_parse_geometry(line.strip()) for line in sys.stdin if line.strip()]
+        if not boxes:
+            print("slurp: no boxes", file=sys.stderr)
+            return None
+        x, y, w, h = min(boxes, key=lambda b: (b[0] + b[2] / 2 - cx) ** 2 + (b[1] + b[3] / 2 - cy) ** 2)
+    result = f"{x},{y} {w}x{h}"
+    print(result)
+    return result
+
+
+def _hyprctl(config, args):
+    command = next((a for a in args if not a.startswith('-')), '')
+    active = config['active_workspace']
+    if command == 'clients':
+        reply = config['clients']
+    elif command == 'activeworkspace':
+        reply = {'id': active, 'name': str(active)}
+    elif command == 'monitors':
+        reply = monitors(config['outputs'], active)
+    elif command == 'activewindow':
+        on_ws = [c for c in config['clients'] if c['workspace']['id'] == active]
+        reply = on_ws[-1] if on_ws else {}
+    else:
+        print(f"hyprctl: unsupported request {command!r}", file=sys.stderr)
+        return None
+    text = json.dumps(reply)
+    print(text)
+    return text
+
+
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    tool, args = os.path.basename(argv[0]), argv[1:]
+    directory = os.environ['HYPRSNIPPER_FAKE_DIR']
+    with open(os.path.join(directory, 'config.json')) as f:
+        config = json.load(f)
+    if tool == 'grim':
+        nbytes = _grim(directory, config, args)
+        _log(directory, tool, args, nbytes or 0)
+        return 0 if nbytes is not None else 1
+    if tool in ('slurp', 'hyprctl'):
+        reply = _slurp(config, args) if tool == 'slurp' else _hyprctl(config, args)
+        _log(directory, tool, args, len(reply or ''))
+        return 0 if reply is not None else 1
+    if tool == 'wl-copy':
+        _log(directory, tool, args, len(sys.stdin.buffer.read()))
+        return 0
+    _log(directory, tool, args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
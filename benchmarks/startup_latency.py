@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+startup_latency.py - Compare a cold HyprSnipper launch with a daemon trigger
+
+Cold launch:     spawn `main.py --daemon` and time until it answers `ping`
+                 (interpreter + PySide6 import + QApplication + SnipperWindow).
+Daemon trigger:  with that daemon resident, time `main.py --trigger show`
+                 (a full client process) and a raw in-process socket round trip.
+
+Runs under the offscreen Qt platform when no Wayland display is available.
+
+    python3 benchmarks/startup_latency.py [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+sys.path.insert(0, SRC)
+
+from core import ipc  # noqa: E402
+
+
+def bench_env(runtime_dir):
+    env = dict(os.environ)
+    env['XDG_RUNTIME_DIR'] = runtime_dir
+    if not env.get('WAYLAND_DISPLAY'):
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return env
+
+
+def wait_for_daemon(timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if ipc.daemon_running():
+            return True
+        time.sleep(0.002)
+    return False
+
+
+def cold_launch(env):
+    """Returns (seconds until the daemon answers, process handle)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, 'main.py', '--daemon'], cwd=SRC, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if not wait_for_daemon():
+        proc.kill()
+        raise RuntimeError('daemon did not come up')
+    return time.perf_counter() - start, proc
+
+
+def stop_daemon(proc):
+    try:
+        ipc.send_command('quit')
+    except OSError:
+        pass
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def summarize(name, samples):
+    ms = [s * 1000 for s in samples]
+    print(f"{name:<28} median {statistics.median(ms):8.1f} ms   "
+          f"min {min(ms):8.1f} ms   max {max(ms):8.1f} ms   (n={len(ms)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as runtime_dir:
+        os.environ['XDG_RUNTIME_DIR'] = runtime_dir
+        env = bench_env(runtime_dir)
+
+        cold = []
+        for _ in range(args.runs):
+            elapsed, proc = cold_launch(env)
+            cold.append(elapsed)
+            stop_daemon(proc)
+
+        _, proc = cold_launch(env)
+        client, socket_rt = [], []
+        try:
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, 'main.py', '--trigger', 'show'], cwd=SRC, env=env, check=True)
+                client.append(time.perf_counter() - start)
+            for _ in range(args.runs * 10):
+                start = time.perf_counter()
+                ipc.send_command('show')
+                socket_rt.append(time.perf_counter() - start)
+        finally:
+            stop_daemon(proc)
+
+    summarize('cold launch (to ready)', cold)
+    summarize('trigger client process', client)
+    summarize('trigger socket round trip', socket_rt)
+
+
+if __name__ == '__main__':
+    main()
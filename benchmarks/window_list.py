@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+window_list.py - Cost of fetching the Window-mode client list
+
+    hyprctl fork    two `hyprctl ... -j` processes (the old path; real Hyprland only)
+    socket          direct requests to .socket.sock (fake Hyprland server)
+    cached          HyprlandState kept current by .socket2.sock events
+
+    python3 benchmarks/window_list.py [--clients 200] [--runs 50]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, ROOT)
+
+from core import hyprland  # noqa: E402
+from core.process import run_command  # noqa: E402
+from benchmarks.fakes.hyprland_ipc import FakeHyprland, synthetic_clients  # noqa: E402
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+def report(name, samples, windows):
+    ms = [s * 1000 for s in samples]
+    print(f"{name:<16} median {statistics.median(ms):8.3f} ms   max {max(ms):8.3f} ms   {len(windows)} windows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--workspaces', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+
+    if os.environ.get('HYPRLAND_INSTANCE_SIGNATURE') and shutil.which('hyprctl'):
+        def fork():
+            import json
+            ws = json.loads(run_command(['hyprctl', 'activeworkspace', '-j'], text=True))['id']
+            clients = json.loads(run_command(['hyprctl', 'clients', '-j'], text=True))
+            return [c for c in clients if c.get('workspace', {}).get('id') == ws]
+        samples, windows = timed(fork, max(1, args.runs // 5))
+        report('hyprctl fork', samples, windows)
+    else:
+        print("hyprctl fork     skipped (not running under Hyprland)")
+
+    with tempfile.TemporaryDirectory() as runtime_dir:
+        fake = FakeHyprland(runtime_dir, clients=synthetic_clients(args.clients, workspaces=args.workspaces)).start()
+        os.environ.update(fake.env)
+        try:
+            state = hyprland.HyprlandState()
+            samples, windows = timed(lambda: (state.refresh(), state.visible_windows()[1])[1], args.runs)
+            report('socket', samples, windows)
+
+            state.start()
+            deadline = time.time() + 2
+            while not fake._subscribers and time.time() < deadline:
+                time.sleep(0.01)
+            state.visible_windows()  # settle after the listener connects
+            requests_before = fake.requests
+            samples, windows = timed(lambda: state.visible_windows()[1], args.runs)
+            report('cached', samples, windows)
+            print(f"{'':<16} {fake.requests - requests_before} socket requests while cached")
+            state.stop()
+        finally:
+            fake.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+# __init__.py for core module (Qt-free helpers shared by the GUI and CLI)
@@ -0,0 +1,114 @@
+"""
+backends.py - Capture backends that return in-memory Frames
+
+    screencopy  in-process wlr-screencopy client (no fork, no PNG)
+    grim        `grim -t ppm -` piped through stdout, used as the fallback
+"""
+import shutil
+import subprocess
+
+from .frame import Frame
+from .process import Cancelled, run_command
+from .screencopy import ScreencopyClient, ScreencopyError
+
+BACKENDS = ('auto', 'screencopy', 'grim')
+
+
+class CaptureError(Exception):
+    """Raised when no backend could capture the requested area."""
+
+
+def parse_geometry(geom):
+    """Parse a slurp/grim geometry string "x,y wxh" into (x, y, w, h)."""
+    if geom is None:
+        return None
+    if isinstance(geom, tuple):
+        return geom
+    pos, size = geom.strip().split(' ')
+    x, y = pos.split(',')
+    w, h = size.lower().replace('×', 'x').split('x')
+    return (int(x), int(y), int(w), int(h))
+
+
+def format_geometry(rect):
+    """Format (x, y, w, h) as the "x,y wxh" string grim and slurp use."""
+    x, y, w, h = rect
+    return f"{x},{y} {w}x{h}"
+
+
+class GrimBackend:
+    name = 'grim'
+
+    def available(self):
+        return shutil.which('grim') is not None
+
+    def capture(self, geometry=None, cancel=None):
+        args = ['grim', '-t', 'ppm']
+        if geometry is not None:
+            args += ['-g', format_geometry(geometry)]
+        args.append('-')
+        return Frame.from_ppm(run_command(args, cancel=cancel), geometry)
+
+
+class ScreencopyBackend:
+    name = 'screencopy'
+
+    def __init__(self):
+        self._client = None
+
+    def available(self):
+        try:
+            self._get_client()
+            return True
+        except ScreencopyError:
+            return False
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = ScreencopyClient()
+        return self._client
+
+    def capture(self, geometry=None, cancel=None):
+        try:
+            return self._get_client().capture(geometry, cancel=cancel)
+        except (ScreencopyError, Cancelled):
+            # Drop the connection so the next capture reconnects (e.g. after an output change,
+            # or with a copy still pending from a cancelled capture)
+            self.reset()
+            raise
+
+    def reset(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+_screencopy = ScreencopyBackend()
+_grim = GrimBackend()
+
+
+def capture_frame(geometry=None, backend='auto', cancel=None):
+    """
+    Capture `geometry` ("x,y wxh" string, (x, y, w, h) tuple, or None for all outputs)
+    into a Frame. 'auto' tries screencopy first and falls back to grim.
+    Safe to call from a worker thread; raises Cancelled if `cancel` fires.
+    """
+    geometry = parse_geometry(geometry)
+    errors = []
+    if backend in ('auto', 'screencopy'):
+        try:
+            frame = _screencopy.capture(geometry, cancel=cancel)
+            if cancel is not None:
+                cancel.check()
+            return frame
+        except ScreencopyError as e:
+            errors.append(f"screencopy: {e}")
+            if backend == 'screencopy':
+                raise CaptureError('; '.join(errors))
+    try:
+        return _grim.capture(geometry, cancel=cancel)
+    except Cancelled:
+        raise
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        errors.append(f"grim: {e}")
+    raise CaptureError('; '.join(errors))
@@ -0,0 +1,236 @@
+"""
+burst.py - Capture the same area repeatedly: N shots, or every T ms for a duration
+
+    hyprsnipper --interval 500ms --count 120 --mode window
+    hyprsnipper --interval 1s --duration 5m --mode full
+    hyprsnipper --count 30 --mode region          (as fast as the encoders keep up)
+
+The area is chosen once (slurp for region/window, the focused output for full) and then
+captured on a fixed schedule: shot i is due at start + i * interval. Captures run in this
+process; encoding and writing run in a process pool, so they neither share the GIL with
+the capture loop nor stall it. At most `queue_size` frames are in flight. When the
+encoders fall behind, the producer waits for a free slot and the shots whose time has
+passed meanwhile are dropped, so memory stays flat and the frames that are written keep
+their real timing (frame numbers are slot numbers; gaps are drops).
+
+Frames go to SAVE_DIR/hyprsnip_burst_<time>/frame_NNNNN.<ext> in SAVE_FORMAT/SAVE_LEVEL.
+"""
+import datetime
+import multiprocessing
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .backends import CaptureError, capture_frame, parse_geometry
+from .encoders import FORMATS, encode
+from .frame import Frame
+from .pipeline import write_file
+from .process import Cancelled
+
+UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'min': 60, 'h': 3600}
+
+
+def _parse_time(text, default_unit, kind, examples):
+    match = re.fullmatch(r'\s*(\d+(?:\.\d*)?|\.\d+)\s*([a-z]*)\s*', str(text).lower())
+    if not match or (match.group(2) and match.group(2) not in UNITS):
+        raise ValueError(f"Invalid {kind}: {text!r} (use e.g. {examples})")
+    return float(match.group(1)) * UNITS[match.group(2) or default_unit]
+
+
+def parse_interval(text):
+    """Seconds from '500ms', '0.5s', '2m' or a bare number of milliseconds."""
+    return _parse_time(text, 'ms', 'interval', '500ms, 2s or 1m')
+
+
+def parse_duration(text):
+    """Seconds from '30s', '5m', '1h' or a bare number of seconds."""
+    return _parse_time(text, 's', 'duration', '30s, 5m or 1h')
+
+
+def _ignore_sigint():
+    # Ctrl+C reaches the whole process group; let the parent stop the burst and drain the queue
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _encode_to_file(data, width, height, stride, fmt, path, image_format, level):
+    """Pool worker: encode one raw frame and write it."""
+    payload = encode(Frame(data, width, height, stride, fmt), image_format, level)
+    return write_file(path, payload)
+
+
+class BurstStats:
+    def __init__(self):
+        self.captured = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.peak_queue = 0
+        self.elapsed = 0.0
+
+    @property
+    def fps(self):
+        return self.captured / self.elapsed if self.elapsed else 0.0
+
+    def report(self, interval):
+        target = f", target {1 / interval:.2f}" if interval else ''
+        return (f"{self.captured} captured, {self.written} written, {self.dropped} dropped, "
+                f"{self.failed} failed in {self.elapsed:.1f}s: {self.fps:.2f} FPS{target}, "
+                f"peak queue {self.peak_queue}")
+
+
+class Burst:
+    """
+    One burst run. interval in seconds (0 = back to back); stops after `count` shots
+    or `duration` seconds, whichever comes first, or when cancel() is called.
+    """
+
+    def __init__(self, geometry, out_dir, interval=0.0, count=None, duration=None, backend='auto',
+                 image_format='png', level=1, workers=None, queue_size=None, notify=print):
+        if count is None and duration is None:
+            raise ValueError("A burst needs a count or a duration")
+        self.geometry = parse_geometry(geometry)
+        self.out_dir = os.path.expanduser(out_dir)
+        self.interval = interval
+        self.count = count
+        self.duration = duration
+        self.backend = backend
+        self.image_format = image_format
+        self.level = level
+        # The capture loop keeps one core busy; leave it to itself when there are spare ones
+        self.workers = workers or max(1, (os.cpu_count() or 1) - 1)
+        self.queue_size = queue_size or 2 * self.workers
+        self.notify = notify
+        self.stats = BurstStats()
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def cancel(self):
+        self._stop.set()
+
+    def _due(self, index, start):
+        """Time shot `index` is due, or None once the burst is over."""
+        if self.count is not None and index >= self.count:
+            return None
+        due = start + index * self.interval
+        if self.duration is not None and due - start >= self.duration:
+            return None
+        return due
+
+    def _acquire_slot(self):
+        """Wait for room in the queue; False if cancelled meanwhile."""
+        while not self._slots.acquire(timeout=0.1):
+            if self._stop.is_set():
+                return False
+        with self._lock:
+            self._in_flight += 1
+            self.stats.peak_queue = max(self.stats.peak_queue, self._in_flight)
+        return True
+
+    def _done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled():
+                self.stats.dropped += 1
+            elif future.exception() is None:
+                self.stats.written += 1
+            else:
+                self.stats.failed += 1
+                if self.stats.failed == 1:
+                    self.notify(f"Encoding failed: {future.exception()}")
+        self._slots.release()
+
+    def run(self):
+        """Capture until done; returns the BurstStats once every frame is written."""
+        extension = FORMATS[self.image_format][1]
+        os.makedirs(self.out_dir, exist_ok=True)
+        # spawn: the workers must not inherit the Wayland socket or any helper threads
+        pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_ignore_sigint)
+        stats = self.stats
+        start = time.monotonic()
+        index = 0
+        try:
+            while not self._stop.is_set():
+                due = self._due(index, start)
+                if due is None:
+                    break
+                wait = due - time.monotonic()
+                if wait > 0 and self._stop.wait(wait):
+                    break
+                if not self._acquire_slot():
+                    break
+                # Shots that came due while waiting for the encoders are skipped, not queued
+                if self.interval:
+                    late = int((time.monotonic() - due) / self.interval)
+                    for _ in range(late):
+                        if self._due(index + 1, start) is None:
+                            break
+                        index += 1
+                        with self._lock:
+                            stats.dropped += 1
+                try:
+                    frame = capture_frame(self.geometry, self.backend)
+                except (CaptureError, Cancelled) as e:
+                    self._slots.release()
+                    with self._lock:
+                        self._in_flight -= 1
+                    self.notify(f"Capture failed: {e}")
+                    break
+                stats.captured += 1
+                path = os.path.join(self.out_dir, f"frame_{index:05d}.{extension}")
+                future = pool.submit(_encode_to_file, bytes(frame.data), frame.width, frame.height, frame.stride,
+                                     frame.format, path, self.image_format, self.level)
+                future.add_done_callback(self._done)
+                index += 1
+        finally:
+            stats.elapsed = time.monotonic() - start
+            pool.shutdown(wait=True, cancel_futures=self._stop.is_set())
+        return stats
+
+
+def burst_dir(save_dir, now=None):
+    now = now or datetime.datetime.now()
+    return os.path.join(os.path.expanduser(save_dir), f"hyprsnip_burst_{now:%Y-%m-%d_%H.%M.%S}")
+
+
+def run_cli(args):
+    """`hyprsnipper --interval/--count/--duration [--mode]`: returns an exit code."""
+    from .selection import select_geometry
+    from .settings import get_settings
+
+    settings = get_settings()
+    try:
+        interval = parse_interval(args.interval) if args.interval else 0.0
+        duration = parse_duration(args.duration) if args.duration else None
+    except ValueError as e:
+        print(f"[HyprSnipper] {e}", file=sys.stderr)
+        return 2
+    if args.count is None and duration is None:
+        print("[HyprSnipper] A burst needs --count or --duration", file=sys.stderr)
+        return 2
+    try:
+        geometry = select_geometry(args.mode or 'full')
+    except Cancelled:
+        return 1
+    except Exception as e:
+        print(f"[HyprSnipper] Could not select the {args.mode or 'full'} area: {e}", file=sys.stderr)
+        return 1
+    burst = Burst(geometry, burst_dir(settings['SAVE_DIR']), interval=interval, count=args.count,
+                  duration=duration, backend=settings['CAPTURE_BACKEND'],
+                  image_format=settings['SAVE_FORMAT'], level=settings['SAVE_LEVEL'],
+                  notify=lambda msg: print(f"[HyprSnipper] {msg}", file=sys.stderr))
+    print(f"[HyprSnipper] Burst into {burst.out_dir} ({burst.workers} encoder processes, "
+          f"queue {burst.queue_size}); Ctrl+C stops")
+    try:
+        stats = burst.run()
+    except KeyboardInterrupt:
+        burst.cancel()
+        stats = burst.stats
+    print(f"[HyprSnipper] {stats.report(interval)}")
+    return 0 if stats.captured and not stats.failed else 1
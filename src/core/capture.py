@@ -0,0 +1,134 @@
+"""
+capture.py - Scripted captures: the GUI's backends and sinks without any Qt widgets
+
+    from core.capture import capture
+    result = capture('window', save=True, copy=True)
+    print(result.path)
+
+    hyprsnipper capture --mode full --save --copy
+    hyprsnipper capture --geometry "0,0 800x600" --stdout > shot.png
+
+Sink toggles left as None follow SAVE_ENABLED, COPY_ENABLED and EDIT_ENABLED, like the
+toolbar's checkboxes. Nothing here imports Qt, so a capture from a keybind or cron job
+starts in milliseconds.
+"""
+import argparse
+import sys
+
+from .backends import CaptureError, capture_frame, format_geometry, parse_geometry
+from .dedup import get_deduplicator
+from .history import get_history
+from .pipeline import CapturePipeline, EncodedFrame, sink_encodings
+from .process import Cancelled
+from .selection import select_geometry
+from .settings import get_settings
+from .trace import start_trace
+
+MODES = ('region', 'window', 'full', 'all')
+
+
+def build_pipeline(settings=None, notify=print, resident=False):
+    """
+    CapturePipeline configured from settings.yaml (formats, history, dedup).
+    resident: the calling process stays up after the capture and serves the clipboard itself.
+    """
+    settings = settings or get_settings()
+    history = dedup = None
+    if settings['HISTORY_ENABLED']:
+        history = get_history()
+    if settings['DEDUP'] != 'off':
+        dedup = get_deduplicator(settings['DEDUP'] == 'perceptual', history)
+    return CapturePipeline(settings['SAVE_DIR'], settings['EDITOR'], notify=notify,
+                           encodings=sink_encodings(settings), history=history, dedup=dedup, resident=resident)
+
+
+def resolve_sinks(settings=None, save=None, copy=None, edit=None, copy_fallback=True):
+    """
+    (save, copy, edit) with None taken from the *_ENABLED settings. With COPY_TO_CLIPBOARD
+    (and copy_fallback), a capture that would otherwise go nowhere is copied.
+    """
+    settings = settings or get_settings()
+    save = settings['SAVE_ENABLED'] if save is None else save
+    copy = settings['COPY_ENABLED'] if copy is None else copy
+    edit = settings['EDIT_ENABLED'] if edit is None else edit
+    copy = copy or (copy_fallback and settings['COPY_TO_CLIPBOARD'] and not save and not edit)
+    return save, copy, edit
+
+
+class CaptureResult:
+    """A finished capture: the Frame, its geometry and each sink's result keyed by sink name."""
+
+    def __init__(self, frame, geometry, results):
+        self.frame = frame
+        self.geometry = geometry
+        self.results = results
+
+    @property
+    def path(self):
+        """Saved file, or None if the capture was not saved."""
+        return self.results.get('save')
+
+    def png(self):
+        return EncodedFrame(self.frame).png()
+
+
+def capture(mode='full', save=None, copy=None, edit=None, geometry=None, notify=print, cancel=None,
+            copy_fallback=True):
+    """
+    Select (unless `geometry` is given), capture and run the sinks; returns a CaptureResult
+    once they have finished. Raises Cancelled if the selection is aborted and CaptureError
+    if no backend could capture.
+    """
+    settings = get_settings()
+    trace = start_trace(mode, 'cli', settings)
+    try:
+        if geometry is None and mode != 'all':
+            geometry = select_geometry(mode, cancel)
+            trace.mark('selection done')
+        geometry = parse_geometry(geometry)
+        frame = capture_frame(geometry, settings['CAPTURE_BACKEND'], cancel)
+        trace.mark('frame captured')
+    except Cancelled:
+        trace.finish('cancelled')
+        raise
+    except Exception:
+        trace.finish('failed')
+        raise
+    save, copy, edit = resolve_sinks(settings, save, copy, edit, copy_fallback)
+    meta = {'mode': mode, 'geometry': format_geometry(geometry) if geometry else None, 'window': None}
+    futures = build_pipeline(settings, notify).run(frame, save=save, copy=copy, edit=edit, meta=meta, trace=trace)
+    return CaptureResult(frame, geometry, {name: future.result() for name, future in futures.items()})
+
+
+def main(argv=None):
+    """`hyprsnipper capture` command line."""
+    parser = argparse.ArgumentParser(prog='hyprsnipper capture', description='Take a screenshot without the toolbar')
+    parser.add_argument('--mode', choices=MODES,
+                        help='region and window are picked with slurp, full is the focused output (default: '
+                             'full, or region with --geometry)')
+    parser.add_argument('--geometry', metavar='"X,Y WxH"', help='capture this area instead of selecting one')
+    for sink in ('save', 'copy', 'edit'):
+        parser.add_argument(f'--{sink}', action=argparse.BooleanOptionalAction, default=None,
+                            help=f'override {sink.upper()}_ENABLED')
+    parser.add_argument('--stdout', action='store_true', help='write the capture as PNG to stdout')
+    args = parser.parse_args(argv)
+
+    notify = (lambda msg: print(f"[HyprSnipper] {msg}", file=sys.stderr))
+    if args.stdout:
+        # Only the PNG on stdout unless a sink was asked for explicitly
+        args.save = bool(args.save)
+        args.copy = bool(args.copy)
+        args.edit = bool(args.edit)
+    try:
+        result = capture(args.mode or ('region' if args.geometry else 'full'), args.save, args.copy, args.edit,
+                         geometry=args.geometry, notify=notify, copy_fallback=not args.stdout)
+    except Cancelled:
+        return 1
+    except (CaptureError, ValueError, OSError) as e:
+        print(f"[HyprSnipper] Capture failed: {e}", file=sys.stderr)
+        return 1
+    if args.stdout:
+        sys.stdout.buffer.write(result.png())
+    elif result.path:
+        print(result.path)
+    return 0
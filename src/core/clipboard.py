@@ -0,0 +1,308 @@
+"""
+clipboard.py - Serve a capture on the Wayland clipboard from memory, in several formats
+
+The clipboard is owned through the data-control protocol (ext-data-control-v1, or
+wlr-data-control-unstable-v1 on older compositors) on a private Wayland connection.
+The capture is offered as image/png, image/webp and, once saved, text/uri-list, but
+nothing is encoded until a client pastes one of them; each format is then encoded once
+and served from memory. No shell, no wl-copy and no file read back from disk.
+
+The resident daemon serves from a thread in its own process. A one-shot launch hands
+the raw frame to a detached `hyprsnipper serve-clipboard` process instead, which serves
+until another client takes the clipboard (like wl-copy's background server). Either
+way the capture is offered at once; the saved file's path follows when the save is done.
+Without WAYLAND_DISPLAY or a data-control global, ClipboardError is raised and the
+caller falls back to wl-copy.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import urllib.parse
+from concurrent.futures import Future
+
+from .encoders import FORMATS, available
+from .frame import Frame
+from .screencopy import WL_DISPLAY_ID, ScreencopyError, WaylandConnection, pack_string, pack_uint
+
+# Same opcodes in both protocols
+DATA_CONTROL_MANAGERS = ('ext_data_control_manager_v1', 'zwlr_data_control_manager_v1')
+
+URI_LIST = 'text/uri-list'
+
+# main.py subcommand that runs the helper process (not listed in --help)
+HELPER_COMMAND = 'serve-clipboard'
+
+
+class ClipboardError(Exception):
+    """The clipboard cannot be served without wl-copy."""
+
+
+def offers(encoding, path=None):
+    """
+    [(mime, format, level)] to offer for a capture, the COPY_FORMAT first; text/uri-list
+    (format None) when there is a saved file.
+    """
+    fmt, level = encoding
+    result = [(FORMATS[fmt][0], fmt, level)] if available(fmt) else []
+    if fmt != 'png':
+        result.append(('image/png', 'png', 1))
+    if fmt != 'webp' and available('webp'):
+        result.append(('image/webp', 'webp', 100))  # lossless
+    if path is not None:
+        result.append((URI_LIST, None, None))
+    return result
+
+
+def _payload(encoded, fmt, level, path):
+    if fmt is None:
+        return f"file://{urllib.parse.quote(os.path.abspath(path))}\r\n".encode('utf-8')
+    image = encoded.get(fmt, level)
+    if image.format != fmt:
+        raise ClipboardError(f"{fmt} is not available")
+    return image.payload
+
+
+class ClipboardServer:
+    """Owns the clipboard selection and answers paste requests on a background thread."""
+
+    def __init__(self, display=None):
+        try:
+            self.conn = WaylandConnection(display)
+            self._bind()
+        except ScreencopyError as e:
+            raise ClipboardError(str(e))
+        self._sources = {}  # source id -> (encoded, offers, path or future)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.closed = threading.Event()  # connection lost or seat gone
+        self.idle = threading.Event()    # every offered source was replaced
+
+    def _bind(self):
+        conn = self.conn
+        found = {}
+
+        def on_registry(opcode, args):
+            if opcode == 0:  # global
+                name, interface, version = args.uint(), args.string(), args.uint()
+                found.setdefault(interface, (name, version))
+
+        registry = conn.new_id(on_registry)
+        conn.send(WL_DISPLAY_ID, 1, pack_uint(registry))
+        conn.roundtrip()
+        interface = next((i for i in DATA_CONTROL_MANAGERS if i in found), None)
+        if interface is None:
+            raise ClipboardError("Compositor does not support data-control")
+        if 'wl_seat' not in found:
+            raise ClipboardError("Compositor advertises no seat")
+
+        def bind(iface, version):
+            object_id = conn.new_id()
+            name = found[iface][0]
+            conn.send(registry, 0, pack_uint(name) + pack_string(iface) + pack_uint(version) + pack_uint(object_id))
+            return object_id
+
+        self.manager = bind(interface, 1)
+        seat = bind('wl_seat', 1)
+        self.device = conn.new_id(self._on_device_event)
+        conn.send(self.manager, 1, pack_uint(self.device) + pack_uint(seat))  # get_data_device
+        conn.roundtrip()
+        # Served without a deadline from here on
+        conn.sock.settimeout(None)
+
+    def offer(self, encoded, offers, path=None):
+        """
+        Take the clipboard for `encoded` (an EncodedFrame). path: saved file for
+        text/uri-list, or a future resolving to it.
+        """
+        conn = self.conn
+        # Sinks of overlapping captures may offer from several threads at once
+        with self._lock:
+            source = conn.new_id()
+            conn.handlers[source] = lambda opcode, args: self._on_source_event(source, opcode, args)
+            self._sources[source] = (encoded, {mime: (fmt, level) for mime, fmt, level in offers}, path)
+            self.idle.clear()
+            conn.send(self.manager, 0, pack_uint(source))  # create_data_source
+            for mime, _fmt, _level in offers:
+                conn.send(source, 0, pack_string(mime))
+            conn.send(self.device, 0, pack_uint(source))  # set_selection
+
+    def _on_device_event(self, opcode, args):
+        if opcode in (1, 3):  # selection / primary_selection
+            offer = args.uint()
+            # Offers of other clients' data are never read here
+            if offer:
+                self.conn.send(offer, 1)  # destroy
+        elif opcode == 2:  # finished: the seat is gone
+            self.closed.set()
+
+    def _on_source_event(self, source, opcode, args):
+        if opcode == 0:  # send
+            mime, fd = args.string(), args.fd()
+            with self._lock:
+                entry = self._sources.get(source)
+            if entry is None or mime not in entry[1]:
+                os.close(fd)
+                return
+            # Encoding and a slow reader must not stall the event loop
+            threading.Thread(target=self._write, args=(fd, entry, mime), daemon=True).start()
+        elif opcode == 1:  # cancelled: someone else owns the clipboard now
+            self.conn.send(source, 1)  # destroy
+            self.conn.handlers.pop(source, None)
+            with self._lock:
+                self._sources.pop(source, None)
+                if not self._sources:
+                    self.idle.set()
+
+    def _write(self, fd, entry, mime):
+        encoded, mimes, path = entry
+        try:
+            fmt, level = mimes[mime]
+            if fmt is None and hasattr(path, 'result'):
+                path = path.result()
+                if path is None:
+                    return
+            data = memoryview(_payload(encoded, fmt, level, path))
+            while data:
+                data = data[os.write(fd, data):]
+        except Exception as e:
+            print(f"[HyprSnipper] Warning: clipboard {mime} failed: {e}")
+        finally:
+            os.close(fd)
+
+    def roundtrip(self):
+        self.conn.roundtrip()
+
+    def serve(self):
+        """Handle paste requests until every offered source is cancelled or the seat is gone."""
+        try:
+            while not self.closed.is_set() and not self.idle.is_set():
+                self.conn.dispatch()
+        except ScreencopyError:
+            self.closed.set()
+
+    def start(self):
+        """Serve on a daemon thread (for the resident process)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._serve_forever, name='hyprsnipper-clipboard', daemon=True)
+            self._thread.start()
+
+    def _serve_forever(self):
+        try:
+            while True:
+                self.conn.dispatch()
+        except ScreencopyError as e:
+            print(f"[HyprSnipper] Warning: clipboard connection lost: {e}")
+            self.closed.set()
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def _resident_server():
+    global _server
+    with _server_lock:
+        if _server is None or _server.closed.is_set():
+            _server = ClipboardServer()
+            _server.start()
+        return _server
+
+
+def copy_frame(encoded, encoding, saved=None, resident=False):
+    """
+    Put the capture on the clipboard. saved: future of the saved path (or None); the
+    capture is offered without waiting for it.
+    resident: this process keeps running (daemon), so serve from here; otherwise a
+    detached helper process serves it.
+    """
+    if not os.environ.get('WAYLAND_DISPLAY'):
+        raise ClipboardError("WAYLAND_DISPLAY is not set")
+    if resident:
+        _resident_server().offer(encoded, offers(encoding, saved), saved)
+        return
+    _spawn_server(encoded.frame, offers(encoding, saved), saved)
+
+
+def _helper_command():
+    """How to start `hyprsnipper serve-clipboard`: from source, a PyInstaller bundle or an AppImage."""
+    if os.environ.get('APPIMAGE'):
+        # A fresh instance of the image: the helper outlives this process and its mount
+        return [os.environ['APPIMAGE'], HELPER_COMMAND]
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, HELPER_COMMAND]
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return [sys.executable, os.path.join(src_dir, 'main.py'), HELPER_COMMAND]
+
+
+def _spawn_server(frame, offer_list, saved):
+    header = {'width': frame.width, 'height': frame.height, 'stride': frame.stride, 'format': frame.format,
+              'offers': offer_list, 'saved': saved is not None}
+    proc = subprocess.Popen(_helper_command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        proc.stdin.write(json.dumps(header).encode('utf-8') + b'\n')
+        proc.stdin.write(memoryview(frame.data)[:frame.nbytes])
+        proc.stdin.flush()
+        # The helper answers once the compositor has our selection, so a paste right after works
+        reply = proc.stdout.readline().decode('utf-8', 'replace').strip()
+    except OSError as e:
+        proc.stdin.close()
+        raise ClipboardError(f"Clipboard helper failed: {e}")
+    finally:
+        proc.stdout.close()
+    if reply != 'ok':
+        proc.stdin.close()
+        proc.wait()
+        raise ClipboardError(reply or "Clipboard helper exited")
+    if saved is None:
+        proc.stdin.close()
+    else:
+        saved.add_done_callback(lambda future: _send_path(proc.stdin, future))
+
+
+def _send_path(stdin, future):
+    """Tell the helper where the capture was saved (null if it was not)."""
+    path = future.result() if not future.cancelled() and future.exception() is None else None
+    try:
+        stdin.write(json.dumps(path).encode('utf-8') + b'\n')
+        stdin.close()
+    except OSError:
+        pass
+
+
+def _read_path(stdin, future):
+    line = stdin.readline()
+    try:
+        future.set_result(json.loads(line) if line.strip() else None)
+    except ValueError:
+        future.set_result(None)
+
+
+def main(argv=None):
+    """Helper process: read a frame from stdin, take the clipboard, serve until replaced."""
+    from .pipeline import EncodedFrame
+
+    stdin = sys.stdin.buffer
+    header = json.loads(stdin.readline())
+    data = stdin.read(header['stride'] * header['height'])
+    frame = Frame(data, header['width'], header['height'], header['stride'], header['format'])
+    path = None
+    if header.get('saved'):
+        # The launcher writes the saved path once the save is done
+        path = Future()
+        threading.Thread(target=_read_path, args=(stdin, path), daemon=True).start()
+    try:
+        server = ClipboardServer()
+        server.offer(EncodedFrame(frame), [tuple(o) for o in header['offers']], path)
+        server.roundtrip()
+    except (ClipboardError, ScreencopyError) as e:
+        print(f"error: {e}", flush=True)
+        return 1
+    print('ok', flush=True)
+    # The launcher stops reading after the reply; later warnings go to stderr
+    sys.stdout.close()
+    sys.stdout = sys.stderr
+    server.serve()
+    return 0
@@ -0,0 +1,169 @@
+"""
+dedup.py - Detect repeated captures before they are written again
+
+An exact duplicate (same pixels) is not encoded or written a second time: the new
+file name is hard-linked to the existing file. Where hard links are not possible,
+the capture refers to the existing file instead. With perceptual matching on, a
+capture whose 64-bit difference hash (dHash) is within a few bits of a recent one is
+saved normally and reported as a near-duplicate.
+
+Recent hashes are kept in memory and seeded from the capture history, so the check
+is a dict lookup plus a popcount over a short list.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+# Differing dHash bits (of 64) up to which two captures count as near-duplicates
+NEAR_DISTANCE = 6
+
+
+def pixel_hash(frame):
+    """Hash of the raw pixels (format and size included), independent of the encoding."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{frame.format}:{frame.width}x{frame.height}".encode('ascii'))
+    row_bytes = frame.width * frame.bytes_per_pixel
+    if frame.stride == row_bytes:
+        digest.update(frame.data)
+    else:
+        # Skip row padding, which may hold anything
+        for y in range(frame.height):
+            digest.update(frame.data[y * frame.stride:y * frame.stride + row_bytes])
+    return digest.hexdigest()
+
+
+def perceptual_hash(frame):
+    """64-bit dHash of the frame's brightness as 16 hex digits: 9x8 box averages, compared left to right."""
+    small = frame.downscaled(max(1, frame.width // 72))
+    bpp = small.bytes_per_pixel
+    sums = [0] * 72
+    counts = [0] * 72
+    columns = [x * 9 // small.width for x in range(small.width)]
+    for y in range(small.height):
+        row = small.data[y * small.stride:y * small.stride + small.width * bpp]
+        base = (y * 8 // small.height) * 9
+        # Channel order does not matter for the sum of the three color bytes
+        for x, value in enumerate(map(sum, zip(row[0::bpp], row[1::bpp], row[2::bpp]))):
+            cell = base + columns[x]
+            sums[cell] += value
+            counts[cell] += 1
+    cells = [s / c if c else 0 for s, c in zip(sums, counts)]
+    bits = 0
+    for gy in range(8):
+        for gx in range(8):
+            bits = bits << 1 | (cells[gy * 9 + gx] < cells[gy * 9 + gx + 1])
+    return f"{bits:016x}"
+
+
+def hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+class Deduplicator:
+    """
+    Remembers the last `size` saved captures by pixel hash (and dHash when perceptual
+    matching is on). Seeded from the history on first use.
+    """
+
+    def __init__(self, perceptual=False, size=256, history=None):
+        self.perceptual = perceptual
+        self.size = size
+        self.history = history
+        self._exact = OrderedDict()  # pixel hash -> path
+        self._near = OrderedDict()   # path -> dHash
+        self._seeded = history is None
+        self._lock = threading.Lock()
+
+    def _seed(self):
+        if self._seeded:
+            return
+        self._seeded = True
+        try:
+            entries = self.history.search(limit=self.size)
+        except Exception as e:
+            print(f"[HyprSnipper] Warning: could not read capture history for dedup: {e}")
+            return
+        for entry in reversed(entries):
+            if entry['path'] and entry['hash']:
+                self._remember(entry['hash'], entry.get('phash'), entry['path'])
+
+    def _remember(self, digest, phash, path):
+        self._exact.pop(digest, None)
+        self._exact[digest] = path
+        if phash:
+            self._near.pop(path, None)
+            self._near[path] = phash
+        while len(self._exact) > self.size:
+            self._exact.popitem(last=False)
+        while len(self._near) > self.size:
+            self._near.popitem(last=False)
+
+    def find_exact(self, digest):
+        """Path of a saved capture with the same pixels that still exists, or None."""
+        with self._lock:
+            self._seed()
+            path = self._exact.get(digest)
+        if path is not None and os.path.exists(path):
+            return path
+        return None
+
+    def find_near(self, phash):
+        """(path, distance) of the most similar recent capture within NEAR_DISTANCE, or None."""
+        with self._lock:
+            self._seed()
+            candidates = list(self._near.items())
+        best = None
+        for path, other in candidates:
+            distance = hamming(phash, other)
+            if distance <= NEAR_DISTANCE and (best is None or distance < best[1]) and os.path.exists(path):
+                best = (path, distance)
+        return best
+
+    def add(self, digest, phash, path):
+        with self._lock:
+            self._seed()
+            self._remember(digest, phash, path)
+
+    def forget(self, path):
+        """Drop a deleted capture, so later captures are neither linked to nor compared with it."""
+        with self._lock:
+            for digest in [d for d, p in self._exact.items() if p == path]:
+                del self._exact[digest]
+            self._near.pop(path, None)
+
+
+def link_duplicate(existing, path):
+    """Hard-link `path` to `existing` (under a unique name). Returns the new path, or None if links are unsupported."""
+    base, ext = os.path.splitext(path)
+    candidate, n = path, 0
+    while True:
+        try:
+            os.link(existing, candidate)
+            return candidate
+        except FileExistsError:
+            n += 1
+            candidate = f"{base}-{n}{ext}"
+        except OSError:
+            return None
+
+
+_deduplicator = None
+_deduplicator_lock = threading.Lock()
+
+
+def get_deduplicator(perceptual=False, history=None):
+    """The process-wide Deduplicator, so its recent-hash cache outlives a single capture."""
+    global _deduplicator
+    with _deduplicator_lock:
+        if _deduplicator is None or _deduplicator.perceptual != perceptual:
+            _deduplicator = Deduplicator(perceptual=perceptual, history=history)
+        return _deduplicator
+
+
+def forget(path):
+    """Drop a deleted capture from the process-wide Deduplicator, if there is one."""
+    with _deduplicator_lock:
+        deduplicator = _deduplicator
+    if deduplicator is not None:
+        deduplicator.forget(path)
@@ -0,0 +1,275 @@
+"""
+encoders.py - Encode Frames to image bytes
+
+    png    pure zlib, compressed in parallel stripes (no Qt, no Pillow)
+    qoi    needs the optional `qoi` package (and numpy)
+    webp   Pillow when installed, otherwise Qt's image writer
+    avif   Pillow with AVIF support, or a Qt build with the AVIF image plugin
+    jpeg   Pillow when installed, otherwise Qt's image writer
+
+`level` is the zlib compression level (0-9) for PNG and the quality (0-100) for the
+lossy formats; WebP at quality 100 is lossless.
+"""
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# format name -> (mime type, file extension)
+FORMATS = {
+    'png': ('image/png', 'png'),
+    'qoi': ('image/qoi', 'qoi'),
+    'webp': ('image/webp', 'webp'),
+    'avif': ('image/avif', 'avif'),
+    'jpeg': ('image/jpeg', 'jpg'),
+}
+
+# Stripes smaller than this are not worth a thread hand-off
+MIN_STRIPE_BYTES = 1 << 20
+# Bytes of rows per band compressed with each PNG filter to pick the band's filter, and
+# how much smaller than unfiltered Sub or Up must come out (filtering costs time)
+SAMPLE_BYTES = 1 << 16
+FILTER_GAIN = 0.9
+
+
+class EncoderError(Exception):
+    """The requested format is not available (missing optional library or plugin)."""
+
+
+def to_rgb(frame):
+    """Return the frame's pixels as tightly packed R, G, B bytes (alpha dropped)."""
+    bpp = frame.bytes_per_pixel
+    row_bytes = frame.width * bpp
+    if frame.stride == row_bytes:
+        src = frame.data
+    else:
+        src = b''.join(frame.data[y * frame.stride:y * frame.stride + row_bytes] for y in range(frame.height))
+    if frame.format == 'rgb888':
+        return bytes(src)
+    rgb = bytearray(frame.width * frame.height * 3)
+    if frame.format in ('xrgb8888', 'argb8888'):  # B, G, R, X in memory
+        rgb[0::3] = src[2::4]
+        rgb[1::3] = src[1::4]
+        rgb[2::3] = src[0::4]
+    else:  # xbgr8888 / abgr8888: R, G, B, X in memory
+        rgb[0::3] = src[0::4]
+        rgb[1::3] = src[1::4]
+        rgb[2::3] = src[2::4]
+    return rgb
+
+
+def _png_chunk(kind, payload):
+    return struct.pack('>I', len(payload)) + kind + payload + struct.pack('>I', zlib.crc32(kind + payload))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _zlib_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix='hyprsnipper-zlib')
+        return _pool
+
+
+def _deflate_stripe(data, level):
+    # Raw deflate; a sync flush ends the stripe on a byte boundary so the stripes concatenate
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def parallel_zlib(chunks, level=6):
+    """
+    zlib-compress an iterable of byte chunks into one zlib stream. Each chunk is deflated
+    independently on a thread pool (zlib releases the GIL) as soon as it is produced, so
+    a generator's work overlaps the compression of the chunks before it. Each chunk
+    starts with an empty dictionary, which costs a little ratio at the boundaries.
+    """
+    pool = _zlib_pool()
+    futures = []
+    adler = zlib.adler32(b'')
+    for chunk in chunks:
+        adler = zlib.adler32(chunk, adler)
+        futures.append(pool.submit(_deflate_stripe, chunk, level))
+    # zlib header for the window size and level class, then the stripes, an empty final
+    # block, then Adler-32 of everything
+    level_class = 0 if level < 2 else 1 if level < 6 else 2 if level == 6 else 3
+    cmf, flg = 0x78, level_class << 6
+    flg |= 31 - ((cmf << 8 | flg) % 31)
+    return (bytes((cmf, flg)) + b''.join(f.result() for f in futures) +
+            zlib.compressobj(level, zlib.DEFLATED, -15).flush() + struct.pack('>I', adler))
+
+
+def _sub_bytes(x, y, high, low):
+    """Bytewise (x - y) mod 256 of two rows packed into ints, without borrows between bytes."""
+    return ((x | high) - (y & low)) ^ ((x ^ y ^ high) & high)
+
+
+def _rows(data, start, rows, row_bytes, kind):
+    """rows rows of data from offset start, each prefixed with the filter type byte kind."""
+    view = memoryview(data)
+    prefix = bytes((kind,))
+    return b''.join(prefix + view[offset:offset + row_bytes]
+                    for offset in range(start, start + rows * row_bytes, row_bytes))
+
+
+def _filter_rows(rgb, start, rows, row_bytes, bpp, kind, masks):
+    """
+    rows rows of tightly packed pixels from offset start, as PNG scanlines with filter
+    None (0), Sub (1) or Up (2). Sub and Up are computed for all rows at once, as
+    arithmetic on the rows packed into one int. masks caches the constants per row count.
+    """
+    if kind == 0:
+        return _rows(rgb, start, rows, row_bytes, 0)
+    size = rows * row_bytes
+    if rows not in masks:
+        # 0x80 and 0x7f in every byte, and every byte but each row's first pixel
+        masks[rows] = (int.from_bytes(b'\x80' * size, 'big'), int.from_bytes(b'\x7f' * size, 'big'),
+                       int.from_bytes((bytes(bpp) + b'\xff' * (row_bytes - bpp)) * rows, 'big'))
+    high, low, not_first = masks[rows]
+    x = int.from_bytes(rgb[start:start + size], 'big')
+    if kind == 1:
+        # The byte bpp to the left; zero left of each row's first pixel
+        y = (x >> (8 * bpp)) & not_first
+    else:
+        # The byte above; zero above the first row of the image
+        y = int.from_bytes(rgb[max(0, start - row_bytes):start], 'big') << (8 * (size - row_bytes))
+        y |= x >> (8 * row_bytes)
+    return _rows(_sub_bytes(x, y, high, low).to_bytes(size, 'big'), 0, rows, row_bytes, kind)
+
+
+def png_scanlines(rgb, width, height, bpp=3, band_bytes=MIN_STRIPE_BYTES, filtered=True, level=6):
+    """
+    Yield the PNG scanlines of tightly packed pixels in bands of about band_bytes. With
+    filtered, a few rows from the middle of each band are compressed at `level` with
+    each filter, and the band gets the filter that came out smallest, Sub or Up only if
+    clearly smaller than None: filters pay off on wallpapers and photos, but text and
+    flat UI compress better unfiltered. Without, every row is unfiltered.
+    """
+    row_bytes = width * bpp
+    rows_per_band = max(1, min(height, band_bytes // row_bytes))
+    sample_rows = max(1, min(rows_per_band, SAMPLE_BYTES // row_bytes))
+    masks = {}
+    for top in range(0, height, rows_per_band):
+        rows = min(rows_per_band, height - top)
+        start = top * row_bytes
+        kind = 0
+        if filtered:
+            count = min(rows, sample_rows)
+            sample = start + (rows - count) // 2 * row_bytes
+            sizes = [len(zlib.compress(_filter_rows(rgb, sample, count, row_bytes, bpp, k, masks), level))
+                     for k in range(3)]
+            kind = min(range(3), key=lambda k: sizes[k] if k == 0 else sizes[k] / FILTER_GAIN)
+        yield _filter_rows(rgb, start, rows, row_bytes, bpp, kind, masks)
+
+
+def encode_png(frame, level=6):
+    """
+    Encode a Frame as an 8-bit RGB PNG. From level 2 up, bands that compress better
+    filtered are filtered (see png_scanlines); levels 0 and 1 are for speed and skip that.
+    """
+    rgb = to_rgb(frame)
+    header = struct.pack('>IIBBBBB', frame.width, frame.height, 8, 2, 0, 0, 0)
+    # One band per stripe; an image smaller than a stripe is a single band
+    band_bytes = min(MIN_STRIPE_BYTES, len(rgb))
+    scanlines = png_scanlines(rgb, frame.width, frame.height, band_bytes=band_bytes,
+                              filtered=level >= 2, level=level)
+    return (b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', header) +
+            _png_chunk(b'IDAT', parallel_zlib(scanlines, level)) + _png_chunk(b'IEND', b''))
+
+
+def encode_qoi(frame, level=None):
+    try:
+        import numpy
+        import qoi
+    except ImportError:
+        raise EncoderError("QOI needs the 'qoi' and 'numpy' packages")
+    rgb = numpy.frombuffer(to_rgb(frame), dtype=numpy.uint8).reshape(frame.height, frame.width, 3)
+    return qoi.encode(rgb)
+
+
+def _encode_pillow(frame, fmt, quality):
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    import io
+    image = Image.frombuffer('RGB', (frame.width, frame.height), bytes(to_rgb(frame)), 'raw', 'RGB', 0, 1)
+    options = {'quality': min(quality, 100)}
+    if fmt == 'webp':
+        options.update(lossless=quality >= 100, method=4)
+    out = io.BytesIO()
+    try:
+        image.save(out, format=fmt.upper(), **options)
+    except (KeyError, OSError, ValueError):
+        return None  # Pillow built without this codec
+    return out.getvalue()
+
+
+def _encode_qt(frame, fmt, quality):
+    try:
+        from PySide6.QtCore import QBuffer, QByteArray, QIODevice
+    except ImportError:
+        return None
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    ok = frame.to_qimage().save(buffer, fmt.upper(), min(quality, 100))
+    buffer.close()
+    return bytes(data) if ok else None
+
+
+def encode_lossy(frame, fmt, quality=90):
+    """WebP, AVIF or JPEG through Pillow, or Qt's image writer as a fallback."""
+    payload = _encode_pillow(frame, fmt, quality)
+    if payload is None:
+        payload = _encode_qt(frame, fmt, quality)
+    if payload is None:
+        raise EncoderError(f"No {fmt.upper()} encoder available (install Pillow or the Qt image format plugins)")
+    return payload
+
+
+_available = {}
+
+
+def available(fmt):
+    """Whether `fmt` can be encoded here, without encoding anything. Cached."""
+    if fmt not in _available:
+        import importlib.util
+        if fmt == 'png':
+            ok = True
+        elif fmt == 'qoi':
+            ok = all(importlib.util.find_spec(name) for name in ('qoi', 'numpy'))
+        elif fmt in FORMATS:
+            ok = False
+            try:
+                from PIL import features
+                ok = features.check({'jpeg': 'jpg'}.get(fmt, fmt))
+            except ImportError:
+                pass
+            except ValueError:
+                pass  # Pillow does not know the codec
+            if not ok:
+                try:
+                    from PySide6.QtGui import QImageWriter
+                    ok = fmt.encode() in [bytes(f) for f in QImageWriter.supportedImageFormats()]
+                except ImportError:
+                    pass
+        else:
+            ok = False
+        _available[fmt] = ok
+    return _available[fmt]
+
+
+def encode(frame, fmt='png', level=6):
+    """Encode a Frame in one of FORMATS. Raises EncoderError when the format is unavailable."""
+    if fmt == 'png':
+        return encode_png(frame, min(level, 9))
+    if fmt == 'qoi':
+        return encode_qoi(frame)
+    if fmt in FORMATS:
+        return encode_lossy(frame, fmt, level)
+    raise EncoderError(f"Unknown image format: {fmt}")
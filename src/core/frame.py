@@ -0,0 +1,132 @@
+"""
+frame.py - In-memory captured frame, independent of Qt and of the capture backend
+"""
+
+# Pixel formats, named after their wl_shm/DRM fourcc (memory order is little-endian,
+# so 'xrgb8888' is stored as B, G, R, X bytes).
+BYTES_PER_PIXEL = {
+    'xrgb8888': 4,
+    'argb8888': 4,
+    'xbgr8888': 4,
+    'abgr8888': 4,
+    'rgb888': 3,  # plain R, G, B bytes as produced by PPM
+}
+
+
+class Frame:
+    """
+    Raw pixels of a capture.
+
+    data:     bytes-like buffer, `stride` bytes per row
+    geometry: (x, y, w, h) of the captured area in logical layout coordinates,
+              or None when unknown (e.g. grim capturing every output)
+    """
+
+    def __init__(self, data, width, height, stride, fmt, geometry=None):
+        if fmt not in BYTES_PER_PIXEL:
+            raise ValueError(f"Unsupported pixel format: {fmt}")
+        self.data = data
+        self.width = width
+        self.height = height
+        self.stride = stride
+        self.format = fmt
+        self.geometry = geometry
+
+    def __repr__(self):
+        return f"<Frame {self.width}x{self.height} {self.format} geometry={self.geometry}>"
+
+    @property
+    def bytes_per_pixel(self):
+        return BYTES_PER_PIXEL[self.format]
+
+    @property
+    def nbytes(self):
+        return self.stride * self.height
+
+    @classmethod
+    def from_ppm(cls, payload, geometry=None):
+        """Parse a binary PPM (P6, maxval 255), as written by `grim -t ppm`."""
+        fields = []
+        pos = 0
+        view = memoryview(payload)
+        while len(fields) < 4:
+            # Skip whitespace and comments between header fields
+            while payload[pos:pos + 1].isspace():
+                pos += 1
+            if payload[pos:pos + 1] == b'#':
+                pos = payload.index(b'\n', pos) + 1
+                continue
+            end = pos
+            while not payload[end:end + 1].isspace():
+                end += 1
+            fields.append(bytes(payload[pos:end]))
+            pos = end
+        magic, width, height, maxval = fields[0], int(fields[1]), int(fields[2]), int(fields[3])
+        if magic != b'P6' or maxval != 255:
+            raise ValueError("Only 8-bit binary PPM (P6) is supported")
+        pos += 1  # single whitespace byte before the raster
+        stride = width * 3
+        data = view[pos:pos + stride * height]
+        if len(data) < stride * height:
+            raise ValueError("Truncated PPM data")
+        return cls(data, width, height, stride, 'rgb888', geometry)
+
+    def flipped(self):
+        """Return a vertically flipped copy (screencopy may report y-inverted buffers)."""
+        rows = [self.data[y * self.stride:(y + 1) * self.stride] for y in range(self.height)]
+        return Frame(b''.join(reversed(rows)), self.width, self.height, self.stride, self.format, self.geometry)
+
+    def crop(self, x, y, w, h):
+        """Copy of the pixel rectangle (x, y, w, h), clamped to the frame."""
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self.width, x + w), min(self.height, y + h)
+        if x1 <= x0 or y1 <= y0:
+            raise ValueError(f"Crop {x},{y} {w}x{h} is outside the {self.width}x{self.height} frame")
+        bpp = self.bytes_per_pixel
+        start, length = x0 * bpp, (x1 - x0) * bpp
+        rows = [self.data[row * self.stride + start:row * self.stride + start + length] for row in range(y0, y1)]
+        return Frame(b''.join(rows), x1 - x0, y1 - y0, length, self.format)
+
+    def crop_logical(self, rect):
+        """Crop a rectangle given in logical layout coordinates, using `geometry` to map to pixels."""
+        if self.geometry is None:
+            raise ValueError("Frame has no layout geometry to crop against")
+        gx, gy, gw, gh = self.geometry
+        sx, sy = self.width / gw, self.height / gh
+        x, y, w, h = rect
+        cropped = self.crop(round((x - gx) * sx), round((y - gy) * sy), round(w * sx), round(h * sy))
+        cropped.geometry = (x, y, w, h)
+        return cropped
+
+    def downscaled(self, factor):
+        """Nearest-neighbour copy keeping every `factor`-th pixel of every `factor`-th row."""
+        if factor <= 1:
+            return self
+        bpp = self.bytes_per_pixel
+        view = memoryview(self.data).cast('B')
+        width = -(-self.width // factor)
+        rows = []
+        for y in range(0, self.height, factor):
+            row = view[y * self.stride:y * self.stride + self.width * bpp]
+            if bpp == 4:
+                # Whole pixels as 32-bit items, so one strided slice picks the columns
+                rows.append(row.cast('I')[::factor].tobytes())
+            else:
+                out = bytearray(width * bpp)
+                for channel in range(bpp):
+                    out[channel::bpp] = row[channel::bpp * factor]
+                rows.append(bytes(out))
+        return Frame(b''.join(rows), width, len(rows), width * bpp, self.format, self.geometry)
+
+    def to_qimage(self):
+        """Wrap the pixels in a QImage (copied, so the frame buffer may be released)."""
+        from PySide6.QtGui import QImage
+        qformat = {
+            'xrgb8888': QImage.Format_RGB32,
+            'argb8888': QImage.Format_ARGB32,
+            'xbgr8888': QImage.Format_RGBX8888,
+            'abgr8888': QImage.Format_RGBA8888,
+            'rgb888': QImage.Format_RGB888,
+        }[self.format]
+        image = QImage(bytes(self.data), self.width, self.height, self.stride, qformat)
+        return image.copy()
@@ -0,0 +1,178 @@
+"""
+history.py - SQLite index of every capture, with thumbnails
+
+Each capture gets one row: saved path (if any), time, mode, geometry, the selected
+window's class and title, pixel size, file size, format, a hash of the raw pixels
+and, with perceptual dedup on, its dHash.
+A small PNG thumbnail is kept in a separate table, so listing and searching thousands
+of captures reads neither SAVE_DIR nor any full-size image.
+
+    hyprsnipper history [SEARCH] [--mode MODE] [--limit N] [--json]
+    hyprsnipper history --thumbnail ID > thumb.png
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from .dedup import pixel_hash
+
+DATA_DIR = os.path.join(os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share'), 'hyprsnipper')
+HISTORY_DB = os.path.join(DATA_DIR, 'history.sqlite3')
+THUMBNAIL_WIDTH = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    path TEXT,
+    mode TEXT,
+    geometry TEXT,
+    window_class TEXT,
+    window_title TEXT,
+    width INTEGER,
+    height INTEGER,
+    bytes INTEGER,
+    format TEXT,
+    hash TEXT,
+    phash TEXT
+);
+CREATE INDEX IF NOT EXISTS captures_timestamp ON captures (timestamp);
+CREATE INDEX IF NOT EXISTS captures_hash ON captures (hash);
+CREATE TABLE IF NOT EXISTS thumbnails (
+    capture_id INTEGER PRIMARY KEY REFERENCES captures (id) ON DELETE CASCADE,
+    png BLOB NOT NULL
+);
+"""
+
+COLUMNS = ('id', 'timestamp', 'path', 'mode', 'geometry', 'window_class', 'window_title',
+           'width', 'height', 'bytes', 'format', 'hash', 'phash')
+
+
+def thumbnail_png(frame, width=THUMBNAIL_WIDTH):
+    from .encoders import encode_png
+    return encode_png(frame.downscaled(max(1, -(-frame.width // width))), level=6)
+
+
+class History:
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(captures)")}
+            if 'phash' not in columns:  # databases created before perceptual hashes
+                conn.execute("ALTER TABLE captures ADD COLUMN phash TEXT")
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def record(self, frame, path=None, mode=None, geometry=None, window=None, fmt=None, digest=None,
+               phash=None, timestamp=None, thumbnail=True):
+        """Add one capture and its thumbnail; returns the row id."""
+        window = window or {}
+        size = None
+        if path is not None:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                pass
+        row = (timestamp or time.time(), path, mode, geometry, window.get('class'), window.get('title'),
+               frame.width, frame.height, size, fmt, digest or pixel_hash(frame), phash)
+        thumb = thumbnail_png(frame) if thumbnail else None
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cur = conn.execute(f"INSERT INTO captures ({', '.join(COLUMNS[1:])}) VALUES "
+                                   f"({', '.join('?' * (len(COLUMNS) - 1))})", row)
+                if thumb is not None:
+                    conn.execute("INSERT INTO thumbnails (capture_id, png) VALUES (?, ?)", (cur.lastrowid, thumb))
+            return cur.lastrowid
+
+    def search(self, text=None, mode=None, limit=50, offset=0):
+        """Newest captures first, optionally filtered by a substring of the path, window class or title."""
+        where, args = [], []
+        if text:
+            where.append("(path LIKE ? OR window_class LIKE ? OR window_title LIKE ?)")
+            args += [f"%{text}%"] * 3
+        if mode:
+            where.append("mode = ?")
+            args.append(mode)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM captures"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self._connect().execute(sql, args + [limit, offset]).fetchall()
+        return [dict(zip(COLUMNS, r)) for r in rows]
+
+    def forget(self, path):
+        """Remove the captures saved at `path` (and their thumbnails); returns how many rows went."""
+        with self._lock:
+            if self._conn is None and not os.path.exists(self.path):
+                return 0
+            conn = self._connect()
+            with conn:
+                return conn.execute("DELETE FROM captures WHERE path = ?", (path,)).rowcount
+
+    def thumbnail(self, capture_id):
+        with self._lock:
+            row = self._connect().execute("SELECT png FROM thumbnails WHERE capture_id = ?",
+                                          (capture_id,)).fetchone()
+        return row[0] if row else None
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_history():
+    """The process-wide History on HISTORY_DB."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = History()
+        return _history
+
+
+def main(argv=None):
+    """`hyprsnipper history` command line."""
+    parser = argparse.ArgumentParser(prog='hyprsnipper history', description='List and search past captures')
+    parser.add_argument('search', nargs='?', help='substring of the path, window class or window title')
+    parser.add_argument('--mode', choices=('region', 'window', 'full', 'all'))
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--json', action='store_true', help='print one JSON object per line')
+    parser.add_argument('--thumbnail', type=int, metavar='ID', help='write the PNG thumbnail of a capture to stdout')
+    args = parser.parse_args(argv)
+    history = get_history()
+    if args.thumbnail is not None:
+        png = history.thumbnail(args.thumbnail)
+        if png is None:
+            print(f"No thumbnail for capture {args.thumbnail}", file=sys.stderr)
+            return 1
+        sys.stdout.buffer.write(png)
+        return 0
+    for entry in history.search(args.search, args.mode, args.limit):
+        if args.json:
+            print(json.dumps(entry))
+            continue
+        when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['timestamp']))
+        window = f"  [{entry['window_class']}] {entry['window_title']}" if entry['window_class'] else ''
+        print(f"{entry['id']:>6}  {when}  {entry['mode'] or '-':<6} {entry['width']}x{entry['height']:<6} "
+              f"{entry['path'] or '(not saved)'}{window}")
+    return 0
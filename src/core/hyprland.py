@@ -0,0 +1,329 @@
+"""
+hyprland.py - Queries against the Hyprland compositor
+
+Requests go straight to Hyprland's command socket (.socket.sock) instead of forking
+hyprctl. HyprlandState keeps a window/workspace model up to date from the event
+socket (.socket2.sock), so the window selector can open from cached state.
+When the sockets are not available (not running under Hyprland, or an old
+layout), hyprctl is used as before.
+"""
+import json
+import os
+import socket
+import subprocess
+import threading
+
+from .process import run_command
+
+
+class HyprlandError(Exception):
+    """The Hyprland sockets are unavailable or returned an error."""
+
+
+def socket_dir():
+    signature = os.environ.get('HYPRLAND_INSTANCE_SIGNATURE')
+    if not signature:
+        return None
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR', '')
+    for base in (os.path.join(runtime_dir, 'hypr'), '/tmp/hypr'):
+        path = os.path.join(base, signature)
+        if os.path.exists(os.path.join(path, '.socket.sock')):
+            return path
+    return None
+
+
+def request(command, timeout=1.0):
+    """Send one command (e.g. 'j/clients') to .socket.sock and return the raw reply."""
+    directory = socket_dir()
+    if directory is None:
+        raise HyprlandError("Hyprland command socket not found")
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(os.path.join(directory, '.socket.sock'))
+            sock.sendall(command.encode('utf-8'))
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except OSError as e:
+        raise HyprlandError(f"Hyprland socket request failed: {e}")
+    return b''.join(chunks).decode('utf-8', 'replace')
+
+
+def hyprctl_json(*args, cancel=None):
+    """JSON reply of a hyprctl query, over the socket when possible, else by running hyprctl."""
+    try:
+        return json.loads(request('j/' + ' '.join(args)))
+    except (HyprlandError, ValueError):
+        pass
+    try:
+        return json.loads(run_command(['hyprctl', *args, '-j'], cancel=cancel, text=True))
+    except subprocess.CalledProcessError as e:
+        raise HyprlandError(f"hyprctl {' '.join(args)} failed: {(e.stderr or '').strip() or e.returncode}")
+
+
+def hyprctl_batch(*queries, cancel=None):
+    """
+    JSON replies of several hyprctl queries, in order, from one [[BATCH]] socket request.
+    Falls back to one hyprctl_json call per query.
+    """
+    try:
+        return _split_json(request('[[BATCH]]' + ';'.join('j/' + query for query in queries)), len(queries))
+    except (HyprlandError, ValueError):
+        pass
+    return [hyprctl_json(query, cancel=cancel) for query in queries]
+
+
+def _split_json(text, count):
+    """The `count` JSON documents of a batched reply, whatever whitespace separates them."""
+    decoder = json.JSONDecoder()
+    values = []
+    pos = 0
+    for _ in range(count):
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        value, pos = decoder.raw_decode(text, pos)
+        values.append(value)
+    if text[pos:].strip():
+        raise ValueError(f"{count} JSON replies expected, got more")
+    return values
+
+
+def monitor_rect(monitor):
+    """Logical (x, y, w, h) of a `hyprctl monitors -j` entry, accounting for scale and rotation."""
+    scale = monitor.get('scale') or 1
+    width, height = monitor['width'], monitor['height']
+    if monitor.get('transform', 0) % 2:  # 90/270 degree transforms swap the axes
+        width, height = height, width
+    return (monitor['x'], monitor['y'], round(width / scale), round(height / scale))
+
+
+def _visible_workspaces(monitor):
+    ids = [(monitor.get('activeWorkspace') or {}).get('id')]
+    special = (monitor.get('specialWorkspace') or {}).get('id')
+    if special:
+        ids.append(special)
+    return ids
+
+
+def _is_on_workspace(client, ws_id):
+    return client.get('mapped', True) and client.get('workspace', {}).get('id') == ws_id
+
+
+def _connect(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class HyprlandState:
+    """
+    Live model of clients and monitors.
+
+    Events that open, close, move or resize windows (or add and remove monitors) mark
+    geometry dirty; the next read then refreshes with one batched socket request. Focus,
+    workspace and title changes are applied in place, so showing the toolbar (which
+    takes focus) does not cost a refresh. Without an event socket every read refreshes.
+    """
+
+    # Events after which client geometry must be re-read
+    LAYOUT_EVENTS = {
+        'openwindow', 'closewindow', 'movewindow', 'movewindowv2', 'changefloatingmode',
+        'fullscreen', 'monitoradded', 'monitoraddedv2', 'monitorremoved', 'monitorremovedv2',
+        'moveworkspace', 'moveworkspacev2', 'activespecial', 'pin', 'minimized',
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clients = {}  # address -> client dict in `hyprctl clients -j` format
+        self.monitors = []
+        self._dirty = True
+        self._listener = None
+        self._stop = threading.Event()
+        self.events_seen = 0
+
+    @property
+    def live(self):
+        """True while the event socket is connected and keeping the model current."""
+        return self._listener is not None and self._listener.is_alive()
+
+    def start(self):
+        """
+        Follow .socket2.sock and take a snapshot (no-op outside Hyprland). The event socket
+        is connected before the snapshot, so no event between the two is lost and the
+        snapshot serves reads as is. Without an event socket every read refreshes anyway,
+        so no snapshot is taken.
+        """
+        directory = socket_dir()
+        if directory is None or self.live:
+            return self
+        path = os.path.join(directory, '.socket2.sock')
+        try:
+            events = _connect(path)
+        except OSError:
+            return self
+        try:
+            self.refresh()
+        except BaseException:
+            events.close()
+            raise
+        self._stop.clear()
+        self._listener = threading.Thread(target=self._listen, args=(path, events),
+                                          name='hyprland-events', daemon=True)
+        self._listener.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def refresh(self, cancel=None):
+        clients, monitors = hyprctl_batch('clients', 'monitors', cancel=cancel)
+        with self._lock:
+            self.clients = {c.get('address'): c for c in clients}
+            self.monitors = monitors
+            self._dirty = False
+
+    def _refresh_if_needed(self, cancel=None):
+        with self._lock:
+            fresh = self.live and not self._dirty
+        if not fresh:
+            self.refresh(cancel=cancel)
+
+    def visible_windows(self, cancel=None):
+        """
+        Windows on every monitor's visible workspace(s) and the monitors themselves,
+        as (monitors, windows). Each monitor is {'name', 'rect', 'workspace', 'scale'}
+        with rect in logical layout coordinates.
+        """
+        self._refresh_if_needed(cancel)
+        with self._lock:
+            monitors = []
+            windows = []
+            for monitor in self.monitors:
+                ws_ids = _visible_workspaces(monitor)
+                monitors.append({
+                    'name': monitor.get('name', ''),
+                    'rect': monitor_rect(monitor),
+                    'workspace': (monitor.get('activeWorkspace') or {}).get('name', ''),
+                    'scale': monitor.get('scale') or 1,
+                })
+                for client in self.clients.values():
+                    if any(_is_on_workspace(client, ws_id) for ws_id in ws_ids):
+                        windows.append(dict(client))
+            return monitors, windows
+
+    def get_monitors(self, cancel=None):
+        self._refresh_if_needed(cancel)
+        with self._lock:
+            return [dict(m) for m in self.monitors]
+
+    def _listen(self, path, sock=None):
+        backoff = 0.5
+        while not self._stop.is_set():
+            try:
+                if sock is None:
+                    sock = _connect(path)
+                    # Anything may have happened while we were disconnected
+                    with self._lock:
+                        self._dirty = True
+                with sock:
+                    backoff = 0.5
+                    pending = b''
+                    while not self._stop.is_set():
+                        chunk = sock.recv(65536)
+                        if not chunk:
+                            break
+                        pending += chunk
+                        *lines, pending = pending.split(b'\n')
+                        for line in lines:
+                            self.apply_event(line.decode('utf-8', 'replace'))
+            except OSError:
+                pass
+            sock = None
+            with self._lock:
+                self._dirty = True
+            if self._stop.wait(backoff):
+                break
+            backoff = min(backoff * 2, 10.0)
+
+    def apply_event(self, line):
+        """Update the model from one 'event>>data' line of .socket2.sock."""
+        event, sep, data = line.partition('>>')
+        if not sep:
+            return
+        self.events_seen += 1
+        with self._lock:
+            if event == 'closewindow':
+                self.clients.pop('0x' + data, None)
+            elif event == 'openwindow':
+                address, _ws_name, cls, title = (data.split(',', 3) + ['', '', ''])[:4]
+                # Geometry arrives with the next refresh; keep it out of selection until then
+                self.clients['0x' + address] = {'address': '0x' + address, 'class': cls, 'title': title,
+                                                 'mapped': False, 'at': [0, 0], 'size': [0, 0]}
+            elif event == 'windowtitlev2':
+                address, _, title = data.partition(',')
+                client = self.clients.get('0x' + address)
+                if client is not None:
+                    client['title'] = title
+            elif event == 'activewindowv2':
+                self._focus('0x' + data)
+            elif event == 'workspacev2':
+                # workspacev2>>ID,NAME: the focused monitor switched workspace
+                ws_id, _, name = data.partition(',')
+                try:
+                    workspace = {'id': int(ws_id), 'name': name}
+                except ValueError:
+                    return
+                for monitor in self.monitors:
+                    if monitor.get('focused'):
+                        monitor['activeWorkspace'] = workspace
+            elif event == 'focusedmonv2':
+                # focusedmonv2>>MONNAME,WORKSPACEID
+                name, _, _ws_id = data.rpartition(',')
+                for monitor in self.monitors:
+                    monitor['focused'] = monitor.get('name') == name
+            if event in self.LAYOUT_EVENTS:
+                self._dirty = True
+
+    def _focus(self, address):
+        """Move a client to the front of the focus history, as Hyprland does (caller holds the lock)."""
+        client = self.clients.get(address)
+        if client is None:
+            return
+        previous = client.get('focusHistoryID', len(self.clients))
+        for other in self.clients.values():
+            if other.get('focusHistoryID', 0) < previous:
+                other['focusHistoryID'] = other.get('focusHistoryID', 0) + 1
+        client['focusHistoryID'] = 0
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def hyprland_state():
+    """The process-wide HyprlandState, started on first use."""
+    global _state
+    with _state_lock:
+        if _state is None:
+            _state = HyprlandState().start()
+        return _state
+
+
+def visible_windows(cancel=None):
+    """(monitors, windows) for every output; see HyprlandState.visible_windows."""
+    return hyprland_state().visible_windows(cancel=cancel)
+
+
+def refreshed_visible_windows(cancel=None):
+    """Like visible_windows, but always re-reads geometry from the compositor."""
+    state = hyprland_state()
+    state.refresh(cancel=cancel)
+    return state.visible_windows(cancel=cancel)
@@ -0,0 +1,49 @@
+"""
+ipc.py - Unix socket protocol between a resident HyprSnipper daemon and thin clients
+
+The protocol is one newline-terminated command per connection, answered with a
+single reply line. This module must stay free of Qt imports so that
+`hyprsnipper --trigger` starts in a few milliseconds.
+"""
+import os
+import socket
+
+# Commands understood by the daemon. Mode commands start a capture directly.
+MODE_COMMANDS = ('region', 'window', 'full', 'all')
+COMMANDS = ('show', 'cancel', 'ping', 'quit') + MODE_COMMANDS
+
+
+def runtime_dir():
+    """$XDG_RUNTIME_DIR, or a per-user directory in /tmp without one."""
+    return os.environ.get('XDG_RUNTIME_DIR') or f'/tmp/hyprsnipper-{os.getuid()}'
+
+
+def socket_path():
+    """Path of the daemon socket, inside $XDG_RUNTIME_DIR when available."""
+    return os.path.join(runtime_dir(), 'hyprsnipper.sock')
+
+
+def send_command(command, timeout=2.0):
+    """
+    Send a command to the running daemon and return its reply.
+    Raises OSError (e.g. ConnectionRefusedError, FileNotFoundError) if no daemon is listening.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path())
+        sock.sendall(command.encode('utf-8') + b'\n')
+        reply = b''
+        while not reply.endswith(b'\n'):
+            chunk = sock.recv(256)
+            if not chunk:
+                break
+            reply += chunk
+    return reply.decode('utf-8').strip()
+
+
+def daemon_running():
+    """Return True if a daemon answers on the socket."""
+    try:
+        return send_command('ping', timeout=0.5) == 'pong'
+    except OSError:
+        return False
@@ -0,0 +1,332 @@
+"""
+pipeline.py - Post-capture fan-out: save, clipboard and editor sinks from one in-memory frame
+
+Each sink has its own format and level (SAVE_FORMAT/SAVE_LEVEL, COPY_..., EDIT_... in
+settings.yaml). The frame is encoded at most once per distinct (format, level) and
+shared by every sink asking for it. Sinks run concurrently on a small thread pool; a
+file is only written when Save is enabled (or when the editor cannot read from stdin).
+With DEDUP on, a capture identical to a recent one is hard-linked instead of written.
+"""
+import datetime
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .clipboard import ClipboardError, copy_frame
+from .dedup import link_duplicate, perceptual_hash, pixel_hash
+from .encoders import FORMATS, EncoderError, encode
+from .trace import NO_TRACE
+
+CACHE_DIR = os.path.expanduser('~/.cache/hyprsnipper')
+# Unsaved captures handed to the editor are removed once they are this old (seconds)
+EDIT_FILE_MAX_AGE = 24 * 3600
+
+# One worker per sink, then the history record; the pool lives as long as the process (daemon friendly)
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='hyprsnipper-sink')
+
+
+# Used when no per-sink setting is given: a balanced PNG for files, a fast one otherwise
+DEFAULT_ENCODINGS = {'save': ('png', 4), 'copy': ('png', 1), 'edit': ('png', 1)}
+
+
+def sink_encodings(settings):
+    """{'save'|'copy'|'edit': (format, level)} from the SAVE_/COPY_/EDIT_ FORMAT and LEVEL settings."""
+    return {sink: (settings[f'{sink.upper()}_FORMAT'], settings[f'{sink.upper()}_LEVEL'])
+            for sink in DEFAULT_ENCODINGS}
+
+
+class Encoded:
+    """Encoded image bytes with their format."""
+
+    def __init__(self, payload, fmt):
+        self.payload = payload
+        self.format = fmt
+        self.mime, self.extension = FORMATS[fmt]
+
+
+class EncodedFrame:
+    """Lazily encodes a frame once per (format, level), no matter how many sinks ask for it."""
+
+    def __init__(self, frame, trace=NO_TRACE):
+        self.frame = frame
+        self.trace = trace
+        self._encoded = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, fmt='png', level=6):
+        key = (fmt, level)
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        # Different formats encode in parallel; the same one only once
+        with lock:
+            if key not in self._encoded:
+                started = time.monotonic()
+                try:
+                    self._encoded[key] = Encoded(encode(self.frame, fmt, level), fmt)
+                    self.trace.mark(f"encoded {fmt} {level}", started)
+                except EncoderError as e:
+                    if fmt == 'png':
+                        raise
+                    print(f"[HyprSnipper] Warning: {e}; using PNG instead")
+                    self._encoded[key] = self.get('png', 4)
+            return self._encoded[key]
+
+    def png(self):
+        return self.get('png', 4).payload
+
+    def _cached(self, name, fn):
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._encoded:
+                self._encoded[name] = fn(self.frame)
+            return self._encoded[name]
+
+    def digest(self):
+        """Hash of the raw pixels, computed once."""
+        return self._cached('digest', pixel_hash)
+
+    def phash(self):
+        """Perceptual hash (dHash), computed once."""
+        return self._cached('phash', perceptual_hash)
+
+
+def screenshot_filename(now=None, extension='png'):
+    """hyprsnip_YYYY-MM-DD_HH.MM.SS.mmm.<ext>: sorts by name in capture order."""
+    now = now or datetime.datetime.now()
+    return f"hyprsnip_{now:%Y-%m-%d_%H.%M.%S}.{now.microsecond // 1000:03d}.{extension}"
+
+
+def _link_unique(tmp_path, path):
+    """Give tmp_path the name `path`, or `path` with -1, -2, ... appended if it is taken."""
+    base, ext = os.path.splitext(path)
+    candidate, n = path, 0
+    while True:
+        try:
+            # link() fails instead of overwriting, so two captures can never take the same name
+            os.link(tmp_path, candidate)
+            os.unlink(tmp_path)
+            return candidate
+        except FileExistsError:
+            n += 1
+            candidate = f"{base}-{n}{ext}"
+        except OSError:
+            # File system without hard links
+            if os.path.exists(candidate):
+                n += 1
+                candidate = f"{base}-{n}{ext}"
+                continue
+            os.replace(tmp_path, candidate)
+            return candidate
+
+
+def write_file(path, payload, unique=False):
+    """
+    Write via a temporary file in the same directory so readers never see partial images.
+    With unique, an existing file is never replaced; the returned path may have a suffix.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        if unique:
+            path = _link_unique(tmp_path, path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+class ExistingPath(str):
+    """What save_sink returns when nothing was written: the path of an identical earlier capture."""
+
+
+def save_sink(encoded, save_dir, encoding=DEFAULT_ENCODINGS['save'], dedup=None, notify=print):
+    near = None
+    if dedup is not None:
+        extension = FORMATS[encoding[0]][1]
+        existing = dedup.find_exact(encoded.digest())
+        if existing is not None and existing.endswith('.' + extension):
+            # Same pixels as a recent capture: no encode, no second copy on disk
+            path = link_duplicate(existing, os.path.join(save_dir, screenshot_filename(extension=extension)))
+            notify(f"Duplicate of {existing}" + (", hard-linked" if path else ", not saved again"))
+            return path or ExistingPath(existing)
+        if dedup.perceptual:
+            near = dedup.find_near(encoded.phash())
+    image = encoded.get(*encoding)
+    path = write_file(os.path.join(save_dir, screenshot_filename(extension=image.extension)), image.payload,
+                      unique=True)
+    if dedup is not None:
+        dedup.add(encoded.digest(), encoded.phash() if dedup.perceptual else None, path)
+    if near is not None:
+        notify(f"Similar to {near[0]} ({near[1]} of 64 bits differ)")
+    return path
+
+
+def clipboard_sink(encoded, encoding=DEFAULT_ENCODINGS['copy'], saved=None, resident=False):
+    """
+    Offer the capture in several formats, encoded only when pasted (see clipboard.py).
+    saved: future of the saved path, offered as text/uri-list.
+    """
+    try:
+        copy_frame(encoded, encoding, saved, resident)
+        return
+    except ClipboardError as e:
+        print(f"[HyprSnipper] Clipboard server unavailable ({e}); using wl-copy")
+    image = encoded.get(*encoding)
+    # wl-copy forks a background server that keeps serving the data; do not
+    # capture its output or we would wait for that server to exit
+    subprocess.run(['wl-copy', '--type', image.mime], input=image.payload,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+
+def editor_sink(encoded, editor, saved=None, encoding=DEFAULT_ENCODINGS['edit']):
+    """Open the capture in the editor: the saved file if there is one, otherwise from memory."""
+    editor = editor.strip()
+    path = saved.result() if saved is not None else None
+    if path is None and editor == 'swappy':
+        # swappy reads the image from stdin, so nothing touches the disk
+        proc = subprocess.Popen([editor, '-f', '-'], stdin=subprocess.PIPE)
+        proc.stdin.write(encoded.get(*encoding).payload)
+        proc.stdin.close()
+        return
+    if path is None:
+        image = encoded.get(*encoding)
+        remove_stale_edit_files()
+        path = write_file(os.path.join(CACHE_DIR, f"edit_{os.getpid()}_{id(encoded)}.{image.extension}"),
+                          image.payload)
+    open_in_editor(editor, path)
+
+
+def remove_stale_edit_files(max_age=EDIT_FILE_MAX_AGE):
+    """Delete the editor's copies of unsaved captures older than max_age; newer ones may still be open."""
+    cutoff = time.time() - max_age
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    for name in names:
+        if name.startswith('edit_'):
+            path = os.path.join(CACHE_DIR, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.unlink(path)
+            except OSError:
+                pass
+
+
+def open_in_editor(editor, path):
+    """Start the editor on an image file without waiting for it."""
+    editor = editor.strip()
+    if editor == 'swappy':
+        subprocess.Popen([editor, '-f', path])
+    else:
+        subprocess.Popen([editor, path])
+
+
+def when_done(futures, callback):
+    """Call callback() once every future has finished, on the thread that finished the last one."""
+    futures = list(futures)
+    if not futures:
+        callback()
+        return
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_future):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            callback()
+    for future in futures:
+        future.add_done_callback(done)
+
+
+def _trace_sinks(trace, futures, started):
+    """Mark '<sink> done' as each future finishes and finish the trace after the last one."""
+    if trace is NO_TRACE:
+        return
+    for name, future in futures.items():
+        future.add_done_callback(lambda _future, name=name: trace.mark(f"{name} done", started))
+    when_done(futures.values(), trace.finish)
+
+
+class CapturePipeline:
+    """
+    Runs the enabled sinks for a captured frame.
+
+    notify: callable(str) used to report each sink's outcome; it is called from
+            worker threads, so it must not touch widgets directly.
+    """
+
+    def __init__(self, save_dir, editor, notify=print, encodings=None, history=None, dedup=None, resident=False):
+        self.save_dir = os.path.expanduser(save_dir)
+        self.editor = editor
+        self.notify = notify
+        self.encodings = dict(DEFAULT_ENCODINGS, **(encodings or {}))
+        self.history = history
+        self.dedup = dedup
+        # The process outlives the capture (daemon), so it can serve the clipboard itself
+        self.resident = resident
+
+    def run(self, frame, save=True, copy=False, edit=False, meta=None, trace=NO_TRACE):
+        """
+        Start the sinks and return their futures keyed by sink name.
+        meta: {'mode', 'geometry', 'window'} recorded in the history with the capture.
+        trace: CaptureTrace that gets each encode and sink marked and is finished with the last sink.
+        """
+        encoded = EncodedFrame(frame, trace)
+        started = time.monotonic()
+        futures = {}
+        if save:
+            futures['save'] = _executor.submit(self._report, 'Save', save_sink, encoded, self.save_dir,
+                                               self.encodings['save'], self.dedup, self.notify)
+        if copy:
+            futures['copy'] = _executor.submit(self._report, 'Copy', clipboard_sink, encoded,
+                                               self.encodings['copy'], futures.get('save'), self.resident)
+        if edit:
+            futures['edit'] = _executor.submit(self._report, 'Edit', editor_sink, encoded, self.editor,
+                                               futures.get('save'), self.encodings['edit'])
+        if self.history is not None:
+            futures['history'] = _executor.submit(self._record, encoded, list(futures.values()),
+                                                  futures.get('save'), meta or {})
+        _trace_sinks(trace, futures, started)
+        return futures
+
+    def _record(self, encoded, sinks, saved, meta):
+        # Hashing the pixels and encoding the thumbnail must not compete with the sinks
+        wait(sinks)
+        path = saved.result() if saved is not None else None
+        perceptual = self.dedup is not None and self.dedup.perceptual
+        try:
+            return self.history.record(encoded.frame, path=path, mode=meta.get('mode'),
+                                       geometry=meta.get('geometry'), window=meta.get('window'),
+                                       fmt=self.encodings['save'][0] if path else None,
+                                       digest=encoded.digest(), phash=encoded.phash() if perceptual else None)
+        except Exception as e:
+            print(f"[HyprSnipper] Warning: could not record capture in history: {e}")
+            return None
+
+    def _report(self, label, sink, *args):
+        try:
+            result = sink(*args)
+        except Exception as e:
+            self.notify(f"{label} failed: {e}")
+            return None
+        if label == 'Save':
+            self.notify(f"Saved: {result}")
+        elif label == 'Copy':
+            self.notify("Copied to clipboard")
+        else:
+            self.notify(f"Opened in {self.editor}")
+        return result
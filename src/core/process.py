@@ -0,0 +1,70 @@
+"""
+process.py - Cancellable subprocess helpers for capture work running off the GUI thread
+"""
+import subprocess
+import threading
+
+
+class Cancelled(Exception):
+    """The operation was cancelled through its CancelToken."""
+
+
+class CancelToken:
+    """
+    Shared between the GUI thread and a worker. cancel() kills any child process the
+    worker registered, so a blocked slurp/hyprctl/grim returns immediately.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._procs = []
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            procs, self._procs = self._procs, []
+        for proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+
+    def check(self):
+        if self._cancelled:
+            raise Cancelled()
+
+    def register(self, proc):
+        with self._lock:
+            if self._cancelled:
+                proc.kill()
+                raise Cancelled()
+            self._procs.append(proc)
+
+    def unregister(self, proc):
+        with self._lock:
+            if proc in self._procs:
+                self._procs.remove(proc)
+
+
+def run_command(args, cancel=None, input=None, text=False):
+    """
+    Run a command to completion and return its stdout, like subprocess.run(check=True).
+    Raises Cancelled if the token fires while it runs.
+    """
+    proc = subprocess.Popen(args, stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=text)
+    if cancel is not None:
+        cancel.register(proc)
+    try:
+        stdout, stderr = proc.communicate(input)
+    finally:
+        if cancel is not None:
+            cancel.unregister(proc)
+    if cancel is not None:
+        cancel.check()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, args, stdout, stderr)
+    return stdout
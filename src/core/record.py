@@ -0,0 +1,320 @@
+"""
+record.py - Short screen recordings streamed to ffmpeg as raw frames
+
+    hyprsnipper record [--mode region|window|full|all] [--duration 30s] [--fps 30] [--format mp4]
+    hyprsnipper record --stop
+    hyprsnipper record --export clip.mp4 --format gif
+
+The area is selected like a burst capture (core/selection.py). Frames are captured on a
+fixed schedule and piped to `ffmpeg -f rawvideo` on stdin in the compositor's own pixel
+format, so nothing is converted or encoded as an image per frame. A writer thread feeds
+ffmpeg from a bounded queue; when ffmpeg falls behind, shots are dropped instead of
+queued and the writer repeats the previous frame for the gap, so the clip keeps real time
+and memory stays flat.
+
+mp4 (H.264) and webm (VP9) are meant for keeping; gif and webp (animated) for quick sharing.
+"""
+import argparse
+import datetime
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from .backends import CaptureError, capture_frame, parse_geometry
+from .ipc import runtime_dir
+from .process import Cancelled
+
+# Video encoders want even dimensions
+_EVEN = 'crop=trunc(iw/2)*2:trunc(ih/2)*2'
+
+# format: (extension, ffmpeg output arguments)
+RECORD_FORMATS = {
+    'mp4': ('mp4', ['-vf', _EVEN, '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23',
+                    '-pix_fmt', 'yuv420p', '-movflags', '+faststart']),
+    'webm': ('webm', ['-vf', _EVEN, '-c:v', 'libvpx-vp9', '-deadline', 'realtime', '-cpu-used', '8',
+                      '-crf', '34', '-b:v', '0', '-pix_fmt', 'yuv420p']),
+    # One palette for the whole clip: much smaller and cleaner than ffmpeg's default
+    'gif': ('gif', ['-filter_complex', 'split[a][b];[a]palettegen=stats_mode=diff[p];'
+                                       '[b][p]paletteuse=dither=bayer:diff_mode=rectangle', '-loop', '0']),
+    'webp': ('webp', ['-c:v', 'libwebp', '-lossless', '0', '-q:v', '75', '-loop', '0']),
+}
+
+# Frame.format -> ffmpeg rawvideo pixel format (same memory order)
+PIXEL_FORMATS = {
+    'xrgb8888': 'bgr0',
+    'argb8888': 'bgra',
+    'xbgr8888': 'rgb0',
+    'abgr8888': 'rgba',
+    'rgb888': 'rgb24',
+}
+
+# Frames waiting for ffmpeg; a 4K frame is 33 MB, so this stays short
+QUEUE_SIZE = 8
+
+
+class RecordError(Exception):
+    """Raised when the encoder cannot be started or fails."""
+
+
+def pid_file():
+    return os.path.join(runtime_dir(), 'hyprsnipper-record.pid')
+
+
+def packed_rows(frame):
+    """Frame pixels without row padding, as ffmpeg's rawvideo expects."""
+    row_bytes = frame.width * frame.bytes_per_pixel
+    if frame.stride == row_bytes:
+        return frame.data
+    view = memoryview(frame.data)
+    return b''.join(view[y * frame.stride:y * frame.stride + row_bytes] for y in range(frame.height))
+
+
+def ffmpeg_command(width, height, pixel_format, fps, fmt, path):
+    if shutil.which('ffmpeg') is None:
+        raise RecordError("ffmpeg not found")
+    return (['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+             '-f', 'rawvideo', '-pix_fmt', pixel_format, '-s', f'{width}x{height}', '-r', str(fps), '-i', '-']
+            + RECORD_FORMATS[fmt][1] + [path])
+
+
+class RecordStats:
+    def __init__(self):
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.elapsed = 0.0
+
+    @property
+    def fps(self):
+        return self.captured / self.elapsed if self.elapsed else 0.0
+
+    def report(self, fps):
+        return (f"{self.written} frames in {self.elapsed:.1f}s: captured at {self.fps:.1f} of {fps} FPS, "
+                f"{self.dropped} dropped (repeated)")
+
+
+class Recorder:
+    """
+    Records `geometry` to `path` until `duration` seconds have passed or stop() is called.
+    Frames are numbered by their slot on the fps schedule; the writer fills skipped slots
+    with the previous frame.
+    """
+
+    def __init__(self, geometry, path, fps=30, duration=None, fmt='mp4', backend='auto'):
+        self.geometry = parse_geometry(geometry)
+        self.path = os.path.expanduser(path)
+        self.fps = fps
+        self.duration = duration
+        self.format = fmt
+        self.backend = backend
+        self.stats = RecordStats()
+        self._queue = queue.Queue(QUEUE_SIZE)
+        self._stop = threading.Event()
+        self._proc = None
+        self._error = None
+
+    def stop(self):
+        self._stop.set()
+
+    def _start_encoder(self, frame):
+        pixel_format = PIXEL_FORMATS[frame.format]
+        args = ffmpeg_command(frame.width, frame.height, pixel_format, self.fps, self.format, self.path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._proc = subprocess.Popen(args, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        writer = threading.Thread(target=self._write_frames, args=(frame.width, frame.height, frame.format),
+                                  name='hyprsnipper-record', daemon=True)
+        writer.start()
+        return writer
+
+    def _write_frames(self, width, height, fmt):
+        """Writer thread: queue -> ffmpeg stdin, repeating the last frame over dropped slots."""
+        stdin = self._proc.stdin
+        last, next_slot = None, 0
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                slot, frame = item
+                if (frame.width, frame.height, frame.format) != (width, height, fmt):
+                    raise RecordError("Capture size changed while recording")
+                while last is not None and next_slot < slot:
+                    stdin.write(last)
+                    next_slot += 1
+                    self.stats.written += 1
+                last = packed_rows(frame)
+                stdin.write(last)
+                next_slot = slot + 1
+                self.stats.written += 1
+        except (OSError, RecordError) as e:
+            self._error = e
+            self._stop.set()
+            # Keep draining so the producer never blocks on a dead encoder
+            while self._queue.get() is not None:
+                pass
+
+    def run(self):
+        """Record until done; returns RecordStats once ffmpeg has finished the file."""
+        stats = self.stats
+        interval = 1 / self.fps
+        writer = None
+        start = time.monotonic()
+        slot = 0
+        try:
+            while not self._stop.is_set():
+                due = start + slot * interval
+                if self.duration is not None and due - start >= self.duration:
+                    break
+                wait = due - time.monotonic()
+                if wait > 0 and self._stop.wait(wait):
+                    break
+                # A slot whose time passed while the last capture ran is skipped
+                late = int((time.monotonic() - due) / interval)
+                if late:
+                    slot += late
+                    stats.dropped += late
+                    continue
+                try:
+                    frame = capture_frame(self.geometry, self.backend)
+                except (CaptureError, Cancelled) as e:
+                    raise RecordError(f"Capture failed: {e}")
+                if writer is None:
+                    writer = self._start_encoder(frame)
+                try:
+                    self._queue.put_nowait((slot, frame))
+                    stats.captured += 1
+                except queue.Full:
+                    stats.dropped += 1
+                slot += 1
+        finally:
+            stats.elapsed = time.monotonic() - start
+            if writer is not None:
+                self._queue.put(None)
+                writer.join()
+                self._finish_encoder()
+        if self._error is not None:
+            raise RecordError(f"Encoder failed: {self._error}")
+        return stats
+
+    def _finish_encoder(self):
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        stderr = self._proc.stderr.read().decode('utf-8', 'replace').strip()
+        if self._proc.wait() != 0 and self._error is None:
+            self._error = stderr or f"ffmpeg exited with status {self._proc.returncode}"
+
+
+def export_clip(source, fmt, path=None, fps=None):
+    """Convert a recording (e.g. an mp4) to another RECORD_FORMATS format; returns the new path."""
+    if shutil.which('ffmpeg') is None:
+        raise RecordError("ffmpeg not found")
+    path = path or f"{os.path.splitext(source)[0]}.{RECORD_FORMATS[fmt][0]}"
+    args = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostdin', '-y', '-i', source]
+    if fps:
+        args += ['-r', str(fps)]
+    result = subprocess.run(args + RECORD_FORMATS[fmt][1] + [path], stdin=subprocess.DEVNULL, capture_output=True)
+    if result.returncode != 0:
+        raise RecordError(result.stderr.decode('utf-8', 'replace').strip() or "ffmpeg failed")
+    return path
+
+
+def recording_filename(extension, now=None):
+    now = now or datetime.datetime.now()
+    return f"hyprsnip_{now:%Y-%m-%d_%H.%M.%S}.{extension}"
+
+
+def stop_recording():
+    """Ask a running `hyprsnipper record` to finish its clip. Returns True if one was running."""
+    try:
+        with open(pid_file()) as f:
+            pid = int(f.read().strip())
+        os.kill(pid, signal.SIGINT)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def positive_int(text):
+    """argparse type for counts that must be at least 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def main(argv=None):
+    """`hyprsnipper record` command line."""
+    from .burst import parse_duration
+    from .selection import select_geometry
+    from .settings import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog='hyprsnipper record', description='Record a short clip of the screen')
+    parser.add_argument('--mode', choices=('region', 'window', 'full', 'all'), default='region')
+    parser.add_argument('--duration', metavar='TIME', help='stop after this long, e.g. 30s (default: until --stop)')
+    parser.add_argument('--fps', type=positive_int,
+                        help=f"frames per second (default: RECORD_FPS, {settings['RECORD_FPS']})")
+    parser.add_argument('--format', choices=tuple(RECORD_FORMATS), default=settings['RECORD_FORMAT'])
+    parser.add_argument('--output', metavar='PATH', help='file to write (default: a new file in SAVE_DIR)')
+    parser.add_argument('--stop', action='store_true', help='finish the running recording')
+    parser.add_argument('--export', metavar='CLIP', help='convert an existing clip to --format')
+    args = parser.parse_args(argv)
+
+    if args.stop:
+        if stop_recording():
+            return 0
+        print("[HyprSnipper] No recording running", file=sys.stderr)
+        return 1
+    if args.export:
+        try:
+            print(export_clip(args.export, args.format, args.output, args.fps))
+        except RecordError as e:
+            print(f"[HyprSnipper] Export failed: {e}", file=sys.stderr)
+            return 1
+        return 0
+    try:
+        duration = parse_duration(args.duration) if args.duration else None
+    except ValueError as e:
+        print(f"[HyprSnipper] {e}", file=sys.stderr)
+        return 2
+    try:
+        geometry = select_geometry(args.mode)
+    except Cancelled:
+        return 1
+    except Exception as e:
+        print(f"[HyprSnipper] Could not select the {args.mode} area: {e}", file=sys.stderr)
+        return 1
+
+    path = args.output or os.path.join(os.path.expanduser(settings['SAVE_DIR']),
+                                       recording_filename(RECORD_FORMATS[args.format][0]))
+    fps = args.fps or settings['RECORD_FPS']
+    recorder = Recorder(geometry, path, fps=fps, duration=duration, fmt=args.format,
+                        backend=settings['CAPTURE_BACKEND'])
+    os.makedirs(runtime_dir(), mode=0o700, exist_ok=True)
+    with open(pid_file(), 'w') as f:
+        f.write(str(os.getpid()))
+    # `record --stop` and Ctrl+C both end the clip cleanly
+    signal.signal(signal.SIGINT, lambda *_: recorder.stop())
+    signal.signal(signal.SIGTERM, lambda *_: recorder.stop())
+    print(f"[HyprSnipper] Recording to {path}; stop with Ctrl+C or `hyprsnipper record --stop`",
+          file=sys.stderr)
+    try:
+        stats = recorder.run()
+    except RecordError as e:
+        print(f"[HyprSnipper] Recording failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        try:
+            os.unlink(pid_file())
+        except OSError:
+            pass
+    print(f"[HyprSnipper] {stats.report(fps)}", file=sys.stderr)
+    print(path)
+    return 0
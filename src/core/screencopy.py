@@ -0,0 +1,411 @@
+"""
+screencopy.py - Minimal in-process Wayland client for wlr-screencopy-unstable-v1
+
+Speaks the Wayland wire protocol directly over the compositor socket, so no extra
+Python dependency is needed. Frames are copied into a memfd-backed wl_shm buffer and
+returned as a Frame without spawning grim or encoding a PNG.
+
+Only shm buffers are supported; any failure raises ScreencopyError so callers can
+fall back to grim.
+"""
+import array
+import collections
+import mmap
+import os
+import socket
+import struct
+import threading
+
+from .frame import Frame
+
+WL_DISPLAY_ID = 1
+
+# wl_shm formats we know how to hand to Frame. 0 and 1 are special-cased by the
+# protocol, everything else is the DRM fourcc code.
+def _fourcc(code):
+    return struct.unpack('<I', code.encode('ascii'))[0]
+
+SHM_FORMATS = {
+    0: 'argb8888',
+    1: 'xrgb8888',
+    _fourcc('XB24'): 'xbgr8888',
+    _fourcc('AB24'): 'abgr8888',
+}
+
+FRAME_FLAG_Y_INVERT = 1
+
+
+class ScreencopyError(Exception):
+    """Screencopy is unavailable or a capture failed."""
+
+
+# --- Wire encoding -------------------------------------------------------
+
+def pack_uint(value):
+    return struct.pack('<I', value & 0xFFFFFFFF)
+
+def pack_int(value):
+    return struct.pack('<i', value)
+
+def pack_string(value):
+    raw = value.encode('utf-8') + b'\0'
+    return pack_uint(len(raw)) + raw + b'\0' * (-len(raw) % 4)
+
+def pack_message(object_id, opcode, payload=b''):
+    return struct.pack('<II', object_id, ((8 + len(payload)) << 16) | opcode) + payload
+
+
+class ArgReader:
+    """Sequential decoder for the arguments of a single message."""
+
+    def __init__(self, payload, fds=None):
+        self.payload = payload
+        self.pos = 0
+        self.fds = fds
+
+    def uint(self):
+        value = struct.unpack_from('<I', self.payload, self.pos)[0]
+        self.pos += 4
+        return value
+
+    def int(self):
+        value = struct.unpack_from('<i', self.payload, self.pos)[0]
+        self.pos += 4
+        return value
+
+    def string(self):
+        length = self.uint()
+        raw = self.payload[self.pos:self.pos + length - 1] if length else b''
+        self.pos += length + (-length % 4)
+        return raw.decode('utf-8', 'replace')
+
+    def fd(self):
+        """File descriptor argument; they arrive out of band, in message order. The caller closes it."""
+        return self.fds.popleft()
+
+
+class WaylandConnection:
+    """Raw Wayland socket: sends requests, dispatches events to per-object handlers."""
+
+    def __init__(self, display=None):
+        display = display or os.environ.get('WAYLAND_DISPLAY')
+        if not display:
+            raise ScreencopyError("WAYLAND_DISPLAY is not set")
+        if not os.path.isabs(display):
+            runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+            if not runtime_dir:
+                raise ScreencopyError("XDG_RUNTIME_DIR is not set")
+            display = os.path.join(runtime_dir, display)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.connect(display)
+        except OSError as e:
+            self.sock.close()
+            raise ScreencopyError(f"Cannot connect to {display}: {e}")
+        self.sock.settimeout(2.0)
+        self._next_id = 2
+        self._buffer = b''
+        self._send_lock = threading.Lock()
+        self.fds = collections.deque()  # received, not yet claimed by an event
+        self.handlers = {WL_DISPLAY_ID: self._on_display_event}
+
+    def close(self):
+        self.sock.close()
+        while self.fds:
+            os.close(self.fds.popleft())
+
+    def new_id(self, handler=None):
+        object_id = self._next_id
+        self._next_id += 1
+        if handler is not None:
+            self.handlers[object_id] = handler
+        return object_id
+
+    def send(self, object_id, opcode, payload=b'', fd=None):
+        message = pack_message(object_id, opcode, payload)
+        with self._send_lock:
+            try:
+                if fd is None:
+                    self.sock.sendall(message)
+                else:
+                    self.sock.sendmsg([message], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', [fd]))])
+            except OSError as e:
+                raise ScreencopyError(f"Compositor connection failed: {e}")
+
+    def dispatch(self):
+        """Block until at least one message arrives, then run the handlers for every complete message."""
+        try:
+            data, ancdata, _flags, _addr = self.sock.recvmsg(65536, socket.CMSG_SPACE(16 * 4))
+        except (OSError, socket.timeout) as e:
+            raise ScreencopyError(f"Compositor connection failed: {e}")
+        for level, kind, cdata in ancdata:
+            # Handed to the event that carries them (e.g. a clipboard send request)
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds = array.array('i')
+                fds.frombytes(cdata[:len(cdata) - (len(cdata) % fds.itemsize)])
+                self.fds.extend(fds)
+        if not data:
+            raise ScreencopyError("Compositor closed the connection")
+        self._buffer += data
+        while len(self._buffer) >= 8:
+            object_id, word = struct.unpack_from('<II', self._buffer)
+            size, opcode = word >> 16, word & 0xFFFF
+            if len(self._buffer) < size:
+                break
+            payload, self._buffer = self._buffer[8:size], self._buffer[size:]
+            handler = self.handlers.get(object_id)
+            if handler is not None:
+                handler(opcode, ArgReader(payload, self.fds))
+
+    def roundtrip(self):
+        """wl_display.sync and wait for the callback, so all pending events are handled."""
+        done = []
+        callback = self.new_id(lambda opcode, args: done.append(True))
+        self.send(WL_DISPLAY_ID, 0, pack_uint(callback))
+        while not done:
+            self.dispatch()
+        del self.handlers[callback]
+
+    def _on_display_event(self, opcode, args):
+        if opcode == 0:  # error
+            object_id, code, message = args.uint(), args.uint(), args.string()
+            raise ScreencopyError(f"Wayland protocol error on object {object_id} (code {code}): {message}")
+        # opcode 1 (delete_id) needs no bookkeeping here
+
+
+class Output:
+    """A wl_output with its logical position and size in the compositor layout."""
+
+    def __init__(self, object_id):
+        self.object_id = object_id
+        self.name = ''
+        self.x = self.y = 0
+        self.mode_size = (0, 0)
+        self.scale = 1
+        self.transform = 0
+        self.logical = None  # (x, y, w, h) from xdg-output when available
+
+    @property
+    def rect(self):
+        if self.logical is not None:
+            return self.logical
+        w, h = self.mode_size
+        if self.transform % 2:  # 90/270 degree rotations swap the axes
+            w, h = h, w
+        return (self.x, self.y, w // max(self.scale, 1), h // max(self.scale, 1))
+
+    def on_event(self, opcode, args):
+        if opcode == 0:  # geometry
+            self.x, self.y = args.int(), args.int()
+            args.int(), args.int(), args.int()  # physical size, subpixel
+            args.string(), args.string()  # make, model
+            self.transform = args.int()
+        elif opcode == 1:  # mode
+            flags = args.uint()
+            if flags & 0x1:  # current mode
+                self.mode_size = (args.int(), args.int())
+        elif opcode == 3:  # scale
+            self.scale = args.int()
+        elif opcode == 4:  # name
+            self.name = args.string()
+
+    def on_xdg_event(self, opcode, args):
+        x, y, w, h = self.logical or (0, 0, 0, 0)
+        if opcode == 0:  # logical_position
+            x, y = args.int(), args.int()
+            self.logical = (x, y, w, h)
+        elif opcode == 1:  # logical_size
+            w, h = args.int(), args.int()
+            self.logical = (x, y, w, h)
+        elif opcode == 3:  # name
+            self.name = args.string()
+
+
+class ScreencopyClient:
+    """
+    Persistent screencopy session. Reuses the compositor connection and bound globals
+    across captures, which matters for the daemon and burst modes.
+    """
+
+    def __init__(self, display=None):
+        self._lock = threading.Lock()
+        self.conn = WaylandConnection(display)
+        self.globals = {}
+        self.shm_id = None
+        self.manager_id = None
+        self.manager_version = 0
+        self.outputs = []
+        try:
+            self._bind_globals()
+        except Exception:
+            self.conn.close()
+            raise
+
+    def close(self):
+        self.conn.close()
+
+    def _bind_globals(self):
+        conn = self.conn
+
+        def on_registry(opcode, args):
+            if opcode == 0:  # global
+                name, interface, version = args.uint(), args.string(), args.uint()
+                self.globals.setdefault(interface, []).append((name, version))
+
+        self.registry_id = conn.new_id(on_registry)
+        conn.send(WL_DISPLAY_ID, 1, pack_uint(self.registry_id))
+        conn.roundtrip()
+
+        if 'zwlr_screencopy_manager_v1' not in self.globals:
+            raise ScreencopyError("Compositor does not support wlr-screencopy")
+        if 'wl_shm' not in self.globals:
+            raise ScreencopyError("Compositor does not advertise wl_shm")
+        self.shm_id = self._bind('wl_shm', 1)
+        self.manager_id = self._bind('zwlr_screencopy_manager_v1', 3)
+        self.manager_version = min(self.globals['zwlr_screencopy_manager_v1'][0][1], 3)
+        for name, version in self.globals.get('wl_output', []):
+            output = Output(None)
+            output.object_id = self._bind_name('wl_output', name, min(version, 4), output.on_event)
+            self.outputs.append(output)
+        if 'zxdg_output_manager_v1' in self.globals:
+            xdg_manager = self._bind('zxdg_output_manager_v1', 3)
+            for output in self.outputs:
+                xdg_id = conn.new_id(output.on_xdg_event)
+                conn.send(xdg_manager, 1, pack_uint(xdg_id) + pack_uint(output.object_id))
+        conn.roundtrip()
+
+    def _bind(self, interface, max_version, handler=None):
+        name, version = self.globals[interface][0]
+        return self._bind_name(interface, name, min(version, max_version), handler)
+
+    def _bind_name(self, interface, name, version, handler=None):
+        object_id = self.conn.new_id(handler)
+        payload = pack_uint(name) + pack_string(interface) + pack_uint(version) + pack_uint(object_id)
+        self.conn.send(self.registry_id, 0, payload)
+        return object_id
+
+    def layout_rect(self):
+        """Bounding box of every output in logical coordinates."""
+        rects = [o.rect for o in self.outputs]
+        if not rects:
+            raise ScreencopyError("No outputs")
+        x0 = min(r[0] for r in rects)
+        y0 = min(r[1] for r in rects)
+        x1 = max(r[0] + r[2] for r in rects)
+        y1 = max(r[1] + r[3] for r in rects)
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def capture(self, geometry=None, overlay_cursor=False, cancel=None):
+        """
+        Capture a logical-coordinate rectangle (x, y, w, h), or every output when None.
+        Areas spanning several outputs are stitched when the outputs share a scale.
+        Raises Cancelled if `cancel` fires; the connection must then be closed, as a
+        copy may still be pending on it.
+        """
+        with self._lock:
+            if geometry is None:
+                geometry = self.layout_rect()
+            parts = []
+            for output in self.outputs:
+                ox, oy, ow, oh = output.rect
+                x0, y0 = max(geometry[0], ox), max(geometry[1], oy)
+                x1 = min(geometry[0] + geometry[2], ox + ow)
+                y1 = min(geometry[1] + geometry[3], oy + oh)
+                if x1 > x0 and y1 > y0:
+                    local = (x0 - ox, y0 - oy, x1 - x0, y1 - y0)
+                    try:
+                        frame = self._capture_output(output, local, overlay_cursor, cancel)
+                    except OSError as e:  # the shm buffer could not be allocated or mapped
+                        raise ScreencopyError(f"Capture of {output.name or 'an output'} failed: {e}")
+                    parts.append(((x0, y0, x1 - x0, y1 - y0), frame))
+            if not parts:
+                raise ScreencopyError(f"Geometry {geometry} is not on any output")
+            if len(parts) == 1:
+                frame = parts[0][1]
+                frame.geometry = parts[0][0]
+                return frame
+            return self._stitch(geometry, parts)
+
+    def _capture_output(self, output, region, overlay_cursor, cancel=None):
+        conn = self.conn
+        state = {'buffer': None, 'flags': 0, 'status': None, 'buffer_done': False}
+
+        def on_frame(opcode, args):
+            if opcode == 0:  # buffer (shm)
+                info = (args.uint(), args.uint(), args.uint(), args.uint())
+                if state['buffer'] is None and info[0] in SHM_FORMATS:
+                    state['buffer'] = info
+            elif opcode == 1:  # flags
+                state['flags'] = args.uint()
+            elif opcode == 2:  # ready
+                state['status'] = 'ready'
+            elif opcode == 3:  # failed
+                state['status'] = 'failed'
+            elif opcode == 6:  # buffer_done (v3): all buffer types announced
+                state['buffer_done'] = True
+
+        frame_id = conn.new_id(on_frame)
+        x, y, w, h = region
+        conn.send(self.manager_id, 1, pack_uint(frame_id) + pack_int(int(overlay_cursor)) +
+                  pack_uint(output.object_id) + pack_int(x) + pack_int(y) + pack_int(w) + pack_int(h))
+        try:
+            # Before v3 the copy may start right after the first buffer event
+            while state['status'] is None and not (
+                    state['buffer'] is not None and (state['buffer_done'] or self.manager_version < 3)):
+                if state['buffer_done'] and state['buffer'] is None:
+                    raise ScreencopyError("Compositor offered no supported shm format")
+                conn.dispatch()
+                if cancel is not None:
+                    cancel.check()
+            if state['status'] == 'failed':
+                raise ScreencopyError("Compositor failed the capture")
+            fmt, width, height, stride = state['buffer']
+            size = stride * height
+            fd = os.memfd_create('hyprsnipper-screencopy', os.MFD_CLOEXEC)
+            try:
+                os.ftruncate(fd, size)
+                pool_id = conn.new_id()
+                conn.send(self.shm_id, 0, pack_uint(pool_id) + pack_int(size), fd=fd)
+                buffer_id = conn.new_id()
+                conn.send(pool_id, 0, pack_uint(buffer_id) + pack_int(0) + pack_int(width) +
+                          pack_int(height) + pack_int(stride) + pack_uint(fmt))
+                conn.send(frame_id, 0, pack_uint(buffer_id))  # copy
+                while state['status'] is None:
+                    conn.dispatch()
+                    if cancel is not None:
+                        cancel.check()
+                if state['status'] != 'ready':
+                    raise ScreencopyError("Compositor failed the capture")
+                with mmap.mmap(fd, size, mmap.MAP_SHARED, mmap.PROT_READ) as mapped:
+                    data = mapped[:]
+                conn.send(buffer_id, 0)  # wl_buffer.destroy
+                conn.send(pool_id, 1)  # wl_shm_pool.destroy
+            finally:
+                os.close(fd)
+        finally:
+            conn.send(frame_id, 1)  # destroy
+            conn.handlers.pop(frame_id, None)
+        frame = Frame(data, width, height, stride, SHM_FORMATS[fmt])
+        if state['flags'] & FRAME_FLAG_Y_INVERT:
+            frame = frame.flipped()
+        return frame
+
+    def _stitch(self, geometry, parts):
+        frames = [f for _, f in parts]
+        fmt = frames[0].format
+        scales = {round(f.width / r[2], 3) for r, f in parts}
+        if len(scales) != 1 or any(f.format != fmt for f in frames):
+            raise ScreencopyError("Cannot stitch outputs with different scales or formats")
+        scale = scales.pop()
+        bpp = frames[0].bytes_per_pixel
+        width, height = round(geometry[2] * scale), round(geometry[3] * scale)
+        stride = width * bpp
+        canvas = bytearray(stride * height)
+        for (x, y, _w, _h), frame in parts:
+            dx, dy = round((x - geometry[0]) * scale), round((y - geometry[1]) * scale)
+            row_bytes = min(frame.width, width - dx) * bpp
+            for row in range(min(frame.height, height - dy)):
+                src = row * frame.stride
+                dst = (dy + row) * stride + dx * bpp
+                canvas[dst:dst + row_bytes] = frame.data[src:src + row_bytes]
+        return Frame(bytes(canvas), width, height, stride, fmt, geometry)
@@ -0,0 +1,73 @@
+"""
+selection.py - Interactive area selection helpers shared by the GUI and CLI
+"""
+import shutil
+import subprocess
+
+from .hyprland import hyprctl_json, monitor_rect, visible_windows
+from .process import Cancelled, run_command
+
+
+def slurp_region(cancel=None, boxes=None):
+    """
+    Let the user drag a region with slurp. Returns the "x,y wxh" geometry string,
+    or None if the selection was aborted (Escape in slurp).
+    boxes: (x, y, w, h) rectangles to choose from instead of dragging (slurp -r).
+    """
+    args = ['slurp']
+    stdin = None
+    if boxes:
+        args.append('-r')
+        stdin = ''.join(f"{x},{y} {w}x{h}\n" for x, y, w, h in boxes)
+    try:
+        geom = run_command(args, cancel=cancel, input=stdin, text=True).strip()
+    except subprocess.CalledProcessError:
+        return None
+    return geom or None
+
+
+def focused_window_geometry(cancel=None):
+    """(x, y, w, h) of the focused window, or None if there is none."""
+    win = hyprctl_json('activewindow', cancel=cancel)
+    if not win or 'at' not in win:
+        return None
+    return (win['at'][0], win['at'][1], win['size'][0], win['size'][1])
+
+
+def focused_output_geometry(cancel=None):
+    """Logical (x, y, w, h) of the focused monitor."""
+    monitors = hyprctl_json('monitors', cancel=cancel)
+    for monitor in monitors:
+        if monitor.get('focused'):
+            return monitor_rect(monitor)
+    return monitor_rect(monitors[0]) if monitors else None
+
+
+def select_geometry(mode, cancel=None):
+    """
+    Geometry for a capture mode without any Qt UI:
+
+        region  dragged with slurp
+        window  picked with slurp from the visible windows (the focused one without slurp)
+        full    the focused output
+        all     None, i.e. every output
+
+    Raises Cancelled if the user aborts the selection.
+    """
+    if mode == 'all':
+        return None
+    if mode == 'full':
+        return focused_output_geometry(cancel)
+    if mode == 'window' and not shutil.which('slurp'):
+        geometry = focused_window_geometry(cancel)
+        if geometry is None:
+            raise Cancelled()
+        return geometry
+    boxes = None
+    if mode == 'window':
+        _monitors, windows = visible_windows(cancel)
+        boxes = [(w['at'][0], w['at'][1], w['size'][0], w['size'][1]) for w in windows]
+    geom = slurp_region(cancel, boxes)
+    if geom is None:
+        raise Cancelled()
+    return geom
@@ -0,0 +1,221 @@
+"""
+settings.py - Single cached, validated view of settings.yaml
+
+The file is parsed once per change, not once per use: callers read values with
+get_settings()['KEY'], which is a dict lookup. A long-running process calls
+watch() to have the file reloaded when it is edited; subscribers are told which
+keys changed.
+"""
+import json
+import os
+
+USER_CONFIG_DIR = os.path.expanduser('~/.config/hyprsnipper')
+DEFAULT_CONFIG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../config'))
+# The last parsed settings.yaml (see _parse_cached)
+CACHE_FILE = os.path.expanduser('~/.cache/hyprsnipper/settings.json')
+
+CAPTURE_BACKENDS = ('auto', 'screencopy', 'grim')
+REGION_SELECTORS = ('native', 'slurp')
+IMAGE_FORMATS = ('png', 'qoi', 'webp', 'avif', 'jpeg')
+DEDUP_MODES = ('off', 'exact', 'perceptual')
+RECORD_FORMATS = ('mp4', 'webm', 'gif', 'webp')
+NOTIFY_MODES = ('capture', 'each', 'off')
+
+# key: (type, default, allowed values or None); for ints the third field is the minimum, 0 when None
+SCHEMA = {
+    'SAVE_DIR': (str, os.getenv('SNIP_SAVE_DIR', '~/Pictures/Screenshots'), None),
+    'EDITOR': (str, os.getenv('SNIP_EDITOR', 'swappy'), None),
+    'COPY_TO_CLIPBOARD': (bool, True, None),
+    'SAVE_ENABLED': (bool, True, None),
+    'COPY_ENABLED': (bool, True, None),
+    'EDIT_ENABLED': (bool, False, None),
+    'PALETTE_FILE': (str, 'palette.ini', None),
+    'WINDOW_ANIMATION_DELAY': (int, 300, None),
+    'CAPTURE_BACKEND': (str, 'auto', CAPTURE_BACKENDS),
+    'SELECTOR_THUMBNAILS': (bool, False, None),
+    'REGION_SELECTOR': (str, 'slurp', REGION_SELECTORS),
+    'FREEZE_SCREEN': (bool, False, None),
+    # Per-sink image format and level (zlib level 0-9 for PNG, quality 0-100 otherwise)
+    'SAVE_FORMAT': (str, 'png', IMAGE_FORMATS),
+    'SAVE_LEVEL': (int, 4, None),
+    'COPY_FORMAT': (str, 'png', IMAGE_FORMATS),
+    'COPY_LEVEL': (int, 1, None),
+    'EDIT_FORMAT': (str, 'png', IMAGE_FORMATS),
+    'EDIT_LEVEL': (int, 1, None),
+    'HISTORY_ENABLED': (bool, True, None),
+    'DEDUP': (str, 'off', DEDUP_MODES),
+    'RECORD_FPS': (int, 30, 1),
+    'RECORD_FORMAT': (str, 'mp4', RECORD_FORMATS),
+    'TRACE': (bool, False, None),
+    'NOTIFICATIONS': (str, 'capture', NOTIFY_MODES),
+}
+
+
+def config_path(filename):
+    """Prefer ~/.config/hyprsnipper/<filename>, fall back to the bundled default."""
+    user_path = os.path.join(USER_CONFIG_DIR, filename)
+    return user_path if os.path.isfile(user_path) else os.path.join(DEFAULT_CONFIG_DIR, filename)
+
+
+def _parse(path):
+    """Parse settings.yaml into a dict; falls back to 'KEY: value' lines if PyYAML is missing."""
+    with open(path) as f:
+        text = f.read()
+    try:
+        import yaml
+    except ImportError:
+        raw = {}
+        for line in text.splitlines():
+            line = line.split('#', 1)[0].strip()
+            if ':' in line:
+                key, value = line.split(':', 1)
+                raw[key.strip()] = value.strip().strip('"\'')
+        return raw
+    return yaml.safe_load(text) or {}
+
+
+def _parse_cached(path, stamp):
+    """
+    _parse(), remembered in CACHE_FILE for the file's path and (mtime, size): PyYAML is
+    the slowest import before the toolbar appears, so it is only loaded after an edit.
+    """
+    key = [path, list(stamp)]
+    try:
+        with open(CACHE_FILE) as f:
+            cached = json.load(f)
+        if cached['key'] == key:
+            return cached['raw']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    raw = _parse(path)
+    try:
+        payload = json.dumps({'key': key, 'raw': raw})
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        tmp = f"{CACHE_FILE}.{os.getpid()}"
+        with open(tmp, 'w') as f:
+            f.write(payload)
+        os.replace(tmp, CACHE_FILE)
+    except (OSError, TypeError, ValueError):
+        pass  # read-only cache dir, or values JSON cannot hold (dates, ...): parse every time
+    return raw
+
+
+def _coerce(key, value):
+    kind, default, allowed = SCHEMA[key]
+    if kind is bool:
+        if isinstance(value, str):
+            lowered = value.strip().lower()
+            if lowered not in ('true', 'false', 'yes', 'no', 'on', 'off', '1', '0'):
+                raise ValueError(f"expected true/false, got {value!r}")
+            value = lowered in ('true', 'yes', 'on', '1')
+        else:
+            value = bool(value)
+    elif kind is int:
+        value = int(value)
+        minimum = allowed or 0
+        if value < minimum:
+            raise ValueError(f"must be at least {minimum}" if minimum else "must not be negative")
+        return value
+    elif isinstance(value, bool) and allowed is not None:
+        # YAML reads an unquoted off/on (or no/yes) as a bool
+        value = 'on' if value else 'off'
+    else:
+        value = str(value)
+    if allowed is not None and value not in allowed:
+        raise ValueError(f"expected one of {', '.join(allowed)}")
+    return value
+
+
+class Settings:
+    def __init__(self, path=None):
+        self.path = path or config_path('settings.yaml')
+        self.values = {key: spec[1] for key, spec in SCHEMA.items()}
+        self.extra = {}  # keys not in the schema, kept for forward compatibility
+        self._stamp = None
+        self._listeners = []
+        self._watcher = None
+        self.reload()
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def get(self, key, default=None):
+        if key in self.values:
+            return self.values[key]
+        return self.extra.get(key, default)
+
+    def reload(self):
+        """Re-read the file if it changed on disk. Returns the set of keys whose value changed."""
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self._stamp:
+            return set()
+        self._stamp = stamp
+        raw = {}
+        if stamp is not None:
+            try:
+                raw = _parse_cached(self.path, stamp)
+                if not isinstance(raw, dict):
+                    raise ValueError("top level must be a mapping")
+            except Exception as e:
+                print(f"[HyprSnipper] Warning: could not read {self.path}: {e}; using defaults")
+                raw = {}
+        values = {}
+        for key, spec in SCHEMA.items():
+            if key in raw and raw[key] is not None:
+                try:
+                    values[key] = _coerce(key, raw[key])
+                    continue
+                except (TypeError, ValueError) as e:
+                    print(f"[HyprSnipper] Warning: invalid {key} in {self.path}: {e}; using {spec[1]!r}")
+            values[key] = spec[1]
+        changed = {key for key, value in values.items() if self.values.get(key) != value}
+        self.values = values
+        self.extra = {k: v for k, v in raw.items() if k not in SCHEMA}
+        if changed:
+            for callback in list(self._listeners):
+                callback(changed)
+        return changed
+
+    def subscribe(self, callback):
+        """callback(changed_keys) runs after a reload that changed any value."""
+        self._listeners.append(callback)
+
+    def watch(self):
+        """Reload automatically when the file changes. Needs a running Qt application."""
+        if self._watcher is not None:
+            return
+        from PySide6.QtCore import QFileSystemWatcher
+        self._watcher = QFileSystemWatcher()
+        # Watch the directory too: editors often replace the file instead of writing it in place
+        paths = [p for p in (self.path, os.path.dirname(self.path)) if os.path.exists(p)]
+        if paths:
+            self._watcher.addPaths(paths)
+        self._watcher.fileChanged.connect(self._on_changed)
+        self._watcher.directoryChanged.connect(self._on_changed)
+
+    def _on_changed(self, _path):
+        if os.path.exists(self.path) and self.path not in self._watcher.files():
+            self._watcher.addPath(self.path)
+        self.reload()
+
+    def palette_path(self):
+        """Resolve PALETTE_FILE: absolute or ~ paths as-is, otherwise relative to the config dirs."""
+        palette_file = os.path.expanduser(self['PALETTE_FILE'])
+        if os.path.isabs(palette_file):
+            return palette_file
+        return config_path(palette_file)
+
+
+_settings = None
+
+
+def get_settings():
+    """The process-wide Settings instance, loaded on first use."""
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
@@ -0,0 +1,88 @@
+"""
+startup.py - `hyprsnipper --profile-startup`: where the time to the first painted toolbar goes
+
+Phases are marked by main.py (imports, QApplication, window construction, first
+paint). Module imports are timed by wrapping every loader's exec_module,
+with self and inclusive times as `python -X importtime` reports them.
+"""
+import sys
+import time
+
+# First paint of the toolbar on the reference machine (4-core laptop, warm caches), in ms.
+FIRST_PAINT_BUDGET_MS = 250
+
+
+class _TimingFinder:
+    """Meta path finder that wraps the real loaders to time module execution."""
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            loader = spec.loader
+            # Builtin and frozen importers are classes shared by every module: leave them alone
+            if loader is not None and not isinstance(loader, type) and hasattr(loader, 'exec_module'):
+                loader.exec_module = self._timed(loader.exec_module)
+            return spec
+        return None
+
+    def _timed(self, exec_module):
+        profile = self.profile
+
+        def timed(module):
+            profile.stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = profile.stack.pop()
+                if profile.stack:
+                    profile.stack[-1] += elapsed
+                profile.imports.append((module.__name__, elapsed, elapsed - nested))
+        return timed
+
+
+class StartupProfile:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+        self.imports = []  # (module, inclusive seconds, self seconds)
+        self.stack = []
+        self._finder = _TimingFinder(self)
+        sys.meta_path.insert(0, self._finder)
+
+    def mark(self, name):
+        """End the current phase under `name`."""
+        self.phases.append((name, time.perf_counter()))
+
+    def stop(self):
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+    def report(self, top=12, out=sys.stderr):
+        """Print the phase and import breakdown; returns True if first paint was within budget."""
+        self.stop()
+        print("[HyprSnipper] Startup profile", file=out)
+        previous = self.start
+        for name, at in self.phases:
+            ms = (at - previous) * 1000
+            print(f"  {name:<28} {ms:8.1f} ms   (at {(at - self.start) * 1000:7.1f} ms)", file=out)
+            previous = at
+        slowest = sorted(self.imports, key=lambda item: item[2], reverse=True)[:top]
+        if slowest:
+            print(f"  slowest imports by own time ({len(self.imports)} modules loaded):", file=out)
+            for name, inclusive, own in slowest:
+                print(f"    {name:<40} {own * 1000:8.1f} ms   (with its imports {inclusive * 1000:.1f} ms)",
+                      file=out)
+        total = (previous - self.start) * 1000
+        within = total <= FIRST_PAINT_BUDGET_MS
+        verdict = 'ok' if within else 'OVER BUDGET'
+        print(f"  first paint {total:.1f} ms, budget {FIRST_PAINT_BUDGET_MS} ms: {verdict}", file=out)
+        return within
@@ -0,0 +1,98 @@
+"""
+thumbnails.py - Window thumbnails cut from one downscaled capture per output
+
+Each output is captured once, downscaled to roughly the size it is drawn at in the
+window selector, and every window on it is cropped out of that small frame. No
+per-window capture is ever taken.
+"""
+import threading
+
+from .backends import capture_frame
+
+
+class ThumbnailCache:
+    """
+    address -> thumbnail, valid while the window keeps its geometry and title.
+    Any change to either drops the entry on the next lookup.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(win):
+        return (tuple(win['at']), tuple(win['size']), win.get('title', ''))
+
+    def get(self, win):
+        address = win.get('address')
+        with self._lock:
+            entry = self._entries.get(address)
+            if entry is None:
+                return None
+            if entry[0] != self.key(win):
+                del self._entries[address]
+                return None
+            return entry[1]
+
+    def put(self, win, thumbnail):
+        with self._lock:
+            self._entries.pop(win.get('address'), None)
+            self._entries[win.get('address')] = (self.key(win), thumbnail)
+            # Dicts keep insertion order, so the oldest entries go first
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+    def retain(self, addresses):
+        """Forget windows that no longer exist."""
+        with self._lock:
+            for address in set(self._entries) - set(addresses):
+                del self._entries[address]
+
+
+def window_monitor(win, monitors):
+    """The monitor holding the window's center, or None."""
+    cx = win['at'][0] + win['size'][0] / 2
+    cy = win['at'][1] + win['size'][1] / 2
+    for monitor in monitors:
+        mx, my, mw, mh = monitor['rect']
+        if mx <= cx < mx + mw and my <= cy < my + mh:
+            return monitor
+    return None
+
+
+def grab_outputs(monitors, backend='auto', cancel=None):
+    """One full-resolution capture per output, as [(monitor, Frame)]. Outputs that fail are skipped."""
+    frames = []
+    for monitor in monitors:
+        try:
+            frames.append((monitor, capture_frame(monitor['rect'], backend, cancel=cancel)))
+        except Exception as e:
+            if cancel is not None:
+                cancel.check()
+            print(f"[HyprSnipper] Warning: thumbnail capture of {monitor.get('name')} failed: {e}")
+    return frames
+
+
+def output_thumbnails(monitor, frame, windows, max_width, cancel=None):
+    """
+    Downscale one output's capture to about `max_width` pixels wide and crop every
+    window on that output out of it. Returns {address: Frame}.
+    """
+    factor = max(1, -(-frame.width // max(1, max_width)))
+    small = frame.downscaled(factor)
+    mx, my, mw, mh = monitor['rect']
+    sx, sy = small.width / mw, small.height / mh
+    thumbnails = {}
+    for win in windows:
+        if cancel is not None:
+            cancel.check()
+        x, y = win['at']
+        w, h = win['size']
+        try:
+            thumbnails[win.get('address')] = small.crop(round((x - mx) * sx), round((y - my) * sy),
+                                                        max(1, round(w * sx)), max(1, round(h * sy)))
+        except ValueError:
+            pass  # entirely off this output
+    return thumbnails
@@ -0,0 +1,176 @@
+"""
+trace.py - Opt-in per-capture phase timing and the `hyprsnipper stats` command
+
+With TRACE: true every capture records monotonic timestamps for its phases (trigger,
+UI hidden, selection done, frame captured, each encode and each sink done) and appends
+one JSON line to ~/.local/share/hyprsnipper/trace.jsonl when its last sink finishes:
+
+    {"time": 1760000000.0, "mode": "window", "source": "daemon", "outcome": "ok",
+     "phases": [["ui hidden", 300.4, 300.4], ["windows listed", 302.1, 1.7], ...]}
+
+Each phase is [name, ms since the trigger, ms it took]. A phase took the time since the
+previous one, except encodes and sinks, which run concurrently and are timed from their
+own start. `hyprsnipper stats` reports p50/p95/p99 per phase and mode.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from .history import DATA_DIR
+from .ipc import MODE_COMMANDS
+
+TRACE_FILE = os.path.join(DATA_DIR, 'trace.jsonl')
+
+_write_lock = threading.Lock()
+
+
+class CaptureTrace:
+    """Phase timestamps of one capture. mark() may be called from any thread."""
+
+    def __init__(self, mode, source='gui'):
+        self.mode = mode
+        self.source = source
+        self.start = time.monotonic()
+        self.phases = []  # [name, ms since start, ms taken]
+        self._last = self.start
+        self._lock = threading.Lock()
+        self._finished = False
+
+    def mark(self, phase, started=None):
+        """
+        End `phase` now. started: time.monotonic() it began, for phases that run concurrently
+        (encodes, sinks); otherwise it began when the previous phase ended.
+        """
+        now = time.monotonic()
+        with self._lock:
+            begin = self._last if started is None else started
+            if started is None:
+                self._last = now
+            self.phases.append([phase, round((now - self.start) * 1000, 2), round((now - begin) * 1000, 2)])
+
+    def finish(self, outcome='ok'):
+        """Append the trace to TRACE_FILE (once). outcome: 'ok', 'cancelled' or 'failed'."""
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+            record = {'time': round(time.time(), 3), 'mode': self.mode, 'source': self.source,
+                      'outcome': outcome, 'phases': self.phases}
+        try:
+            os.makedirs(os.path.dirname(TRACE_FILE), exist_ok=True)
+            with _write_lock, open(TRACE_FILE, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError as e:
+            print(f"[HyprSnipper] Warning: could not write trace: {e}")
+
+
+class _NoTrace:
+    """Stands in for CaptureTrace when TRACE is off."""
+
+    def mark(self, phase, started=None):
+        pass
+
+    def finish(self, outcome='ok'):
+        pass
+
+
+NO_TRACE = _NoTrace()
+
+
+def start_trace(mode, source='gui', settings=None):
+    """A CaptureTrace started now if TRACE is on, otherwise NO_TRACE."""
+    if settings is None:
+        from .settings import get_settings
+        settings = get_settings()
+    return CaptureTrace(mode, source) if settings['TRACE'] else NO_TRACE
+
+
+def read_traces(path=TRACE_FILE):
+    """Every trace record in the file; unreadable lines are skipped."""
+    records = []
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def phase_stats(records):
+    """
+    {mode: (captures, [(phase, [ms taken, ...]), ...])} with phases in the order they
+    usually end and a 'total' phase (trigger to last phase) at the end.
+    """
+    stats = {}
+    for record in records:
+        mode = record.get('mode') or '?'
+        entry = stats.setdefault(mode, {'count': 0, 'taken': {}, 'at': {}, 'total': []})
+        entry['count'] += 1
+        phases = record.get('phases') or []
+        for name, at, taken in phases:
+            entry['taken'].setdefault(name, []).append(taken)
+            entry['at'].setdefault(name, []).append(at)
+        if phases:
+            entry['total'].append(max(at for _name, at, _taken in phases))
+    result = {}
+    for mode, entry in stats.items():
+        order = sorted(entry['taken'], key=lambda name: percentile(sorted(entry['at'][name]), 50))
+        phases = [(name, entry['taken'][name]) for name in order]
+        if entry['total']:
+            phases.append(('total', entry['total']))
+        result[mode] = (entry['count'], phases)
+    return result
+
+
+def main(argv=None):
+    """`hyprsnipper stats` command line."""
+    parser = argparse.ArgumentParser(prog='hyprsnipper stats',
+                                     description='Capture phase timings recorded with TRACE: true')
+    # The modes traces are recorded under: the daemon's mode commands, the toolbar's and `capture --mode`'s
+    parser.add_argument('--mode', choices=MODE_COMMANDS, help='only this mode')
+    parser.add_argument('--last', type=int, metavar='N', help='only the newest N captures')
+    parser.add_argument('--all', action='store_true', help='include cancelled and failed captures')
+    parser.add_argument('--file', default=TRACE_FILE, help=f'trace file (default: {TRACE_FILE})')
+    args = parser.parse_args(argv)
+
+    records = read_traces(args.file)
+    if not args.all:
+        records = [r for r in records if r.get('outcome') == 'ok']
+    if args.mode:
+        recorded = sorted({r.get('mode') or '?' for r in records})
+        records = [r for r in records if r.get('mode') == args.mode]
+        if not records and recorded:
+            print(f"[HyprSnipper] No traced {args.mode} captures; recorded modes: {', '.join(recorded)}",
+                  file=sys.stderr)
+            return 1
+    if args.last:
+        records = records[-args.last:]
+    if not records:
+        print(f"[HyprSnipper] No traced captures in {args.file} (set TRACE: true in settings.yaml)",
+              file=sys.stderr)
+        return 1
+    for mode, (count, phases) in sorted(phase_stats(records).items()):
+        print(f"{mode} ({count} capture{'s' if count != 1 else ''})")
+        print(f"  {'phase':<24} {'n':>5} {'p50':>9} {'p95':>9} {'p99':>9}   ms")
+        for name, values in phases:
+            values = sorted(values)
+            columns = ' '.join(f"{percentile(values, p):9.1f}" for p in (50, 95, 99))
+            print(f"  {name:<24} {len(values):>5} {columns}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,31 +1,167 @@
 #!/usr/bin/env python3
 """
 main.py - Entry point for HyprSnipper Qt UI
+
+    hyprsnipper                     show the toolbar (one-shot)
+    hyprsnipper --profile-startup   time imports and startup phases up to the first paint
+    hyprsnipper --daemon            keep a hidden toolbar resident, wait for triggers
+    hyprsnipper --trigger [MODE]    ask the daemon to show the toolbar or capture MODE
+    hyprsnipper capture [--mode M]  take a screenshot without the toolbar (no Qt)
+    hyprsnipper history [SEARCH]    list and search past captures
+    hyprsnipper record [--mode M]   record a short clip (hyprsnipper record --stop ends it)
+    hyprsnipper stats [--mode M]    p50/p95/p99 time per capture phase (TRACE: true)
+    hyprsnipper --interval 500ms --count 120 --mode window
+                                    burst: capture the same area repeatedly
 """
+import argparse
 import sys
 
-from PySide6.QtWidgets import QApplication
-from ui.snipper_window import SnipperWindow
-from ui.palette import Palette
+from core.ipc import MODE_COMMANDS, send_command
 
-def main():
-    app = QApplication(sys.argv)
-    palette = Palette()
-    # Set custom tooltip style globally
-    tooltip_style = f"""
-        QToolTip {{
-            background-color: {palette['tooltip_bg']};
-            color: {palette['tooltip_fg']};
-            border: 1px solid {palette['primary']};
-            padding: 6px 10px;
-            border-radius: 6px;
-            font-size: 13px;
-        }}
-    """
-    app.setStyleSheet(tooltip_style)
+# Subcommands that run without Qt, each a module with main(argv) (see run_subcommand).
+# 'serve-clipboard' is internal: the process serving a one-shot launch's capture on the clipboard
+SUBCOMMANDS = ('history', 'record', 'capture', 'stats', 'serve-clipboard')
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='hyprsnipper', description='A friendly snipping tool for Hyprland')
+    parser.add_argument('--daemon', action='store_true',
+                        help='run resident in the background and wait for --trigger commands')
+    parser.add_argument('--trigger', nargs='?', const='show', metavar='MODE',
+                        choices=('show',) + MODE_COMMANDS + ('cancel', 'quit'),
+                        help='send a command to the running daemon: show, region, window, full, all, cancel or quit')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='show the toolbar, print where the time to its first paint went and exit')
+    burst = parser.add_argument_group('burst', 'capture the same area repeatedly, without the toolbar')
+    burst.add_argument('--interval', metavar='TIME', help='time between shots, e.g. 500ms, 2s (default: back to back)')
+    burst.add_argument('--count', type=int, metavar='N', help='number of shots')
+    burst.add_argument('--duration', metavar='TIME',
+                       help='stop after this long, e.g. 30s, 5m (a bare number is seconds)')
+    burst.add_argument('--mode', choices=MODE_COMMANDS, default='full', help='area to capture (default: full)')
+    return parser.parse_known_args(argv)
+
+
+def run_subcommand(name, argv):
+    # Plain import statements rather than a name -> module table, so PyInstaller's
+    # analysis sees (and bundles) every subcommand's module
+    if name == 'history':
+        from core import history as module
+    elif name == 'record':
+        from core import record as module
+    elif name == 'capture':
+        from core import capture as module
+    elif name == 'stats':
+        from core import trace as module
+    else:
+        from core import clipboard as module
+    return module.main(argv)
+
+
+def trigger(command):
+    """Thin client: forward the command to the daemon. Returns an exit code, or None if no daemon."""
+    try:
+        reply = send_command(command)
+    except OSError:
+        return None
+    if reply not in ('ok', 'idle'):
+        print(f"[HyprSnipper] Daemon replied: {reply}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def run_gui(qt_argv, daemon=False, mode=None, profile=None):
+    # Qt is only imported here so the --trigger client never pays for it
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication
+    if profile:
+        profile.mark('import Qt')
+    from ui.snipper_window import SnipperWindow
+    from ui.theme import get_theme
+    from core.settings import get_settings
+    if profile:
+        profile.mark('import toolbar')
+
+    app = QApplication(qt_argv)
+    # Parsed once here; edits to settings.yaml are picked up without a restart
+    get_settings().watch()
+    # One stylesheet and QPalette for every widget; edits to the palette file re-theme it live
+    theme = get_theme()
+    theme.apply(app)
+    theme.watch()
+    if profile:
+        profile.mark('QApplication and settings')
     window = SnipperWindow()
-    window.show()
-    sys.exit(app.exec())
+    if profile:
+        profile.mark('build toolbar')
+        window.startup_profile = profile
+        _report_first_paint(window, profile)
+    if daemon:
+        from ui.daemon import SnipperDaemon
+        # Hiding the toolbar must not end the resident process
+        app.setQuitOnLastWindowClosed(False)
+        window.resident = True
+        snipper_daemon = SnipperDaemon(window)
+        if not snipper_daemon.start():
+            return 1
+        app.aboutToQuit.connect(snipper_daemon.stop)
+    elif mode in MODE_COMMANDS:
+        # Nothing else to do once the direct capture has finished
+        window.exit_after_capture = True
+        QTimer.singleShot(0, lambda: window.trigger(mode))
+    else:
+        window.present()
+    return app.exec()
+
+
+def _report_first_paint(window, profile):
+    """Print the startup profile once the toolbar has been painted, then quit."""
+    from PySide6.QtCore import QEvent, QObject, QTimer
+    from PySide6.QtWidgets import QApplication
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                obj.removeEventFilter(self)
+                # Queued behind the paint that is about to happen
+                QTimer.singleShot(0, done)
+            return False
+
+    def done():
+        profile.mark('first paint')
+        code = 0 if profile.report() else 1
+        QApplication.instance().exit(code)
+
+    window._first_paint_filter = FirstPaint(window)
+    window.installEventFilter(window._first_paint_filter)
+
+
+def main():
+    if getattr(sys, 'frozen', False):
+        # A PyInstaller bundle is also the executable of the burst encoder processes ('spawn').
+        # Unfrozen, freeze_support() is a no-op, so the toolbar does not pay for the import
+        import multiprocessing
+        multiprocessing.freeze_support()
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        sys.exit(run_subcommand(sys.argv[1], sys.argv[2:]))
+    profile = None
+    if '--profile-startup' in sys.argv:
+        from core.startup import StartupProfile
+        profile = StartupProfile()
+    args, qt_args = parse_args(sys.argv[1:])
+    qt_argv = sys.argv[:1] + qt_args
+    if args.interval or args.count is not None or args.duration:
+        from core.burst import run_cli
+        sys.exit(run_cli(args))
+    if args.trigger:
+        code = trigger(args.trigger)
+        if code is not None:
+            sys.exit(code)
+        if args.trigger in ('cancel', 'quit'):
+            sys.exit(0)
+        # No daemon running: fall back to a regular cold start
+        print("[HyprSnipper] No daemon running, starting normally", file=sys.stderr)
+        sys.exit(run_gui(qt_argv, mode=args.trigger))
+    sys.exit(run_gui(qt_argv, daemon=args.daemon, profile=profile))
 
 if __name__ == "__main__":
     main()
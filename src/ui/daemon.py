@@ -0,0 +1,83 @@
+"""
+daemon.py - Keeps a pre-built SnipperWindow resident and serves IPC triggers
+"""
+import os
+
+from PySide6.QtCore import QObject
+from PySide6.QtNetwork import QLocalServer
+from PySide6.QtWidgets import QApplication
+
+from core.hyprland import HyprlandError, hyprland_state
+from core.ipc import COMMANDS, MODE_COMMANDS, socket_path, daemon_running
+
+
+class SnipperDaemon(QObject):
+    """
+    Listens on the HyprSnipper Unix socket and forwards commands to a hidden SnipperWindow.
+    The Qt application, palette and rendered icons are built once, so a trigger only pays
+    for showing the toolbar or starting a capture.
+    """
+
+    def __init__(self, window):
+        super().__init__()
+        self.window = window
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self._on_new_connection)
+
+    def start(self):
+        path = socket_path()
+        if daemon_running():
+            print(f"[HyprSnipper] A daemon is already listening on {path}")
+            return False
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        # Remove a stale socket left behind by a crashed daemon
+        QLocalServer.removeServer(path)
+        if not self.server.listen(path):
+            print(f"[HyprSnipper] Could not listen on {path}: {self.server.errorString()}")
+            return False
+        print(f"[HyprSnipper] Daemon listening on {path}")
+        # Selector overlays are built once, hidden; a trigger only fills and shows them
+        self.window.warm_overlays()
+        # Follow Hyprland's event socket so Window mode opens from cached state
+        try:
+            hyprland_state()
+        except (HyprlandError, OSError, ValueError) as e:  # no Hyprland, or hyprctl failed
+            print(f"[HyprSnipper] Hyprland state unavailable: {e}")
+        return True
+
+    def stop(self):
+        self.server.close()
+        QLocalServer.removeServer(socket_path())
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            conn = self.server.nextPendingConnection()
+            conn.readyRead.connect(lambda c=conn: self._on_ready_read(c))
+            conn.disconnected.connect(conn.deleteLater)
+
+    def _on_ready_read(self, conn):
+        if not conn.canReadLine():
+            return
+        command = bytes(conn.readLine()).decode('utf-8', 'replace').strip()
+        reply = self.handle(command)
+        conn.write((reply + '\n').encode('utf-8'))
+        conn.flush()
+        conn.disconnectFromServer()
+
+    def handle(self, command):
+        """Run a single IPC command and return the reply line."""
+        if command not in COMMANDS:
+            return f"error: unknown command '{command}'"
+        if command == 'ping':
+            return 'pong'
+        if command == 'quit':
+            self.stop()
+            QApplication.instance().quit()
+            return 'ok'
+        if command == 'show':
+            self.window.present()
+        elif command == 'cancel':
+            return 'ok' if self.window.cancel_pending() else 'idle'
+        elif command in MODE_COMMANDS:
+            self.window.trigger(command)
+        return 'ok'
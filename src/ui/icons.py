@@ -0,0 +1,129 @@
+"""
+icons.py - Toolbar icon lookup and recolored icon rendering with a two-level cache
+
+Rendered icons are cached in memory (LRU) and on disk under ~/.cache/hyprsnipper/icons,
+keyed by source path, source mtime, color and device pixel size. With an unchanged theme
+a second launch loads small PNGs and never parses an SVG. A new icon color (a palette
+change while running) is tinted from an image of the icon already loaded in another
+color, which is also the only shape a monochrome icon has.
+"""
+import functools
+import hashlib
+import os
+import re
+
+from PySide6.QtCore import Qt, QSize
+from PySide6.QtGui import QColor, QIcon, QPixmap, QPainter, QImage
+
+ICON_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../resources/icons'))
+USER_ICON_PATH = os.path.expanduser('~/.config/hyprsnipper/icons')
+ICON_CACHE_DIR = os.path.expanduser('~/.cache/hyprsnipper/icons')
+
+# Bump when the recoloring or rendering changes so stale cache files are ignored
+CACHE_VERSION = 1
+
+# Replace fill/stroke colors (attributes and CSS style properties), preserving 'none'/'transparent'
+_COLOR_PATTERNS = (
+    (re.compile(r'fill="(?!none|transparent)[^"]*"'), 'fill="{color}"'),
+    (re.compile(r'stroke="(?!none|transparent)[^"]*"'), 'stroke="{color}"'),
+    (re.compile(r'fill:(?!none|transparent)\s*(#[0-9a-fA-F]{3,8}|[a-zA-Z]+)'), 'fill:{color}'),
+    (re.compile(r'stroke:(?!none|transparent)\s*(#[0-9a-fA-F]{3,8}|[a-zA-Z]+)'), 'stroke:{color}'),
+)
+
+
+def get_icon_path(icon_base):
+    """
+    icon_base: e.g. 'region' (no extension)
+    Returns the best icon path, preferring user .svg/.png, then default .svg/.png.
+    """
+    for ext in ('.svg', '.png'):
+        user_icon = os.path.join(USER_ICON_PATH, icon_base + ext)
+        if os.path.isfile(user_icon):
+            return user_icon
+    for ext in ('.svg', '.png'):
+        default_icon = os.path.join(ICON_PATH, icon_base + ext)
+        if os.path.isfile(default_icon):
+            return default_icon
+    return ''  # fallback: empty
+
+
+def colorize_svg(svg_content, color):
+    """Recolor every fill and stroke of a monochrome SVG."""
+    for pattern, replacement in _COLOR_PATTERNS:
+        svg_content = pattern.sub(replacement.format(color=color), svg_content)
+    return svg_content
+
+
+def _cache_file(icon_path, mtime_ns, color, side):
+    key = f"{CACHE_VERSION}|{icon_path}|{mtime_ns}|{color}|{side}"
+    return os.path.join(ICON_CACHE_DIR, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.png')
+
+
+def _render_svg(icon_path, color, side):
+    # QtSvg is only needed on a cache miss, so it is not imported at module load
+    from PySide6.QtCore import QByteArray
+    from PySide6.QtSvg import QSvgRenderer
+
+    with open(icon_path, 'r', encoding='utf-8') as f:
+        svg_content = colorize_svg(f.read(), color)
+    renderer = QSvgRenderer(QByteArray(svg_content.encode('utf-8')))
+    image = QImage(side, side, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.transparent)
+    painter = QPainter(image)
+    renderer.render(painter)
+    painter.end()
+    return image
+
+
+def _tint(image, color):
+    """A copy of the image with every pixel set to color, keeping the alpha (antialiasing)."""
+    tinted = image.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+    painter = QPainter(tinted)
+    painter.setCompositionMode(QPainter.CompositionMode_SourceIn)
+    painter.fillRect(tinted.rect(), QColor(color))
+    painter.end()
+    return tinted
+
+
+# (icon_path, mtime_ns, side) -> the last image loaded or rendered for it, in any color
+_shapes = {}
+
+
+@functools.lru_cache(maxsize=64)
+def _colored_pixmap(icon_path, mtime_ns, color, side):
+    cache_file = _cache_file(icon_path, mtime_ns, color, side)
+    image = QImage(cache_file) if os.path.exists(cache_file) else QImage()
+    if image.isNull():
+        shape = _shapes.get((icon_path, mtime_ns, side))
+        image = _tint(shape, color) if shape is not None else _render_svg(icon_path, color, side)
+        try:
+            os.makedirs(ICON_CACHE_DIR, exist_ok=True)
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            if image.save(tmp_file, 'PNG'):
+                os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"[HyprSnipper] Warning: could not cache icon {icon_path}: {e}")
+    _shapes[(icon_path, mtime_ns, side)] = image
+    return QPixmap.fromImage(image)
+
+
+def create_colored_icon(icon_path, color, size=QSize(64, 64), dpr=1.0):
+    """
+    Creates a QIcon with the specified color for monochromatic SVG icons, rendered
+    at `size` logical pixels for a screen with device pixel ratio `dpr`.
+    For PNG icons, returns the original icon.
+    """
+    if not icon_path or not os.path.exists(icon_path):
+        return QIcon()
+    if not icon_path.endswith('.svg'):
+        # For PNG icons, return as-is
+        return QIcon(icon_path)
+    try:
+        # Icons are square; QIcon keeps the aspect ratio inside a non-square icon size
+        side = max(1, round(min(size.width(), size.height()) * dpr))
+        pixmap = QPixmap(_colored_pixmap(icon_path, os.stat(icon_path).st_mtime_ns, color, side))
+        pixmap.setDevicePixelRatio(dpr)
+        return QIcon(pixmap)
+    except Exception as e:
+        print(f"[HyprSnipper] Warning: Could not colorize icon {icon_path}: {e}")
+        return QIcon(icon_path)  # Fallback to original
@@ -0,0 +1,256 @@
+"""
+notify.py - Desktop notifications over Qt's D-Bus connection
+
+Notifications go straight to org.freedesktop.Notifications on the session bus (QtDBus)
+instead of forking notify-send for every message. The connection is opened on first use
+and kept for the life of the process, which is also what makes actions work: the server
+reports a clicked button as a signal on that connection.
+
+With NOTIFICATIONS: capture (the default) a capture produces one notification: every
+sink's report merged into its body, a thumbnail, and Open, Edit and Delete buttons for
+the saved file. Without a session bus, notify-send is used as before.
+"""
+import ctypes
+import os
+import sqlite3
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import shiboken6
+from PySide6.QtCore import SLOT, QByteArray, QCoreApplication, QMetaType, QObject, Slot
+from PySide6.QtDBus import QDBusArgument, QDBusConnection, QDBusMessage
+
+from core import dedup
+from core.encoders import to_rgb
+from core.history import get_history
+from core.pipeline import ExistingPath, open_in_editor, when_done
+
+APP_NAME = 'HyprSnipper'
+NOTIFICATIONS = 'org.freedesktop.Notifications'
+NOTIFICATIONS_PATH = '/org/freedesktop/Notifications'
+
+THUMBNAIL_SIZE = 128
+
+# One sender thread keeps messages in order and the GUI thread from waiting on the bus.
+# Notifier.notify() and action callbacks run on it
+_sender = ThreadPoolExecutor(max_workers=1, thread_name_prefix='hyprsnipper-notify')
+
+
+class NotificationError(Exception):
+    """No session bus or no notification server, or the server rejected the call."""
+
+
+# Qt's QDBusArgument::operator<<(uint), looked up on first use (see _uint())
+_append_uint = None
+
+
+def _uint(value):
+    """
+    A D-Bus uint32 argument. PySide6 binds QDBusArgument's << for a single integer type
+    (ushort), so Qt's operator<<(uint) is called directly through the library PySide6 loaded.
+    """
+    global _append_uint
+    if _append_uint is None:
+        _append_uint = ctypes.CDLL('libQt6DBus.so.6')._ZN13QDBusArgumentlsEj
+        _append_uint.argtypes = (ctypes.c_void_p, ctypes.c_uint)
+        _append_uint.restype = ctypes.c_void_p
+    argument = QDBusArgument()
+    _append_uint(shiboken6.getCppPointer(argument)[0], value)
+    return argument
+
+
+def _strings(values):
+    """A D-Bus string array (as), also when empty; a plain empty list would go out as av."""
+    argument = QDBusArgument()
+    argument.beginArray(QMetaType(QMetaType.Type.QString))
+    for value in values:
+        argument.appendVariant(value)
+    argument.endArray()
+    return argument
+
+
+def _image_data(width, height, rgb):
+    """The image-data hint: (iiibiiay) width, height, stride, alpha, bits per sample, channels, pixels."""
+    argument = QDBusArgument()
+    argument.beginStructure()
+    for value in (width, height, width * 3, False, 8, 3):
+        argument.appendVariant(value)
+    argument.appendVariant(QByteArray(rgb))
+    argument.endStructure()
+    return argument
+
+
+class Notifier(QObject):
+    """Sends notifications on the session bus and routes action clicks to callbacks."""
+
+    def __init__(self):
+        super().__init__()
+        self._bus = None
+        self._callbacks = {}  # notification id -> on_action(notification_id, key)
+        app = QCoreApplication.instance()
+        if app is not None and self.thread() != app.thread():
+            # The server's signals are delivered by the GUI thread's event loop
+            self.moveToThread(app.thread())
+
+    def _session_bus(self):
+        if self._bus is None:
+            bus = QDBusConnection.sessionBus()
+            if not bus.isConnected():
+                raise NotificationError(bus.lastError().message() or "no session bus")
+            for signal in ('ActionInvoked', 'NotificationClosed'):
+                bus.connect('', NOTIFICATIONS_PATH, NOTIFICATIONS, signal, self, SLOT('_on_signal(QDBusMessage)'))
+            self._bus = bus
+        return self._bus
+
+    def notify(self, summary, body='', actions=(), icon='', image=None, replaces_id=0, timeout=-1,
+               on_action=None):
+        """
+        Show a notification and return its id. Call it on the sender thread (see send_message()).
+        Raises NotificationError without a notification server.
+        actions: (key, label) pairs; 'default' is the notification itself being clicked.
+        image: (width, height, RGB bytes) shown as the notification's picture.
+        on_action: callable(notification_id, key), called on the sender thread when an action is clicked.
+        """
+        hints = {}
+        if image is not None:
+            hints['image-data'] = _image_data(*image)
+        flat_actions = [text for action in actions for text in action]
+        # Notify(s app_name, u replaces_id, s icon, s summary, s body, as actions, a{sv} hints, i timeout)
+        call = QDBusMessage.createMethodCall(NOTIFICATIONS, NOTIFICATIONS_PATH, NOTIFICATIONS, 'Notify')
+        call.setArguments([APP_NAME, _uint(replaces_id), icon, summary, body, _strings(flat_actions), hints,
+                           timeout])
+        reply = self._session_bus().call(call)
+        if reply.type() != QDBusMessage.MessageType.ReplyMessage:
+            raise NotificationError(reply.errorMessage() or "no notification server")
+        notification_id = reply.arguments()[0]
+        if on_action is not None:
+            self._callbacks[notification_id] = on_action
+        return notification_id
+
+    @Slot(QDBusMessage)
+    def _on_signal(self, message):
+        arguments = message.arguments()
+        if message.member() == 'ActionInvoked':
+            notification_id, key = arguments
+            callback = self._callbacks.get(notification_id)
+            if callback is not None:
+                # Not on the GUI thread: the callback starts processes and may notify again
+                _sender.submit(callback, notification_id, key)
+        elif message.member() == 'NotificationClosed':
+            self._callbacks.pop(arguments[0], None)
+
+
+_notifier = None
+
+
+def get_notifier():
+    """The process-wide Notifier; only used on the sender thread."""
+    global _notifier
+    if _notifier is None:
+        _notifier = Notifier()
+    return _notifier
+
+
+def notify_send(summary, body='', icon=None):
+    """Fallback without a session bus: fork notify-send."""
+    try:
+        subprocess.Popen(['notify-send', '-a', APP_NAME] + (['-i', icon] if icon else []) + [summary, body])
+    except OSError:
+        pass
+
+
+def _send_message(message):
+    try:
+        get_notifier().notify(APP_NAME, message)
+    except NotificationError:
+        notify_send(APP_NAME, message)
+
+
+def send_message(message):
+    """Show a plain message in the background; returns the future of the send."""
+    return _sender.submit(_send_message, message)
+
+
+def thumbnail_image(frame, size=THUMBNAIL_SIZE):
+    """(width, height, RGB bytes) of the frame downscaled to at most `size` pixels a side."""
+    factor = -(-max(frame.width, frame.height) // size)
+    small = frame.downscaled(factor)
+    return small.width, small.height, to_rgb(small)
+
+
+class CaptureNotice:
+    """
+    Collects one capture's sink reports and sends them as a single notification once the
+    last sink is done. Pass add() as the pipeline's notify callback and its futures to watch().
+
+    actions: offer Open/Edit/Delete; only useful while the process stays up to receive the click.
+    Delete is left out when the save reused an earlier capture's file (see ExistingPath).
+    """
+
+    def __init__(self, frame, editor='', actions=True):
+        self.frame = frame
+        self.editor = editor
+        self.actions = actions
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def add(self, message):
+        print(f"[HyprSnipper] {message}")
+        with self._lock:
+            self.messages.append(message)
+
+    def watch(self, futures):
+        """Send the notification when the save, copy and edit futures have finished."""
+        sinks = {name: future for name, future in futures.items() if name in ('save', 'copy', 'edit')}
+        saved = sinks.get('save')
+        when_done(sinks.values(),
+                  lambda: _sender.submit(self.send, saved.result() if saved is not None else None))
+
+    def send(self, path=None):
+        """Send the collected reports on the sender thread; path: the saved file the actions act on."""
+        with self._lock:
+            body = '\n'.join(self.messages)
+        # Only the thumbnail is needed from here on; do not hold the full frame while the notification is up
+        frame, self.frame = self.frame, None
+        if not body or frame is None:
+            return
+        summary = "Screenshot saved" if path else "Screenshot captured"
+        actions = []
+        on_action = None
+        if self.actions and path:
+            actions = [('default', "Open")]
+            if not isinstance(path, ExistingPath):
+                # The file is this capture's own (written or hard-linked by it), so it may be deleted
+                actions.append(('delete', "Delete"))
+            if self.editor.strip():
+                actions.insert(1, ('edit', "Edit"))
+            editor = self.editor
+            on_action = (lambda notification_id, key: _run_action(editor, path, notification_id, key))
+        try:
+            get_notifier().notify(summary, body, actions, image=thumbnail_image(frame), on_action=on_action)
+        except NotificationError:
+            notify_send(summary, body, icon=path)
+        except Exception as e:
+            print(f"[HyprSnipper] Warning: could not show notification: {e}")
+
+
+def forget_capture(path):
+    """A capture was deleted: drop it from the history and the duplicate cache too."""
+    get_history().forget(path)
+    dedup.forget(path)
+
+
+def _run_action(editor, path, notification_id, key):
+    """A button of a capture notification was clicked."""
+    try:
+        if key == 'default':
+            subprocess.Popen(['xdg-open', path])
+        elif key == 'edit':
+            open_in_editor(editor, path)
+        elif key == 'delete':
+            os.unlink(path)
+            forget_capture(path)
+            get_notifier().notify("Screenshot deleted", path, replaces_id=notification_id)
+    except (OSError, sqlite3.Error, NotificationError) as e:
+        print(f"[HyprSnipper] Warning: {key} failed: {e}")
@@ -0,0 +1,65 @@
+"""
+overlay_pool.py - Selector overlays created once and reused for every capture
+
+A capture used to build a new WindowSelectorOverlay, or one RegionSelectorOverlay per
+screen, and throw it away afterwards. The pool keeps one window selector and one region
+overlay per screen, hidden between captures; a capture only fills them with new data
+and shows them. warm() creates them (and their native windows) ahead of the first
+capture, e.g. when the daemon starts. Screens that are plugged in or removed get an
+overlay added or dropped.
+"""
+from PySide6.QtCore import QObject
+from PySide6.QtWidgets import QApplication
+
+
+class OverlayPool(QObject):
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self._window_selector = None
+        self._region_overlays = {}  # QScreen -> RegionSelectorOverlay
+        self._warm = False
+        app = QApplication.instance()
+        app.screenAdded.connect(self._on_screen_added)
+        app.screenRemoved.connect(self._on_screen_removed)
+
+    def warm(self):
+        """Create every overlay now, hidden, so no capture pays for building one."""
+        self._warm = True
+        self.window_selector()
+        self.region_overlays()
+
+    def window_selector(self):
+        """The WindowSelectorOverlay; open() it with the windows to show."""
+        if self._window_selector is None:
+            from .window_selector import WindowSelectorOverlay
+            self._window_selector = WindowSelectorOverlay(self.window)
+            # Native window now rather than on the first show
+            self._window_selector.winId()
+        return self._window_selector
+
+    def region_overlays(self):
+        """One RegionSelectorOverlay per screen, in QApplication.screens() order."""
+        return [self._region_overlay(screen) for screen in QApplication.screens()]
+
+    def _region_overlay(self, screen):
+        overlay = self._region_overlays.get(screen)
+        if overlay is None:
+            from .region_selector import RegionSelectorOverlay
+            overlay = self._region_overlays[screen] = RegionSelectorOverlay(screen)
+            overlay.winId()
+        return overlay
+
+    def _on_screen_added(self, screen):
+        if self._warm:
+            self._region_overlay(screen)
+
+    def _on_screen_removed(self, screen):
+        overlay = self._region_overlays.pop(screen, None)
+        if overlay is None:
+            return
+        if overlay.selector is not None:
+            # The layout changed under a selection in progress
+            overlay.selector.cancel()
+        overlay.close()
+        overlay.deleteLater()
@@ -1,71 +1,312 @@
-from PySide6.QtCore import Qt, QRect, QPoint, Signal
-from PySide6.QtGui import QPainter, QColor, QPen, QCursor
+"""
+region_selector.py - In-process region selection across all outputs
+
+RegionSelector puts one RegionSelectorOverlay on every screen and keeps the selection
+in global (layout) coordinates, so a drag may cross outputs. With a frozen frame the
+overlays show that still screenshot, the result is cropped from it and a magnifier
+loupe is drawn next to the cursor. Corners snap to window and output edges.
+
+Only the parts of the overlays that change are repainted: the band between the old and
+new selection, the selection borders and the old and new loupe positions.
+"""
+import bisect
+
+from PySide6.QtCore import Qt, QObject, QPoint, QRect, Signal
+from PySide6.QtGui import QPainter, QColor, QPen, QCursor, QFont, QRegion
 from PySide6.QtWidgets import QWidget, QApplication
 
-class RegionSelectorOverlay(QWidget):
+SNAP_DISTANCE = 8
+LOUPE_SIZE = 128
+LOUPE_ZOOM = 8
+
+
+class _EdgeIndex:
+    """Window/output edges along one axis, sorted for bisect: (position, span_start, span_end)."""
+
+    def __init__(self, edges):
+        self.edges = sorted(edges)
+        self.positions = [e[0] for e in self.edges]
+
+    def snap(self, value, cross):
+        """Nearest edge within SNAP_DISTANCE whose span covers `cross`, else `value`."""
+        best, best_dist = value, SNAP_DISTANCE + 1
+        lo = bisect.bisect_left(self.positions, value - SNAP_DISTANCE)
+        hi = bisect.bisect_right(self.positions, value + SNAP_DISTANCE)
+        for pos, start, end in self.edges[lo:hi]:
+            dist = abs(pos - value)
+            if dist < best_dist and start - SNAP_DISTANCE <= cross <= end + SNAP_DISTANCE:
+                best, best_dist = pos, dist
+        return best
+
+
+class RegionSelector(QObject):
+    """Selection state shared by the per-screen overlays."""
     regionSelected = Signal(QRect)
+    cancelled = Signal()
 
-    def __init__(self, palette):
+    def __init__(self, palette, frame=None, overlays=None):
         super().__init__()
         self.palette = palette
-        self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
-        self.setAttribute(Qt.WA_TranslucentBackground)
-        self.setWindowState(Qt.WindowFullScreen)
-        self.setCursor(QCursor(Qt.CrossCursor))
+        self.frame = frame
         self.start = None
         self.end = None
         self.dragging = False
         self.click_mode = False
         self.selection_rect = QRect()
+        self._finished = False
+        self.set_snap_windows([])
+        # Pooled overlays (one per screen, see overlay_pool.py) are reused; otherwise new ones are made
+        if overlays is None:
+            overlays = [RegionSelectorOverlay(screen) for screen in QApplication.screens()]
+        self.overlays = overlays
+        for overlay in overlays:
+            overlay.attach(self)
+
+    def show(self):
+        for overlay in self.overlays:
+            overlay.showFullScreen()
+
+    def set_snap_windows(self, windows):
+        """Use these windows' edges (plus every output's) as snap targets."""
+        rects = [(s.geometry().x(), s.geometry().y(), s.geometry().width(), s.geometry().height())
+                 for s in QApplication.screens()]
+        rects += [(w['at'][0], w['at'][1], w['size'][0], w['size'][1]) for w in windows]
+        self._x_edges = _EdgeIndex([(x + dx, y, y + h) for x, y, w, h in rects for dx in (0, w)])
+        self._y_edges = _EdgeIndex([(y + dy, x, x + w) for x, y, w, h in rects for dy in (0, h)])
+
+    def snap(self, point, enabled=True):
+        if not enabled:
+            return point
+        return QPoint(self._x_edges.snap(point.x(), point.y()), self._y_edges.snap(point.y(), point.x()))
+
+    def _set_end(self, point):
+        old = self.selection_rect
+        self.end = point
+        # Corners are pixel boundaries, so the size is the plain difference
+        x0, x1 = sorted((self.start.x(), point.x()))
+        y0, y1 = sorted((self.start.y(), point.y()))
+        self.selection_rect = QRect(x0, y0, x1 - x0, y1 - y0)
+        for overlay in self.overlays:
+            overlay.selection_changed(old, self.selection_rect)
+
+    def press(self, point, snap=True):
+        point = self.snap(point, snap)
+        if self.start is None:
+            self.start = point
+            self.dragging = True
+            self.click_mode = False
+            self._set_end(point)
+        elif self.click_mode:
+            self._set_end(point)
+            self._finish()
+
+    def move(self, point, snap=True):
+        if self.dragging or self.click_mode:
+            self._set_end(self.snap(point, snap))
+
+    def release(self, point, snap=True):
+        if self.dragging:
+            self.dragging = False
+            self._set_end(self.snap(point, snap))
+            if self.selection_rect.width() > 1 and self.selection_rect.height() > 1:
+                self._finish()
+            else:
+                # A click without a drag: the next click sets the opposite corner
+                self.click_mode = True
+
+    def _finish(self):
+        self._close()
+        self.regionSelected.emit(self.selection_rect)
+
+    def cancel(self):
+        if self._finished:
+            return
+        self._close()
+        self.cancelled.emit()
+
+    def _close(self):
+        if self._finished:
+            return
+        self._finished = True
+        for overlay in self.overlays:
+            overlay.close()
+            overlay.detach()
+
+
+class RegionSelectorOverlay(QWidget):
+    """Fullscreen selection surface for one screen."""
+
+    def __init__(self, screen):
+        super().__init__()
+        self.selector = None
+        self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.output = screen
+        self.setScreen(screen)
+        self.setCursor(QCursor(Qt.CrossCursor))
         self.setMouseTracking(True)
+        self.setWindowTitle("HyprSnipperRegion")
+        self.origin = screen.geometry().topLeft()
+        self.background = None
+        self._dim = QColor(0, 0, 0, 96)
+        self._label_bg = QColor(0, 0, 0, 180)
+        self._label_pen = QPen(QColor(255, 255, 255))
+        self._font = QFont('Sans', 9)
+        self._loupe_pen = QPen(QColor(255, 255, 255), 1)
+        self._cursor = None  # local cursor position while the pointer is on this screen
+
+    def attach(self, selector):
+        """Prepare for a new selection; a hidden overlay is reused this way, not rebuilt."""
+        self.selector = selector
+        # The output may have been moved or rescaled since the last selection
+        geo = self.output.geometry()
+        self.origin = geo.topLeft()
+        self.setGeometry(geo)
+        # This screen's part of the frozen frame, and the image pixels per logical pixel
+        self.background = None
+        if selector.frame is not None:
+            try:
+                self.background = selector.frame.crop_logical((geo.x(), geo.y(), geo.width(), geo.height())).to_qimage()
+                self._bg_scale = self.background.width() / max(1, geo.width())
+            except ValueError:
+                self.background = None
+        primary = QColor(selector.palette['primary'])
+        self._pen = QPen(primary, 2, Qt.SolidLine)
+        self._fill = QColor(primary)
+        self._fill.setAlpha(40 if self.background is None else 0)
+        self._cursor = None
+
+    def detach(self):
+        """Drop the selection and the frozen frame; a pooled overlay must not keep them alive."""
+        self.selector = None
+        self.background = None
+
+    # Geometry helpers; all rects passed in are global
+
+    def _local(self, rect):
+        return rect.translated(-self.origin)
+
+    def _label_rect(self, rect):
+        local = self._local(rect)
+        top = local.top() - 22 if local.top() >= 22 else local.bottom() + 4
+        return QRect(local.left(), top, 90, 18)
+
+    def _loupe_rect(self):
+        if self.background is None or self._cursor is None:
+            return QRect()
+        x, y = self._cursor.x() + 24, self._cursor.y() + 24
+        if x + LOUPE_SIZE > self.width():
+            x = self._cursor.x() - 24 - LOUPE_SIZE
+        if y + LOUPE_SIZE > self.height():
+            y = self._cursor.y() - 24 - LOUPE_SIZE
+        return QRect(x, y, LOUPE_SIZE, LOUPE_SIZE)
+
+    def _selection_region(self, rect):
+        """Border and size label of a (global) selection rect, in local coordinates."""
+        if rect.isNull():
+            return QRegion()
+        local = self._local(rect)
+        border = QRegion(local.adjusted(-2, -2, 2, 2)).subtracted(QRegion(local.adjusted(2, 2, -2, -2)))
+        return border.united(QRegion(self._label_rect(rect)))
+
+    def selection_changed(self, old, new):
+        # The area that switched between dimmed and clear, plus old and new decorations
+        dirty = QRegion(self._local(old)).xored(QRegion(self._local(new)))
+        dirty = dirty.united(self._selection_region(old)).united(self._selection_region(new))
+        dirty = dirty.intersected(QRegion(self.rect()))
+        if not dirty.isEmpty():
+            self.update(dirty)
+
+    def _move_cursor(self, pos):
+        old = self._loupe_rect()
+        self._cursor = pos
+        new = self._loupe_rect()
+        if old != new:
+            self.update(QRegion(old).united(QRegion(new)))
+
+    # Painting
 
     def paintEvent(self, event):
-        if self.start and self.end:
-            painter = QPainter(self)
-            painter.setRenderHint(QPainter.Antialiasing)
-            # Dim background
-            painter.fillRect(self.rect(), QColor(0, 0, 0, 64))
-            # Draw selection rectangle
-            pen = QPen(QColor(self.palette['primary']), 2, Qt.SolidLine)
-            painter.setPen(pen)
-            painter.setBrush(QColor(self.palette['primary'], 64))
-            painter.drawRect(self.selection_rect.normalized())
+        dirty = event.region()
+        painter = QPainter(self)
+        painter.setClipRegion(dirty)
+        bounds = dirty.boundingRect()
+        if self.background is not None:
+            s = self._bg_scale
+            source = QRect(round(bounds.x() * s), round(bounds.y() * s),
+                           round(bounds.width() * s), round(bounds.height() * s))
+            painter.drawImage(bounds, self.background, source)
+        else:
+            # Overwrite rather than blend, the window is translucent
+            painter.setCompositionMode(QPainter.CompositionMode_Source)
+            painter.fillRect(bounds, Qt.transparent)
+            painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        selection = self._local(self.selector.selection_rect)
+        painter.setClipRegion(dirty.subtracted(QRegion(selection)))
+        painter.fillRect(bounds, self._dim)
+        painter.setClipRegion(dirty)
+        if not selection.isNull():
+            painter.setPen(self._pen)
+            painter.setBrush(self._fill)
+            painter.drawRect(selection)
+            self._paint_label(painter, self.selector.selection_rect)
+        loupe = self._loupe_rect()
+        if not loupe.isNull() and dirty.intersects(loupe):
+            self._paint_loupe(painter, loupe)
+
+    def _paint_label(self, painter, rect):
+        label = self._label_rect(rect)
+        painter.fillRect(label, self._label_bg)
+        painter.setPen(self._label_pen)
+        painter.setFont(self._font)
+        painter.drawText(label, Qt.AlignCenter, f"{rect.width()} × {rect.height()}")
+
+    def _paint_loupe(self, painter, loupe):
+        # Magnify the frozen pixels around the cursor, one source pixel per LOUPE_ZOOM screen pixels
+        s = self._bg_scale
+        span = LOUPE_SIZE // LOUPE_ZOOM
+        cx, cy = round(self._cursor.x() * s), round(self._cursor.y() * s)
+        source = QRect(cx - span // 2, cy - span // 2, span, span)
+        painter.drawImage(loupe, self.background, source)
+        painter.setPen(self._loupe_pen)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRect(loupe.adjusted(0, 0, -1, -1))
+        center = loupe.center()
+        painter.drawRect(center.x() - LOUPE_ZOOM // 2, center.y() - LOUPE_ZOOM // 2, LOUPE_ZOOM, LOUPE_ZOOM)
+
+    # Input; Shift disables snapping. Late events after detach() are ignored
+
+    def _global(self, event):
+        return event.position().toPoint() + self.origin
+
+    def _snap_enabled(self, event):
+        return not (event.modifiers() & Qt.ShiftModifier)
 
     def mousePressEvent(self, event):
+        if self.selector is None:
+            return
         if event.button() == Qt.LeftButton:
-            if not self.start:
-                self.start = event.pos()
-                self.end = event.pos()
-                self.dragging = True
-                self.click_mode = False
-            elif self.click_mode:
-                self.end = event.pos()
-                self.selection_rect = QRect(self.start, self.end)
-                self.regionSelected.emit(self.selection_rect.normalized())
-                self.close()
-        self.update()
+            self.selector.press(self._global(event), self._snap_enabled(event))
+        elif event.button() == Qt.RightButton:
+            self.selector.cancel()
 
     def mouseMoveEvent(self, event):
-        if self.dragging:
-            self.end = event.pos()
-            self.selection_rect = QRect(self.start, self.end)
-            self.update()
+        if self.selector is None:
+            return
+        self._move_cursor(event.position().toPoint())
+        self.selector.move(self._global(event), self._snap_enabled(event))
 
     def mouseReleaseEvent(self, event):
-        if event.button() == Qt.LeftButton and self.dragging:
-            self.end = event.pos()
-            self.selection_rect = QRect(self.start, self.end)
-            self.regionSelected.emit(self.selection_rect.normalized())
-            self.dragging = False
-            self.close()
-        elif event.button() == Qt.LeftButton and not self.dragging and not self.click_mode:
-            # Switch to click-move-click mode
-            self.click_mode = True
-        self.update()
+        if self.selector is not None and event.button() == Qt.LeftButton:
+            self.selector.release(self._global(event), self._snap_enabled(event))
+
+    def leaveEvent(self, event):
+        self._move_cursor(None)
+        super().leaveEvent(event)
 
     def keyPressEvent(self, event):
-        if event.key() == Qt.Key_Escape:
-            self.close()
+        if self.selector is not None and event.key() == Qt.Key_Escape:
+            self.selector.cancel()
 
     def showEvent(self, event):
         self.raise_()
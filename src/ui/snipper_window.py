@@ -1,143 +1,77 @@
-from .window_selector import WindowSelectorOverlay
-from .full_display import FullDisplayCapture
-from .all_displays import AllDisplaysCapture
-
-from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QIcon, QCursor
+from PySide6.QtCore import Qt, QRect, QTimer
+from PySide6.QtGui import QCursor
 from PySide6.QtWidgets import (
     QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QCheckBox, QApplication
 )
 
 import os
-import subprocess
-import tempfile
-import shlex
-import datetime
-import shutil
-
 
-from .palette import Palette
 
+from .theme import get_theme
+from .icons import get_icon_path, create_colored_icon
+from core.backends import capture_frame, format_geometry, parse_geometry
+from core.settings import get_settings
+from .tasks import run_task
 
+# Only what the toolbar needs is imported above. Selectors, capture modes, the Hyprland
+# model, thumbnails and the sinks are imported where they are first used, after the
+# toolbar has been painted (see `hyprsnipper --profile-startup`).
 
+_thumbnail_cache = None
 
-ICON_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../resources/icons'))
-USER_ICON_PATH = os.path.expanduser('~/.config/hyprsnipper/icons')
 
-def get_icon_path(icon_base):
-    """
-    icon_base: e.g. 'region' (no extension)
-    Returns the best icon path, preferring user .svg/.png, then default .svg/.png.
-    """
-    for ext in ('.svg', '.png'):
-        user_icon = os.path.join(USER_ICON_PATH, icon_base + ext)
-        if os.path.isfile(user_icon):
-            return user_icon
-    for ext in ('.svg', '.png'):
-        default_icon = os.path.join(ICON_PATH, icon_base + ext)
-        if os.path.isfile(default_icon):
-            return default_icon
-    return ''  # fallback: empty
-
-def create_colored_icon(icon_path, color):
+def _get_thumbnail_cache():
     """
-    Creates a QIcon with the specified color for monochromatic SVG icons.
-    For PNG icons, returns the original icon.
+    Window thumbnails survive between selector openings (in daemon mode) until a window
+    is moved, resized or retitled.
     """
-    if not icon_path or not os.path.exists(icon_path):
-        return QIcon()
-    
-    if icon_path.endswith('.svg'):
-        try:
-            # Read SVG content
-            with open(icon_path, 'r', encoding='utf-8') as f:
-                svg_content = f.read()
-            
-            # Replace common fill colors with the desired color
-            # This handles fill="#000000", fill="#323544", fill="black", etc.
-            import re
-            # Replace fill attributes (but preserve 'none' and transparent fills)
-            svg_content = re.sub(
-                r'fill="(?!none|transparent)[^"]*"', 
-                f'fill="{color}"', 
-                svg_content
-            )
-            # Also replace stroke colors for line art
-            svg_content = re.sub(
-                r'stroke="(?!none|transparent)[^"]*"', 
-                f'stroke="{color}"', 
-                svg_content
-            )
-            # Replace CSS-style fill colors in style attributes (fill:#000000)
-            # More precise regex that only matches the color value, not beyond
-            svg_content = re.sub(
-                r'fill:(?!none|transparent)\s*(#[0-9a-fA-F]{3,8}|[a-zA-Z]+)', 
-                f'fill:{color}', 
-                svg_content
-            )
-            # Replace CSS-style stroke colors in style attributes (stroke:#000000)
-            svg_content = re.sub(
-                r'stroke:(?!none|transparent)\s*(#[0-9a-fA-F]{3,8}|[a-zA-Z]+)', 
-                f'stroke:{color}', 
-                svg_content
-            )
-            
-            # Create QIcon from modified SVG
-            from PySide6.QtCore import QByteArray
-            from PySide6.QtSvg import QSvgRenderer
-            from PySide6.QtGui import QPixmap, QPainter
-            
-            svg_bytes = QByteArray(svg_content.encode('utf-8'))
-            renderer = QSvgRenderer(svg_bytes)
-            
-            # Create pixmap and render SVG
-            pixmap = QPixmap(64, 64)  # Standard icon size
-            pixmap.fill(Qt.transparent)
-            painter = QPainter(pixmap)
-            renderer.render(painter)
-            painter.end()
-            
-            return QIcon(pixmap)
-            
-        except Exception as e:
-            print(f"[HyprSnipper] Warning: Could not colorize icon {icon_path}: {e}")
-            return QIcon(icon_path)  # Fallback to original
-    else:
-        # For PNG icons, return as-is
-        return QIcon(icon_path)
-
+    global _thumbnail_cache
+    if _thumbnail_cache is None:
+        from core.thumbnails import ThumbnailCache
+        _thumbnail_cache = ThumbnailCache()
+    return _thumbnail_cache
 
-import yaml
 
+def _thumbnail_images(monitor, frame, windows, max_width, cancel=None):
+    """Worker-thread half of the thumbnails: scale, crop and convert to QImage."""
+    from core.thumbnails import output_thumbnails
+    if frame.geometry != tuple(monitor['rect']):
+        frame = frame.crop_logical(monitor['rect'])  # the frozen frame covers every output
+    thumbnails = output_thumbnails(monitor, frame, windows, max_width, cancel=cancel)
+    return {address: thumb.to_qimage() for address, thumb in thumbnails.items()}
 
-def get_user_or_default_config(filename):
-    user_path = os.path.expanduser(f'~/.config/hyprsnipper/{filename}')
-    default_path = os.path.abspath(os.path.join(os.path.dirname(__file__), f'../../config/{filename}'))
-    return user_path if os.path.isfile(user_path) else default_path
 
-SETTINGS_PATH = get_user_or_default_config('settings.yaml')
-PALETTE_PATH = get_user_or_default_config('palette.ini')
+# IPC/CLI mode names mapped to the toolbar button index
+MODE_KEYS = ('region', 'window', 'full', 'all')
 
-def get_animation_delay():
-    """Load window animation delay from settings.yaml, defaulting to 300ms"""
-    try:
-        with open(SETTINGS_PATH) as f:
-            settings = yaml.safe_load(f) or {}
-            return int(settings.get('WINDOW_ANIMATION_DELAY', 300))
-    except (FileNotFoundError, ValueError, TypeError, yaml.YAMLError):
-        # Return default value if file doesn't exist, is corrupted, or has invalid YAML
-        return 300
 
 class SnipperWindow(QWidget):
     def closeEvent(self, event):
         super().closeEvent(event)
     def __init__(self):
         super().__init__()
-        self.palette = Palette()
+        # Palette, stylesheet and QPalette are applied to the whole application (see theme.py)
+        self.theme = get_theme()
+        # When a capture is started directly (daemon trigger) the toolbar stays hidden afterwards
+        self._direct_trigger = False
+        self.exit_after_capture = False
+        # Set in daemon mode: the process outlives captures and serves the clipboard itself
+        self.resident = False
+        self._pending_task = None
+        self._window_selector_overlay = None
+        # ui.overlay_pool.OverlayPool, created on the first selector (or by warm_overlays)
+        self._overlays = None
+        self._region_selector = None
+        # Every output, grabbed before the selector of a direct trigger was shown (FREEZE_SCREEN)
+        self._frozen = None
+        self._thumbnail_tasks = []
+        # core.startup.StartupProfile while `--profile-startup` runs
+        self.startup_profile = None
+        # core.trace.CaptureTrace of the capture in progress (TRACE setting)
+        self._trace = None
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
         self.setAttribute(Qt.WA_TranslucentBackground)
         self.setFixedSize(420, 120)
-        self.setStyleSheet(self._main_style())
         self.option_checks = []  # Ensure this is always defined before any logic
         self._setup_ui()
         self._center_top()
@@ -155,45 +89,31 @@ class SnipperWindow(QWidget):
         btn_layout = QHBoxLayout()
         self.mode_buttons = []
         self.mode_names = [tooltip for _, tooltip in icons]
+        self._icon_paths = [get_icon_path(icon_base) for icon_base, _ in icons]
+        icon_size = QApplication.primaryScreen().availableGeometry().size() / 16
         for idx, (icon_base, tooltip) in enumerate(icons):
             btn = QPushButton()
-            icon_path = get_icon_path(icon_base)
-            if icon_path:
-                # Create colored icon using palette color
-                colored_icon = create_colored_icon(icon_path, self.palette['icon_color'])
-                btn.setIcon(colored_icon)
-            btn.setIconSize(QApplication.primaryScreen().availableGeometry().size() / 16)
+            btn.setIconSize(icon_size)
             btn.setToolTip(tooltip)
             btn.setCheckable(True)
-            btn.setStyleSheet(self._button_style())
             btn.clicked.connect(lambda checked, i=idx: self._select_mode(i))
             btn_layout.addWidget(btn)
             self.mode_buttons.append(btn)
+        self._tint_icons()
         # Do not select any mode here; selection happens after UI setup
 
-        # Output toggles, read initial state from settings.yaml using YAML
-        save_enabled = True
-        copy_enabled = True
-        edit_enabled = False
-        try:
-            with open(SETTINGS_PATH) as f:
-                settings = yaml.safe_load(f) or {}
-                save_enabled = bool(settings.get('SAVE_ENABLED', True))
-                copy_enabled = bool(settings.get('COPY_ENABLED', True))
-                edit_enabled = bool(settings.get('EDIT_ENABLED', False))
-        except Exception:
-            pass
+        # Output toggles, initial state from settings.yaml
+        settings = get_settings()
         options = [
-            ("Save", save_enabled),
-            ("Copy", copy_enabled),
-            ("Edit", edit_enabled)
+            ("Save", settings['SAVE_ENABLED']),
+            ("Copy", settings['COPY_ENABLED']),
+            ("Edit", settings['EDIT_ENABLED'])
         ]
         opt_layout = QHBoxLayout()
         self.option_checks = []
         for label, checked in options:
             cb = QCheckBox(label)
             cb.setChecked(checked)
-            cb.setStyleSheet(self._checkbox_style())
             opt_layout.addWidget(cb)
             self.option_checks.append(cb)
 
@@ -203,6 +123,22 @@ class SnipperWindow(QWidget):
         layout.addLayout(opt_layout)
         layout.setContentsMargins(12, 8, 12, 8)
         self.setLayout(layout)
+        settings.subscribe(self._on_settings_changed)
+        self.theme.subscribe(lambda _theme: self._tint_icons())
+
+    def _tint_icons(self):
+        # Colored icons using the palette color, rendered at the real icon size and DPR
+        screen = QApplication.primaryScreen()
+        for btn, icon_path in zip(self.mode_buttons, self._icon_paths):
+            if icon_path:
+                btn.setIcon(create_colored_icon(icon_path, self.theme.palette['icon_color'], btn.iconSize(),
+                                                screen.devicePixelRatio()))
+
+    def _on_settings_changed(self, changed):
+        # Follow edits to the default toggle states while running (daemon mode)
+        for cb, key in zip(self.option_checks, ('SAVE_ENABLED', 'COPY_ENABLED', 'EDIT_ENABLED')):
+            if key in changed:
+                cb.setChecked(get_settings()[key])
 
     def _center_top(self):
         # Use the screen where the mouse pointer is (active screen)
@@ -215,10 +151,101 @@ class SnipperWindow(QWidget):
         y = geo.y() + 24  # 24px offset from top for aesthetics
         self.move(x, y)
 
+    def present(self):
+        """Show the toolbar on the active screen."""
+        self._direct_trigger = False
+        self._frozen = None
+        self._center_top()
+        self._show_toolbar()
+
+    def _show_toolbar(self):
+        self.show()
+        self.raise_()
+        self.activateWindow()
+
+    def trigger(self, mode_key):
+        """Start a capture in the given mode ('region', 'window', 'full', 'all') without the toolbar."""
+        self._direct_trigger = True
+        self._center_top()
+        idx = MODE_KEYS.index(mode_key)
+        # Timed from the trigger, so the frozen screen grab counts for direct captures
+        self._start_trace(mode_key)
+        self._freeze_then(lambda: self._select_mode(idx))
+
+    def _freeze_then(self, callback):
+        """
+        With FREEZE_SCREEN, grab every output into memory before any UI is shown, then
+        run callback. Every mode then crops this frame, so the capture shows the screen
+        as it was when HyprSnipper was triggered and no animation delay is needed.
+        Only direct triggers freeze: a mode picked on the toolbar is captured live, so
+        it never crops a frame older than the window layout it was selected against.
+        """
+        self._frozen = None
+        settings = get_settings()
+        if not settings['FREEZE_SCREEN']:
+            callback()
+            return
+
+        def on_frame(frame):
+            self._mark_phase('screen frozen')
+            self._frozen = self._with_layout_geometry(frame)
+            callback()
+
+        def on_error(e):
+            print(f"[HyprSnipper] Warning: could not freeze the screen, capturing live: {e}")
+            callback()
+
+        self._start_task(capture_frame, None, settings['CAPTURE_BACKEND'], on_done=on_frame, on_error=on_error)
+
+    def _with_layout_geometry(self, frame):
+        if frame.geometry is None:
+            # grim reports no geometry for a capture of every output; it covers the whole layout
+            layout = QRect()
+            for screen in QApplication.screens():
+                layout = layout.united(screen.geometry())
+            frame.geometry = (layout.x(), layout.y(), layout.width(), layout.height())
+        return frame
+
+    def capture_delay(self):
+        """How long to wait for our own windows to disappear before capturing (none when frozen)."""
+        return 0 if self._frozen is not None else get_settings()['WINDOW_ANIMATION_DELAY']
+
+    def _start_trace(self, mode_key):
+        from core.trace import start_trace
+        self._trace = start_trace(mode_key, 'daemon' if self.resident else 'gui')
+
+    def _mark_phase(self, phase):
+        """Timestamp a phase of the capture in progress (no-op unless TRACE is on)."""
+        if self._trace is not None:
+            self._trace.mark(phase)
+
+    def _end_trace(self, outcome):
+        if self._trace is not None:
+            self._trace.finish(outcome)
+            self._trace = None
+
+    def _restore(self):
+        """Bring the toolbar back after a capture or cancellation."""
+        # Still set if the capture never reached the pipeline
+        self._end_trace('cancelled')
+        self._cancel_thumbnails()
+        self._frozen = None
+        if self._direct_trigger:
+            self._direct_trigger = False
+            self.hide()
+            if self.exit_after_capture:
+                QApplication.instance().quit()
+        else:
+            self.show()
+
     def _select_mode(self, idx, save=True):
+        if self._pending_task is not None:
+            return  # a capture is already in flight
         for i, btn in enumerate(self.mode_buttons):
             btn.setChecked(i == idx)
         self._current_mode = self.mode_names[idx]
+        if self._trace is None:
+            self._start_trace(self._mode_key())
         if self._current_mode == "Region":
             self._launch_region_slurp()
         elif self._current_mode == "Window":
@@ -230,123 +257,242 @@ class SnipperWindow(QWidget):
 
     def _launch_window_capture(self):
         self.hide()
-        QTimer.singleShot(get_animation_delay(), self._show_window_selector_overlay)
+        QTimer.singleShot(self.capture_delay(), self._show_window_selector_overlay)
 
     def _show_window_selector_overlay(self):
-        import json
+        from core.hyprland import visible_windows
+        self._mark_phase('ui hidden')
+        # hyprctl runs on a worker thread so the event loop keeps painting
+        self._start_task(visible_windows, on_done=self._on_windows_loaded,
+                         on_error=lambda e: self._capture_failed(f"Window selector failed: {e}"))
+
+    def _on_windows_loaded(self, layout):
+        monitors, windows = layout
+        self._mark_phase('windows listed')
+        if not windows:
+            self._notify("No windows found for selection.")
+            self._restore()
+            return
+        settings = get_settings()
+        if settings['SELECTOR_THUMBNAILS'] and monitors and self._frozen is not None:
+            # Thumbnails are cut from the frozen frame
+            self._open_window_selector(monitors, windows, [(m, self._frozen) for m in monitors])
+        elif settings['SELECTOR_THUMBNAILS'] and monitors:
+            from core.thumbnails import grab_outputs
+            # Grab the outputs before the selector is mapped so it is not in the picture;
+            # scaling and cropping wait until after the first paint
+            open_selector = lambda frames: self._open_window_selector(monitors, windows, frames)
+            self._start_task(grab_outputs, monitors, settings['CAPTURE_BACKEND'],
+                             on_done=open_selector, on_error=lambda e: open_selector([]))
+        else:
+            self._open_window_selector(monitors, windows, [])
+
+    def _open_window_selector(self, monitors, windows, frames):
+        from core.hyprland import hyprland_state, refreshed_visible_windows
+        from core.thumbnails import window_monitor
+
+        def on_select(geom, win=None):
+            self._cancel_thumbnails()
+            # Delay screenshot until all selector windows are closed
+            QTimer.singleShot(0 if self._frozen is not None else 100, lambda: self._on_region_slurp(geom, win))
+        _get_thumbnail_cache().retain(w.get('address') for w in windows)
         try:
-            ws_result = subprocess.run(['hyprctl', 'activeworkspace', '-j'], capture_output=True, text=True, check=True)
-            ws = json.loads(ws_result.stdout)
-            ws_id = ws['id']
-            result = subprocess.run(['hyprctl', 'clients', '-j'], capture_output=True, text=True, check=True)
-            clients = json.loads(result.stdout)
-            windows = [c for c in clients if c.get('mapped', True) and c.get('workspace', {}).get('id') == ws_id]
-            if not windows:
-                self._notify("No windows found for selection.")
-                self.show()
-                return
-            def on_select(geom):
-                # Delay screenshot until all selector windows are closed
-                QTimer.singleShot(100, lambda: self._on_region_slurp(geom))
-            self._window_selector_overlay = WindowSelectorOverlay(self, windows, on_select)
+            overlay = self._get_overlays().window_selector()
+            overlay.open(windows, on_select, monitors, self._cached_thumbnails(windows),
+                         select_delay=self.capture_delay())
         except Exception as e:
-            self._notify(f"Window selector failed: {e}")
-            self.show()
+            self._capture_failed(f"Window selector failed: {e}")
+            return
+        self._window_selector_overlay = overlay
+        self._mark_phase('selector shown')
+        # One task per output, so each output's thumbnails appear as soon as they are cut
+        self._cancel_thumbnails()
+        for monitor, frame in frames:
+            on_output = [w for w in windows if window_monitor(w, monitors) is monitor]
+            max_width = round(monitor['rect'][2] * overlay.preview_scale * overlay.devicePixelRatioF())
+            self._thumbnail_tasks.append(run_task(
+                _thumbnail_images, monitor, frame, on_output, max_width,
+                on_done=lambda images, wins=on_output: self._on_thumbnails(wins, images),
+                on_error=lambda e: print(f"[HyprSnipper] Warning: thumbnails failed: {e}")))
+        if hyprland_state().live:
+            # Shown from cached state; re-check geometry in the background in case a
+            # window was resized without an event (one socket request, no fork)
+            run_task(refreshed_visible_windows, on_done=self._on_windows_refreshed)
+
+    def _cached_thumbnails(self, windows):
+        thumbnails = {}
+        for win in windows:
+            image = _get_thumbnail_cache().get(win)
+            if image is not None:
+                thumbnails[win.get('address')] = image
+        return thumbnails
+
+    def _on_thumbnails(self, windows, images):
+        for win in windows:
+            if win.get('address') in images:
+                _get_thumbnail_cache().put(win, images[win.get('address')])
+        overlay = self._window_selector_overlay
+        if overlay is not None and overlay.isVisible():
+            # Only thumbnails whose window still has the geometry and title they were cut for
+            overlay.set_thumbnails(self._cached_thumbnails(overlay.windows))
+
+    def _cancel_thumbnails(self):
+        for task in self._thumbnail_tasks:
+            task.cancel()
+        self._thumbnail_tasks = []
+
+    def _on_windows_refreshed(self, layout):
+        monitors, windows = layout
+        overlay = self._window_selector_overlay
+        if overlay is None or not overlay.isVisible() or not windows:
+            return
+        def layout(wins):
+            return sorted((w.get('address'), tuple(w['at']), tuple(w['size'])) for w in wins)
+        if layout(windows) != layout(overlay.windows) or monitors != overlay.monitors:
+            overlay.set_windows(windows, monitors, self._cached_thumbnails(windows))
 
     def _launch_full_display_capture(self):
+        from .full_display import FullDisplayCapture
         FullDisplayCapture.capture(self)
 
     def _launch_all_displays_capture(self):
+        from .all_displays import AllDisplaysCapture
         AllDisplaysCapture.capture(self)
+
     def _launch_region_slurp(self):
         self.hide()
-        # Call slurp to get region
-        try:
-            result = subprocess.run(['slurp'], capture_output=True, text=True, check=True)
-            geom = result.stdout.strip()
-            if not geom:
-                self.show()
-                return
-            # geom is "x,y w×h"
-            # Pass to screenshot logic
-            self._on_region_slurp(geom)
-        except Exception as e:
-            print(f"slurp failed: {e}")
-            self.show()
-
-    def _on_region_slurp(self, geom):
-        # Get config using YAML
-        save_dir = os.getenv('SNIP_SAVE_DIR', '~/Pictures/Screenshots')
-        editor = os.getenv('SNIP_EDITOR', 'swappy')
-        copy_clip = True
-        try:
-            with open(SETTINGS_PATH) as f:
-                settings = yaml.safe_load(f) or {}
-                save_dir = settings.get('SAVE_DIR', save_dir)
-                editor = settings.get('EDITOR', editor)
-                copy_clip = bool(settings.get('COPY_TO_CLIPBOARD', True))
-        except Exception:
-            pass
-        save_dir = os.path.expanduser(save_dir)
-        # Get toggles
-        save_opt = self.option_checks[0].isChecked()
-        copy_opt = self.option_checks[1].isChecked()
-        edit_opt = self.option_checks[2].isChecked()
-        # Screenshot to temp file in ~/.cache/hyprsnipper
-        cache_dir = os.path.expanduser('~/.cache/hyprsnipper')
-        os.makedirs(cache_dir, exist_ok=True)
-        with tempfile.NamedTemporaryFile(suffix='.png', dir=cache_dir, delete=False) as tmp:
-            tmp_path = tmp.name
-        try:
-            subprocess.run(['grim', '-g', geom, tmp_path], check=True)
-        except Exception as e:
-            self._notify(f"Screenshot failed: {e}")
-            QTimer.singleShot(100, self.show)
+        if get_settings()['REGION_SELECTOR'] == 'native':
+            frame = self._frozen
+            QTimer.singleShot(self.capture_delay(), lambda: self._show_region_selector(frame))
             return
-        # Save
-        if save_opt:
-            os.makedirs(save_dir, exist_ok=True)
-            now = datetime.datetime.now()
-            fname = f"hyprsnip_{now.month}.{now.day}.{now.year}_{now.hour:02d}.{now.minute:02d}.{now.second:02d}.png"
-            out_path = os.path.join(save_dir, fname)
-            try:
-                shutil.move(tmp_path, out_path)
-                tmp_path = out_path
-                self._notify(f"Saved: {out_path}")
-            except Exception as e:
-                self._notify(f"Save failed: {e}")
-        # Copy
-        if copy_opt or (copy_clip and not save_opt and not edit_opt):
-            try:
-                subprocess.run(f'wl-copy < {shlex.quote(tmp_path)}', shell=True)
-                self._notify("Copied to clipboard")
-            except Exception as e:
-                self._notify(f"Copy failed: {e}")
-        # Edit
-        if edit_opt:
+        from core.selection import slurp_region
+        self._mark_phase('ui hidden')
+        # slurp blocks until the user has picked a region, so wait for it off the GUI thread
+        self._start_task(slurp_region, on_done=self._on_region_selected,
+                         on_error=lambda e: self._capture_failed(f"slurp failed: {e}"))
+
+    def _show_region_selector(self, frame):
+        from core.hyprland import visible_windows
+        from .region_selector import RegionSelector
+        self._mark_phase('ui hidden')
+        # With a frozen frame the selection is made on that still image
+        selector = RegionSelector(self.theme.palette, frame, self._get_overlays().region_overlays())
+        selector.regionSelected.connect(self._on_native_region)
+        selector.cancelled.connect(self._on_native_region_cancelled)
+        self._region_selector = selector
+        selector.show()
+        self._mark_phase('selector shown')
+        # Window edges to snap to, from the cached Hyprland model
+        run_task(visible_windows, on_done=lambda layout: selector.set_snap_windows(layout[1]),
+                 on_error=lambda e: None)
+
+    def _get_overlays(self):
+        if self._overlays is None:
+            from .overlay_pool import OverlayPool
+            self._overlays = OverlayPool(self)
+        return self._overlays
+
+    def warm_overlays(self):
+        """Build the selector overlays now, hidden, instead of on the first capture (daemon mode)."""
+        self._get_overlays().warm()
+
+    def _on_native_region(self, rect):
+        self._region_selector = None
+        geom = format_geometry((rect.x(), rect.y(), rect.width(), rect.height()))
+        # A live selection is captured once the overlays are gone
+        QTimer.singleShot(0 if self._frozen is not None else 100, lambda: self._on_region_slurp(geom))
+
+    def _on_native_region_cancelled(self):
+        self._region_selector = None
+        self._restore()
+
+    def _on_region_selected(self, geom):
+        if not geom:
+            self._restore()
+            return
+        # geom is "x,y w×h"
+        self._on_region_slurp(geom)
+
+    def _on_region_slurp(self, geom, window=None):
+        self._mark_phase('selection done')
+        # Recorded in the capture history along with the image
+        self._capture_meta = {'mode': self._mode_key(), 'geometry': geom, 'window': window}
+        if self._frozen is not None:
+            # Crop the frame grabbed before any UI was shown; geom None is all of it
             try:
-                # Use -f for swappy, fallback to default for others
-                if editor.strip() == 'swappy':
-                    subprocess.Popen([editor, '-f', tmp_path])
-                else:
-                    subprocess.Popen([editor, tmp_path])
-                self._notify(f"Opened in {editor}")
-            except Exception as e:
-                self._notify(f"Edit failed: {e}")
-        QTimer.singleShot(100, self.show)
+                frame = self._frozen if geom is None else self._frozen.crop_logical(parse_geometry(geom))
+            except ValueError as e:
+                self._capture_failed(f"Screenshot failed: {e}")
+                return
+            self._run_pipeline(frame)
+            return
+        backend = get_settings()['CAPTURE_BACKEND']
+        # Screenshot into memory on a worker thread; geom None captures every output
+        self._start_task(capture_frame, geom, backend, on_done=self._run_pipeline,
+                         on_error=lambda e: self._capture_failed(f"Screenshot failed: {e}"))
+
+    def _run_pipeline(self, frame):
+        from core.capture import build_pipeline, resolve_sinks
+        from core.trace import NO_TRACE
+        self._mark_phase('frame captured')
+        settings = get_settings()
+        # The toolbar toggles; the rest is the same pipeline `hyprsnipper capture` runs
+        save, copy, edit = resolve_sinks(settings, *(cb.isChecked() for cb in self.option_checks[:3]))
+        notice = None
+        if settings['NOTIFICATIONS'] == 'capture':
+            from .notify import CaptureNotice
+            # One notification for the whole capture; its buttons need the process to still be running
+            notice = CaptureNotice(frame, settings['EDITOR'], actions=not self.exit_after_capture)
+        # Save, copy and edit run concurrently from the same in-memory frame
+        pipeline = build_pipeline(settings, notify=notice.add if notice else self._notify, resident=self.resident)
+        # The pipeline finishes the trace once the last sink is done
+        trace, self._trace = self._trace or NO_TRACE, None
+        futures = pipeline.run(frame, save=save, copy=copy, edit=edit, meta=self._capture_meta, trace=trace)
+        if notice is not None:
+            notice.watch(futures)
+        QTimer.singleShot(100, self._restore)
+
+    def _mode_key(self):
+        """'region', 'window', 'full' or 'all' for the current mode."""
+        return MODE_KEYS[self.mode_names.index(self._current_mode)]
+
+    def _start_task(self, fn, *args, on_done, on_error):
+        """Run blocking capture work off the GUI thread; cancel_pending() (`--trigger cancel`) cancels it."""
+        def finish(callback):
+            def wrapped(value):
+                self._pending_task = None
+                callback(value)
+            return wrapped
+        self._pending_task = run_task(fn, *args, on_done=finish(on_done), on_error=finish(on_error))
+
+    def cancel_pending(self):
+        """Cancel a running slurp/hyprctl/capture and bring the toolbar back. Returns True if one was pending."""
+        if self._region_selector is not None:
+            self._region_selector.cancel()
+            return True
+        if self._pending_task is None:
+            return False
+        self._pending_task.cancel()
+        self._pending_task = None
+        self._notify("Capture cancelled")
+        self._restore()
+        return True
+
+    def _capture_failed(self, msg):
+        self._end_trace('failed')
+        self._notify(msg)
+        QTimer.singleShot(100, self._restore)
 
     def _notify(self, msg):
         print(f"[HyprSnipper] {msg}")
-        try:
-            subprocess.Popen(['notify-send', 'HyprSnipper', msg])
-        except Exception:
-            pass
-
-
+        if get_settings()['NOTIFICATIONS'] != 'off':
+            from .notify import send_message
+            send_message(msg)
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Escape:
-            self.close()
+            if not self.cancel_pending():
+                self.close()
         else:
             super().keyPressEvent(event)
 
@@ -366,38 +512,3 @@ class SnipperWindow(QWidget):
     def leaveEvent(self, event):
         self.leave_timer.start(200)
         super().leaveEvent(event)
-
-    def _main_style(self):
-        return f"""
-            background: {self.palette['background']};
-            border-radius: 12px;
-        """
-
-    def _button_style(self):
-        return f"""
-            QPushButton {{
-                background: {self.palette['button_bg']};
-                border: none;
-                margin: 0 8px;
-            }}
-            QPushButton:checked {{
-                background: {self.palette['button_checked']};
-                border-radius: 6px;
-            }}
-            QPushButton:hover {{
-                background: {self.palette['button_hover']};
-            }}
-        """
-
-    def _checkbox_style(self):
-        return f"""
-            QCheckBox {{
-                color: {self.palette['checkbox_fg']};
-                font-size: 14px;
-                padding: 2px 8px;
-            }}
-            QCheckBox::indicator {{
-                width: 16px;
-                height: 16px;
-            }}
-        """
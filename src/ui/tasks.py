@@ -0,0 +1,63 @@
+"""
+tasks.py - Run blocking capture work on Qt's thread pool and report back through signals
+"""
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, Signal
+
+from core.process import Cancelled, CancelToken
+
+# Tasks stay referenced until their result has been delivered
+_active = set()
+
+
+class _TaskSignals(QObject):
+    finished = Signal(object)
+    failed = Signal(object)
+
+
+class Task(QRunnable):
+    """
+    Calls fn(*args, cancel=token) on a worker thread. on_done(result) or on_error(exc)
+    run on the GUI thread afterwards; neither runs if the task was cancelled.
+    """
+
+    def __init__(self, fn, *args, on_done=None, on_error=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.token = CancelToken()
+        # Created on the GUI thread, so queued emissions are delivered there
+        self.signals = _TaskSignals()
+        self.signals.finished.connect(lambda result: self._deliver(on_done, result), Qt.QueuedConnection)
+        self.signals.failed.connect(lambda exc: self._deliver(on_error, exc), Qt.QueuedConnection)
+        self.running = True
+
+    def _deliver(self, callback, value):
+        self.running = False
+        _active.discard(self)
+        if callback is not None and not self.token.cancelled:
+            callback(value)
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, cancel=self.token)
+        except Cancelled:
+            self.running = False
+            _active.discard(self)
+            return
+        except Exception as e:
+            self.signals.failed.emit(e)
+            return
+        self.signals.finished.emit(result)
+
+    def cancel(self):
+        self.running = False
+        self.token.cancel()
+
+
+def run_task(fn, *args, on_done=None, on_error=None):
+    """Start fn on the global thread pool and return the Task (keep it to cancel)."""
+    task = Task(fn, *args, on_done=on_done, on_error=on_error)
+    _active.add(task)
+    QThreadPool.globalInstance().start(task)
+    return task
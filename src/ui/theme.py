@@ -0,0 +1,174 @@
+"""
+theme.py - The palette compiled once into one application stylesheet and QPalette
+
+Widgets do not get stylesheets of their own: the palette file is parsed once per change
+and compiled into a single stylesheet for the QApplication plus a QPalette with the same
+colors, so Qt polishes the whole widget tree in one pass. watch() follows the palette
+file (and PALETTE_FILE in settings.yaml), so a new pywal scheme written to
+~/.cache/wal/hyprsnipper.ini re-themes a running daemon. Subscribers are told after the
+restyle, e.g. to re-tint icons (from icons.py's cache, not by re-rendering the SVGs).
+"""
+import os
+
+from PySide6.QtGui import QColor, QPalette
+
+from core.settings import get_settings
+from .palette import Palette
+
+STYLESHEET = """
+SnipperWindow, SnipperWindow * {{
+    background: {background};
+    border-radius: 12px;
+}}
+SnipperWindow QPushButton {{
+    background: {button_bg};
+    border: none;
+    margin: 0 8px;
+}}
+SnipperWindow QPushButton:checked {{
+    background: {button_checked};
+    border-radius: 6px;
+}}
+SnipperWindow QPushButton:hover {{
+    background: {button_hover};
+}}
+SnipperWindow QCheckBox {{
+    color: {checkbox_fg};
+    font-size: 14px;
+    padding: 2px 8px;
+}}
+SnipperWindow QCheckBox::indicator {{
+    width: 16px;
+    height: 16px;
+}}
+QToolTip {{
+    background-color: {tooltip_bg};
+    color: {tooltip_fg};
+    border: 1px solid {primary};
+    padding: 6px 10px;
+    border-radius: 6px;
+    font-size: 13px;
+}}
+"""
+
+# QPalette role: palette key
+PALETTE_ROLES = {
+    QPalette.Window: 'background',
+    QPalette.WindowText: 'checkbox_fg',
+    QPalette.Base: 'background',
+    QPalette.Text: 'checkbox_fg',
+    QPalette.Button: 'button_bg',
+    QPalette.ButtonText: 'icon_color',
+    QPalette.Highlight: 'primary',
+    QPalette.ToolTipBase: 'tooltip_bg',
+    QPalette.ToolTipText: 'tooltip_fg',
+}
+
+
+def compile_stylesheet(palette):
+    """The application stylesheet for a Palette."""
+    return STYLESHEET.format(**{key: palette[key] for key in palette.colors})
+
+
+def compile_qpalette(palette):
+    qpalette = QPalette()
+    for role, key in PALETTE_ROLES.items():
+        qpalette.setColor(role, QColor(palette[key]))
+    return qpalette
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+class Theme:
+    """The current Palette with its compiled stylesheet and QPalette."""
+
+    def __init__(self):
+        self.path = None
+        self.palette = None
+        self.stylesheet = ''
+        self.qpalette = None
+        self._stamp = None
+        self._app = None
+        self._listeners = []
+        self._watcher = None
+        self.reload()
+
+    def reload(self):
+        """Re-read the palette file if it (or PALETTE_FILE) changed. Returns whether any color changed."""
+        path = get_settings().palette_path()
+        stamp = _stamp(path)
+        if self.palette is not None and (path, stamp) == (self.path, self._stamp):
+            return False
+        self.path, self._stamp = path, stamp
+        palette = Palette(path)
+        if self.palette is not None and palette.colors == self.palette.colors:
+            return False
+        self.palette = palette
+        self.stylesheet = compile_stylesheet(palette)
+        self.qpalette = compile_qpalette(palette)
+        if self._app is not None:
+            self._apply()
+            for callback in list(self._listeners):
+                callback(self)
+        return True
+
+    def apply(self, app):
+        """Style the application now and after every palette change."""
+        self._app = app
+        self._apply()
+
+    def _apply(self):
+        # One restyle pass over every widget, instead of one per widget stylesheet
+        self._app.setPalette(self.qpalette)
+        self._app.setStyleSheet(self.stylesheet)
+
+    def subscribe(self, callback):
+        """callback(theme) runs after a palette change has been applied."""
+        self._listeners.append(callback)
+
+    def watch(self):
+        """Re-theme when the palette file or PALETTE_FILE changes. Needs a running Qt application."""
+        if self._watcher is not None:
+            return
+        from PySide6.QtCore import QFileSystemWatcher
+        self._watcher = QFileSystemWatcher()
+        self._watcher.fileChanged.connect(self._on_changed)
+        self._watcher.directoryChanged.connect(self._on_changed)
+        self._watch_paths()
+        get_settings().subscribe(self._on_settings_changed)
+
+    def _watch_paths(self):
+        watched = self._watcher.files() + self._watcher.directories()
+        if watched:
+            self._watcher.removePaths(watched)
+        # The directory too: pywal and editors replace the file instead of writing it in place
+        paths = [p for p in (self.path, os.path.dirname(self.path)) if os.path.exists(p)]
+        if paths:
+            self._watcher.addPaths(paths)
+
+    def _on_changed(self, _path):
+        if os.path.exists(self.path) and self.path not in self._watcher.files():
+            self._watcher.addPath(self.path)
+        self.reload()
+
+    def _on_settings_changed(self, changed):
+        if 'PALETTE_FILE' in changed:
+            self.reload()
+            self._watch_paths()
+
+
+_theme = None
+
+
+def get_theme():
+    """The process-wide Theme, loaded on first use."""
+    global _theme
+    if _theme is None:
+        _theme = Theme()
+    return _theme
@@ -1,46 +1,135 @@
-
 from PySide6.QtCore import Qt, QRect, QTimer
 from PySide6.QtGui import QPainter, QColor, QPen, QFont
 from PySide6.QtWidgets import QWidget
-import os
-import yaml
 
-SETTINGS_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../config/settings.yaml'))
+from core.settings import get_settings
+
+
+def stacking_key(win):
+    """Sort key for bottom-to-top draw order: tiled, then floating, then fullscreen;
+    within a layer the most recently focused window (lowest focusHistoryID) is on top."""
+    return (bool(win.get('fullscreen', False)), bool(win.get('floating', False)),
+            -win.get('focusHistoryID', 0), win.get('creationTimestamp', 0))
 
-def get_animation_delay():
-    """Load window animation delay from settings.yaml, defaulting to 300ms"""
-    try:
-        with open(SETTINGS_PATH) as f:
-            settings = yaml.safe_load(f) or {}
-            return int(settings.get('WINDOW_ANIMATION_DELAY', 300))
-    except (FileNotFoundError, ValueError, TypeError, yaml.YAMLError):
-        return 300
 
 class WindowSelectorOverlay(QWidget):
-    def __init__(self, parent, windows, on_select, monitor_rect=None):
+    # Maximum preview size; the actual size follows the aspect ratio of the output layout
+    PREVIEW_W, PREVIEW_H = 600, 350
+    PANE_MARGIN = 12
+
+    def __init__(self, parent, windows=None, on_select=None, monitors=None, thumbnails=None, select_delay=None):
         super().__init__(parent)
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
         self.setAttribute(Qt.WA_TranslucentBackground)
         self.setCursor(Qt.PointingHandCursor)
-        self.windows = windows
-        self.on_select = on_select
+        self.setMouseTracking(True)
+        self.windows = []
+        self._items = []
+        self.hover_idx = None
         self.selected_idx = None
-        self.monitor_rect = monitor_rect or self._get_monitor_rect()
-        # Set preview size
-        self.PREVIEW_W, self.PREVIEW_H = 600, 350
-        self._scale_x, self._scale_y = self._calc_scale()
-        # Center the window on the screen
-        screen = self.screen() or self.parent().screen() if self.parent() else None
-        if screen:
-            scr_geo = screen.geometry()
-            x = scr_geo.x() + (scr_geo.width() - self.PREVIEW_W) // 2
-            y = scr_geo.y() + (scr_geo.height() - self.PREVIEW_H) // 2
-        else:
-            x, y = 100, 100
-        self.setGeometry(x, y, self.PREVIEW_W, self.PREVIEW_H)
+        # Painting resources are created once, not per paintEvent
+        self._background = QColor(25, 25, 25, 220)
+        self._pane_color = QColor(45, 45, 45, 230)
+        self._border_pen = QPen(QColor(255, 255, 255), 2)
+        self._pane_pen = QPen(QColor(120, 120, 120), 1)
+        self._text_pen = QPen(QColor(255, 255, 255))
+        self._label_pen = QPen(QColor(170, 170, 170))
+        self._title_font = QFont('Sans', 10)
+        self._label_font = QFont('Sans', 8)
+        self._title_strip = QColor(0, 0, 0, 160)
         self.setWindowTitle("HyprSnipperSelector")
+        # Without windows the overlay stays hidden until open() (see overlay_pool.py)
+        if windows is not None:
+            self.open(windows, on_select, monitors, thumbnails, select_delay)
+
+    def open(self, windows, on_select, monitors=None, thumbnails=None, select_delay=None):
+        """Show the overlay for a new window list; a hidden overlay is reused this way, not rebuilt."""
+        self.on_select = on_select
+        # Time for the overlay to disappear before on_select captures the screen
+        self.select_delay = get_settings()['WINDOW_ANIMATION_DELAY'] if select_delay is None else select_delay
+        self.set_windows(windows, monitors, thumbnails)
         self.show()
 
+    def set_windows(self, windows, monitors=None, thumbnails=None):
+        """
+        Replace the window list and rebuild the per-output layout and hit index.
+        monitors: [{'name', 'rect': (x, y, w, h), 'workspace'}] in logical coordinates;
+        without it a single pane around the windows' bounding box is used.
+        thumbnails: {address: QImage} drawn inside the window rectangles.
+        """
+        self.windows = windows
+        self._thumbnails = dict(thumbnails or {})
+        if monitors:
+            self.monitors = monitors
+        else:
+            self.monitors = [{'name': '', 'rect': self._get_monitor_rect(), 'workspace': ''}]
+        self._layout_panes()
+        # Bottom-to-top draw order; hit testing walks it in reverse so the topmost window wins
+        self._items = []
+        for win in sorted(windows, key=stacking_key):
+            pane = self._pane_for(win)
+            if pane is None:
+                continue
+            rect = self._to_preview(win['at'][0], win['at'][1], win['size'][0], win['size'][1])
+            # Windows may hang off their output; only the visible part is drawn and clickable
+            rect = rect.intersected(pane)
+            if rect.isEmpty():
+                continue
+            floating = win.get('floating', False)
+            color = QColor(230, 150, 40, 180) if floating else QColor(50, 150, 230, 140)
+            self._items.append((rect, win, color, win.get('title', '')[:32]))
+        self.hover_idx = None
+        self.selected_idx = None
+        self.update()
+
+    def _layout_panes(self):
+        """Scale the whole output layout uniformly into the preview, one pane per output."""
+        rects = [m['rect'] for m in self.monitors]
+        x0 = min(r[0] for r in rects)
+        y0 = min(r[1] for r in rects)
+        lw = max(r[0] + r[2] for r in rects) - x0
+        lh = max(r[1] + r[3] for r in rects) - y0
+        screen = self.screen() or (self.parent().screen() if self.parent() else None)
+        scr_geo = screen.geometry() if screen else QRect(0, 0, 1920, 1080)
+        # Wide multi-monitor layouts may use up to 80% of the screen width
+        max_w = max(self.PREVIEW_W, int(scr_geo.width() * 0.8))
+        inner_w, inner_h = max_w - 2 * self.PANE_MARGIN, self.PREVIEW_H - 2 * self.PANE_MARGIN
+        # Preview pixels per logical pixel
+        self.preview_scale = min(inner_w / lw, inner_h / lh) if lw and lh else 1
+        self._origin = (x0, y0)
+        width = int(lw * self.preview_scale) + 2 * self.PANE_MARGIN
+        height = int(lh * self.preview_scale) + 2 * self.PANE_MARGIN
+        self._panes = [self._to_preview(*m['rect']) for m in self.monitors]
+        # Center the window on the screen
+        x = scr_geo.x() + (scr_geo.width() - width) // 2
+        y = scr_geo.y() + (scr_geo.height() - height) // 2
+        self.setGeometry(x, y, width, height)
+
+    def _to_preview(self, x, y, w, h):
+        ox, oy = self._origin
+        return QRect(self.PANE_MARGIN + int((x - ox) * self.preview_scale),
+                     self.PANE_MARGIN + int((y - oy) * self.preview_scale),
+                     int(w * self.preview_scale), int(h * self.preview_scale))
+
+    def _pane_for(self, win):
+        """The pane of the output holding the window's center (or most of it)."""
+        cx = win['at'][0] + win['size'][0] / 2
+        cy = win['at'][1] + win['size'][1] / 2
+        for monitor, pane in zip(self.monitors, self._panes):
+            mx, my, mw, mh = monitor['rect']
+            if mx <= cx < mx + mw and my <= cy < my + mh:
+                return pane
+        return None
+
+    def set_thumbnails(self, thumbnails):
+        """Show new or updated thumbnails ({address: QImage}), repainting only their windows."""
+        for idx, (rect, win, color, title) in enumerate(self._items):
+            address = win.get('address')
+            image = thumbnails.get(address)
+            if image is not None and image is not self._thumbnails.get(address):
+                self._thumbnails[address] = image
+                self.update(self._item_dirty_rect(idx))
+
     def _get_monitor_rect(self):
         # fallback: use bounding box of all windows
         if not self.windows:
@@ -51,70 +140,104 @@ class WindowSelectorOverlay(QWidget):
         max_y = max(w['at'][1] + w['size'][1] for w in self.windows)
         return (min_x, min_y, max_x - min_x, max_y - min_y)
 
-    def _calc_scale(self):
-        # scale to fit preview window
-        mon_w, mon_h = self.monitor_rect[2], self.monitor_rect[3]
-        scale_x = self.PREVIEW_W / mon_w if mon_w else 1
-        scale_y = self.PREVIEW_H / mon_h if mon_h else 1
-        return scale_x, scale_y
+    def _hit_test(self, pos):
+        """Index of the topmost window under pos, or None."""
+        for idx in range(len(self._items) - 1, -1, -1):
+            if self._items[idx][0].contains(pos):
+                return idx
+        return None
+
+    def _item_dirty_rect(self, idx):
+        # Grow by the border pen width so the outline is repainted too
+        return self._items[idx][0].adjusted(-2, -2, 2, 2)
 
     def paintEvent(self, event):
+        dirty = event.rect()
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
-        painter.fillRect(self.rect(), QColor(25, 25, 25, 220))
-
-        # Sort: tiled first, floating last (drawn on top)
-        def is_floating(win):
-            return win.get('floating', False)
-        windows_sorted = sorted(self.windows, key=lambda w: (not is_floating(w), w.get('creationTimestamp', 0)))
-
-        for idx, win in enumerate(windows_sorted):
-            x = int((win['at'][0] - self.monitor_rect[0]) * self._scale_x)
-            y = int((win['at'][1] - self.monitor_rect[1]) * self._scale_y)
-            w = int(win['size'][0] * self._scale_x)
-            h = int(win['size'][1] * self._scale_y)
-            color = QColor(230, 150, 40, 180) if win.get('floating', False) else QColor(50, 150, 230, 140)
-            if idx == self.selected_idx:
-                color.setAlpha(255)
-            painter.setBrush(color)
-            painter.setPen(QPen(QColor(255,255,255), 2))
-            painter.drawRect(x, y, w, h)
+        painter.fillRect(dirty, self._background)
+        # Output panes with their name and visible workspace
+        painter.setFont(self._label_font)
+        for monitor, pane in zip(self.monitors, self._panes):
+            if not pane.intersects(dirty):
+                continue
+            painter.setBrush(self._pane_color)
+            painter.setPen(self._pane_pen)
+            painter.drawRect(pane)
+            if monitor['name']:
+                painter.setPen(self._label_pen)
+                painter.drawText(pane.adjusted(4, 0, -4, -2), Qt.AlignBottom | Qt.AlignRight,
+                                 f"{monitor['name']}  ·  {monitor['workspace']}")
+        painter.setFont(self._title_font)
+        for idx, (rect, win, color, title) in enumerate(self._items):
+            if not rect.intersects(dirty):
+                continue
+            highlighted = idx in (self.hover_idx, self.selected_idx)
+            thumbnail = self._thumbnails.get(win.get('address'))
+            if thumbnail is not None:
+                painter.drawImage(rect, thumbnail)
+                # Tint everything but the highlighted window, so the thumbnail shows through
+                if highlighted:
+                    painter.setBrush(Qt.NoBrush)
+                else:
+                    color = QColor(color)
+                    color.setAlpha(60)
+                    painter.setBrush(color)
+                painter.setPen(self._border_pen)
+                painter.drawRect(rect)
+                painter.fillRect(rect.x(), rect.y(), rect.width(), min(rect.height(), 30), self._title_strip)
+            else:
+                if highlighted:
+                    color = QColor(color)
+                    color.setAlpha(255)
+                painter.setBrush(color)
+                painter.setPen(self._border_pen)
+                painter.drawRect(rect)
             # Draw title
-            painter.setPen(QColor(255,255,255))
-            font = QFont('Sans', 10)
-            painter.setFont(font)
-            painter.drawText(x+6, y+22, win.get('title', '')[:32])
+            painter.setPen(self._text_pen)
+            painter.drawText(rect.x() + 6, rect.y() + 22, title)
+
+    def mouseMoveEvent(self, event):
+        idx = self._hit_test(event.position().toPoint())
+        if idx != self.hover_idx:
+            # Repaint only the previously and newly highlighted windows
+            for dirty_idx in (self.hover_idx, idx):
+                if dirty_idx is not None:
+                    self.update(self._item_dirty_rect(dirty_idx))
+            self.hover_idx = idx
+
+    def leaveEvent(self, event):
+        if self.hover_idx is not None:
+            self.update(self._item_dirty_rect(self.hover_idx))
+            self.hover_idx = None
+        super().leaveEvent(event)
 
     def mousePressEvent(self, event):
-        # Find which window was clicked
-        for idx, win in enumerate(sorted(self.windows, key=lambda w: (not w.get('floating', False), w.get('creationTimestamp', 0)))):
-            x = int((win['at'][0] - self.monitor_rect[0]) * self._scale_x)
-            y = int((win['at'][1] - self.monitor_rect[1]) * self._scale_y)
-            w = int(win['size'][0] * self._scale_x)
-            h = int(win['size'][1] * self._scale_y)
-            if x <= event.x() <= x+w and y <= event.y() <= y+h:
-                self.selected_idx = idx
-                self.update()
-                geo = win['at']
-                size = win['size']
-                geom_str = f"{geo[0]},{geo[1]} {size[0]}x{size[1]}"
-                QTimer.singleShot(1, lambda: self._select(geom_str))
-                break
-
-    def _select(self, geom_str):
+        # Find which window was clicked (topmost first)
+        idx = self._hit_test(event.position().toPoint())
+        if idx is None:
+            return
+        self.selected_idx = idx
+        self.update(self._item_dirty_rect(idx))
+        win = self._items[idx][1]
+        geo = win['at']
+        size = win['size']
+        geom_str = f"{geo[0]},{geo[1]} {size[0]}x{size[1]}"
+        QTimer.singleShot(1, lambda: self._select(geom_str, win))
+
+    def _select(self, geom_str, win=None):
         # Hide immediately, then call snip after configurable delay
         self.hide()
         if self.on_select:
-            delay = get_animation_delay()
-            QTimer.singleShot(delay, lambda: (self.close(), self.on_select(geom_str)))
+            QTimer.singleShot(self.select_delay, lambda: (self.close(), self.on_select(geom_str, win)))
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Escape:
             self.close()
-            # Show parent (main snipper) window if available
-            if self.parent() is not None:
+            # Show parent (main snipper) window if available; it first cancels any capture work still running
+            if self.parent() is not None and not self.parent().cancel_pending():
                 # Use shorter delay for showing parent, as it's less critical
-                delay = max(100, get_animation_delay() // 3)
-                QTimer.singleShot(delay, self.parent().show)
+                delay = max(100, get_settings()['WINDOW_ANIMATION_DELAY'] // 3)
+                QTimer.singleShot(delay, self.parent()._restore)
         else:
             super().keyPressEvent(event)
@@ -0,0 +1,20 @@
+import pytest
+
+from core.burst import parse_duration, parse_interval
+
+
+@pytest.mark.parametrize('text, seconds', [('500ms', 0.5), ('2s', 2), ('1.5m', 90), ('250', 0.25), (' .5 s ', 0.5)])
+def test_parse_interval(text, seconds):
+    assert parse_interval(text) == pytest.approx(seconds)
+
+
+@pytest.mark.parametrize('text, seconds', [('30', 30), ('30s', 30), ('5m', 300), ('1h', 3600), ('100ms', 0.1)])
+def test_parse_duration_defaults_to_seconds(text, seconds):
+    assert parse_duration(text) == pytest.approx(seconds)
+
+
+@pytest.mark.parametrize('parse', [parse_interval, parse_duration])
+@pytest.mark.parametrize('text', ['', 'fast', '5 days', '-1s', '1e3'])
+def test_parse_rejects(parse, text):
+    with pytest.raises(ValueError):
+        parse(text)
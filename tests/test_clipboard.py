@@ -0,0 +1,38 @@
+import pytest
+
+from core.clipboard import URI_LIST, ClipboardError, _payload, offers
+from core.encoders import available
+from core.frame import Frame
+from core.pipeline import Encoded, EncodedFrame
+
+
+def test_offers_copy_format_first_and_uri_list_last():
+    result = offers(('png', 1), path='/tmp/shot.png')
+    assert result[0] == ('image/png', 'png', 1)
+    assert result[-1] == (URI_LIST, None, None)
+    assert (('image/webp', 'webp', 100) in result) == available('webp')
+
+
+def test_offers_always_include_png_and_no_uri_list_without_a_file():
+    result = offers(('jpeg', 80))
+    assert ('image/png', 'png', 1) in result
+    assert (('image/jpeg', 'jpeg', 80) in result) == available('jpeg')
+    assert all(mime != URI_LIST for mime, _fmt, _level in result)
+
+
+def test_payload_uri_list_is_a_quoted_file_url():
+    assert _payload(None, None, None, '/tmp/my shot.png') == b'file:///tmp/my%20shot.png\r\n'
+
+
+def test_payload_encodes_the_frame():
+    frame = Frame(bytes(4 * 4 * 4), 4, 4, 16, 'xrgb8888')
+    assert _payload(EncodedFrame(frame), 'png', 1, None).startswith(b'\x89PNG\r\n\x1a\n')
+
+
+def test_payload_refuses_a_format_that_fell_back_to_png():
+    class FellBack:
+        def get(self, fmt, level):
+            return Encoded(b'\x89PNG', 'png')
+
+    with pytest.raises(ClipboardError):
+        _payload(FellBack(), 'webp', 100, None)
@@ -0,0 +1,113 @@
+import random
+import struct
+import zlib
+
+import pytest
+
+from core.encoders import _filter_rows, encode_png, png_scanlines, to_rgb
+from core.frame import Frame
+
+
+def decode_png(data):
+    """(width, height, RGB bytes) of an 8-bit RGB PNG, with every filter type undone."""
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    pos, idat = 8, []
+    while True:
+        length, kind = struct.unpack_from('>I4s', data, pos)
+        payload = data[pos + 8:pos + 8 + length]
+        assert struct.unpack_from('>I', data, pos + 8 + length)[0] == zlib.crc32(kind + payload)
+        pos += 12 + length
+        if kind == b'IHDR':
+            width, height, depth, color = struct.unpack('>IIBB', payload[:10])
+            assert (depth, color) == (8, 2)
+        elif kind == b'IDAT':
+            idat.append(payload)
+        elif kind == b'IEND':
+            break
+    raw = zlib.decompress(b''.join(idat))
+    row_bytes = width * 3
+    assert len(raw) == height * (row_bytes + 1)
+    rgb = bytearray()
+    previous = bytearray(row_bytes)
+    for y in range(height):
+        kind = raw[y * (row_bytes + 1)]
+        row = bytearray(raw[y * (row_bytes + 1) + 1:(y + 1) * (row_bytes + 1)])
+        for x in range(row_bytes):
+            left = row[x - 3] if x >= 3 else 0
+            up = previous[x]
+            up_left = previous[x - 3] if x >= 3 else 0
+            if kind == 1:
+                row[x] = (row[x] + left) & 0xFF
+            elif kind == 2:
+                row[x] = (row[x] + up) & 0xFF
+            elif kind == 3:
+                row[x] = (row[x] + (left + up) // 2) & 0xFF
+            elif kind == 4:
+                p = left + up - up_left
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - up_left)
+                row[x] = (row[x] + (left if pa <= pb and pa <= pc else up if pb <= pc else up_left)) & 0xFF
+            else:
+                assert kind == 0
+        rgb += row
+        previous = row
+    return width, height, bytes(rgb)
+
+
+def screen_like(width, height, seed=1):
+    """xrgb8888 with a gradient half (filters pay off) and a flat half with noise (they do not)."""
+    rng = random.Random(seed)
+    data = bytearray(width * height * 4)
+    for y in range(height):
+        for x in range(width):
+            i = (y * width + x) * 4
+            if y < height // 2:
+                data[i:i + 3] = bytes((x & 0xFF, y & 0xFF, (x + y) & 0xFF))
+            else:
+                data[i:i + 3] = bytes((40, 44, 52)) if rng.random() < 0.9 else rng.randbytes(3)
+    return Frame(bytes(data), width, height, width * 4, 'xrgb8888')
+
+
+@pytest.mark.parametrize('level', [0, 1, 4, 9])
+def test_png_round_trip(level):
+    frame = screen_like(61, 40)
+    assert decode_png(encode_png(frame, level)) == (61, 40, bytes(to_rgb(frame)))
+
+
+def test_png_round_trip_over_several_bands():
+    # More than one 1 MiB band, so each band picks its own filter
+    frame = screen_like(700, 520)
+    assert decode_png(encode_png(frame, 4)) == (700, 520, bytes(to_rgb(frame)))
+
+
+@pytest.mark.parametrize('fmt', ['xrgb8888', 'xbgr8888', 'rgb888'])
+def test_png_round_trip_with_row_padding(fmt):
+    bpp = 3 if fmt == 'rgb888' else 4
+    width, height, stride = 5, 3, 5 * bpp + 4
+    data = bytes(random.Random(2).randbytes(stride * height))
+    frame = Frame(data, width, height, stride, fmt)
+    assert decode_png(encode_png(frame, 6)) == (width, height, bytes(to_rgb(frame)))
+
+
+@pytest.mark.parametrize('kind', [0, 1, 2])
+def test_filter_rows_match_the_png_filters(kind):
+    width, rows, start_row = 9, 4, 2
+    row_bytes = width * 3
+    rgb = random.Random(3).randbytes(row_bytes * 8)
+    filtered = _filter_rows(rgb, start_row * row_bytes, rows, row_bytes, 3, kind, {})
+    expected = bytearray()
+    for y in range(start_row, start_row + rows):
+        row = rgb[y * row_bytes:(y + 1) * row_bytes]
+        if kind == 1:
+            reference = bytes(3) + row[:-3]
+        elif kind == 2:
+            reference = rgb[(y - 1) * row_bytes:y * row_bytes]
+        else:
+            reference = bytes(row_bytes)
+        expected += bytes((kind,)) + bytes((a - b) & 0xFF for a, b in zip(row, reference))
+    assert bytes(filtered) == bytes(expected)
+
+
+def test_unfiltered_scanlines():
+    rgb = bytes(range(2 * 3 * 3))
+    lines = b''.join(png_scanlines(rgb, 3, 2, filtered=False))
+    assert lines == b'\0' + rgb[:9] + b'\0' + rgb[9:]
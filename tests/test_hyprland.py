@@ -0,0 +1,67 @@
+import pytest
+
+from core.hyprland import HyprlandState, _split_json
+
+
+def test_split_json_any_whitespace():
+    assert _split_json('[1]\n{"a": 2}  \n[]\n', 3) == [[1], {'a': 2}, []]
+    assert _split_json('[]{}', 2) == [[], {}]
+
+
+@pytest.mark.parametrize('text, count', [('[] []', 1), ('[]', 2), ('[] oops', 1)])
+def test_split_json_wrong_count(text, count):
+    with pytest.raises(ValueError):
+        _split_json(text, count)
+
+
+def make_state():
+    state = HyprlandState()
+    state.clients = {
+        '0xa': {'address': '0xa', 'class': 'kitty', 'title': 'fish', 'focusHistoryID': 0},
+        '0xb': {'address': '0xb', 'class': 'firefox', 'title': 'Docs', 'focusHistoryID': 1},
+    }
+    state.monitors = [
+        {'name': 'DP-1', 'focused': True, 'activeWorkspace': {'id': 1, 'name': '1'}},
+        {'name': 'HDMI-A-1', 'focused': False, 'activeWorkspace': {'id': 2, 'name': '2'}},
+    ]
+    state._dirty = False
+    return state
+
+
+def test_title_and_focus_are_applied_in_place():
+    state = make_state()
+    state.apply_event('windowtitlev2>>b,Docs, page 2')
+    state.apply_event('activewindowv2>>b')
+    assert state.clients['0xb']['title'] == 'Docs, page 2'
+    assert (state.clients['0xb']['focusHistoryID'], state.clients['0xa']['focusHistoryID']) == (0, 1)
+    assert not state._dirty
+
+
+def test_open_and_close_window():
+    state = make_state()
+    state.apply_event('openwindow>>c,1,mpv,video.mkv')
+    assert state.clients['0xc']['mapped'] is False
+    assert state.clients['0xc']['title'] == 'video.mkv'
+    assert state._dirty
+    state.apply_event('closewindow>>a')
+    assert '0xa' not in state.clients
+
+
+def test_workspace_and_monitor_focus():
+    state = make_state()
+    state.apply_event('workspacev2>>3,web')
+    assert state.monitors[0]['activeWorkspace'] == {'id': 3, 'name': 'web'}
+    state.apply_event('focusedmonv2>>HDMI-A-1,2')
+    assert [m['focused'] for m in state.monitors] == [False, True]
+    state.apply_event('workspacev2>>4,4')
+    assert state.monitors[1]['activeWorkspace'] == {'id': 4, 'name': '4'}
+    assert state.monitors[0]['activeWorkspace'] == {'id': 3, 'name': 'web'}
+    assert not state._dirty
+
+
+def test_malformed_events_are_ignored():
+    state = make_state()
+    state.apply_event('no separator')
+    state.apply_event('workspacev2>>special,x')
+    assert state.events_seen == 1
+    assert state.monitors[0]['activeWorkspace'] == {'id': 1, 'name': '1'}
@@ -0,0 +1,78 @@
+"""ui.notify against the stand-in notification server; the app runs in a child process with its own bus connection."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.fakes.notification_server import FakeNotificationServer
+from conftest import ROOT
+
+pytest.importorskip('PySide6.QtDBus')
+
+# Sends one capture notification for argv[1] and stays up for the action click.
+# argv[2] == 'existing': the save found an identical earlier capture instead of writing the file
+CLIENT = """
+import sys
+from PySide6.QtCore import QCoreApplication, QTimer
+from core.frame import Frame
+from core.pipeline import ExistingPath
+from ui.notify import CaptureNotice
+
+app = QCoreApplication([])
+path = ExistingPath(sys.argv[1]) if sys.argv[2] == 'existing' else sys.argv[1]
+notice = CaptureNotice(Frame(bytes(range(256)) * 4, 16, 16, 64, 'xrgb8888'), editor='satty')
+notice.add(f"Saved: {path}")
+notice.send(path)
+QTimer.singleShot(10000, app.quit)
+app.exec()
+"""
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = FakeNotificationServer(str(tmp_path / 'bus')).start()
+    yield server
+    server.stop()
+
+
+def start_client(server, tmp_path, path, kind='saved'):
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen', XDG_DATA_HOME=str(tmp_path / 'data'), **server.env)
+    return subprocess.Popen([sys.executable, '-c', CLIENT, path, kind], cwd=os.path.join(ROOT, 'src'), env=env)
+
+
+def test_capture_notification_and_delete(server, tmp_path):
+    shot = tmp_path / 'shot.png'
+    shot.write_bytes(b'png')
+    client = start_client(server, tmp_path, str(shot))
+    try:
+        assert server.wait_for(1, timeout=10)
+        sent = server.notifications[0]
+        assert sent['signature'] == 'susssasa{sv}i'
+        assert (sent['summary'], sent['body'], sent['replaces_id']) == ("Screenshot saved", f"Saved: {shot}", 0)
+        assert sent['actions'] == {'default': "Open", 'edit': "Edit", 'delete': "Delete"}
+        # 16x16 scaled to fit THUMBNAIL_SIZE stays 16x16: width, height, stride, alpha, bits, channels, pixels
+        assert sent['hints']['image-data'][:6] == (16, 16, 48, False, 8, 3)
+
+        server.invoke_action(sent['id'], 'delete')
+        assert server.wait_for(2, timeout=10)
+        deleted = server.notifications[1]
+        assert (deleted['summary'], deleted['body'], deleted['replaces_id']) == ("Screenshot deleted", str(shot),
+                                                                                  sent['id'])
+        assert not shot.exists()
+    finally:
+        client.kill()
+        client.wait()
+
+
+def test_no_delete_for_an_earlier_capture(server, tmp_path):
+    shot = tmp_path / 'earlier.png'
+    shot.write_bytes(b'png')
+    client = start_client(server, tmp_path, str(shot), kind='existing')
+    try:
+        assert server.wait_for(1, timeout=10)
+        assert server.notifications[0]['actions'] == {'default': "Open", 'edit': "Edit"}
+    finally:
+        client.kill()
+        client.wait()
+    assert shot.exists()
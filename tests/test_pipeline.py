@@ -0,0 +1,21 @@
+import os
+import time
+
+from core import pipeline
+
+
+def test_stale_edit_files_are_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, 'CACHE_DIR', str(tmp_path))
+    old, recent, other = tmp_path / 'edit_1_2.png', tmp_path / 'edit_3_4.png', tmp_path / 'settings.json'
+    for path in (old, recent, other):
+        path.write_bytes(b'x')
+    two_days_ago = time.time() - 2 * 24 * 3600
+    for path in (old, other):
+        os.utime(path, (two_days_ago, two_days_ago))
+    pipeline.remove_stale_edit_files()
+    assert sorted(os.listdir(tmp_path)) == ['edit_3_4.png', 'settings.json']
+
+
+def test_no_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, 'CACHE_DIR', str(tmp_path / 'missing'))
+    pipeline.remove_stale_edit_files()
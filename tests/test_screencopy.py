@@ -0,0 +1,39 @@
+import collections
+import struct
+
+from core.screencopy import ArgReader, pack_int, pack_message, pack_string, pack_uint
+
+
+def test_pack_string_is_nul_terminated_and_padded():
+    assert pack_string('wl_shm') == struct.pack('<I', 7) + b'wl_shm\0\0'
+    # 'abc' plus its NUL is already a multiple of 4
+    assert pack_string('abc') == struct.pack('<I', 4) + b'abc\0'
+
+
+def test_pack_uint_wraps_and_pack_int_is_signed():
+    assert pack_uint(-1) == b'\xff\xff\xff\xff'
+    assert pack_int(-2) == struct.pack('<i', -2)
+
+
+def test_pack_message_header_holds_size_and_opcode():
+    message = pack_message(3, 2, pack_uint(7))
+    assert message == struct.pack('<III', 3, (12 << 16) | 2, 7)
+
+
+def test_arg_reader_reads_back_what_was_packed():
+    payload = (pack_uint(0xFFFFFFFF) + pack_int(-5) + pack_string('zwlr_screencopy_manager_v1') +
+               pack_string('') + pack_uint(0) + pack_string('é') + pack_uint(9))
+    args = ArgReader(payload)
+    assert args.uint() == 0xFFFFFFFF
+    assert args.int() == -5
+    assert args.string() == 'zwlr_screencopy_manager_v1'
+    assert args.string() == ''
+    assert args.string() == ''  # a null string: length 0
+    assert args.string() == 'é'
+    assert args.uint() == 9
+    assert args.pos == len(payload)
+
+
+def test_arg_reader_takes_fds_in_order():
+    args = ArgReader(b'', collections.deque([7, 8]))
+    assert (args.fd(), args.fd()) == (7, 8)
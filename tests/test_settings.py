@@ -0,0 +1,60 @@
+import sys
+
+import pytest
+
+from core.settings import _coerce, _parse
+
+SETTINGS_YAML = """# comment
+SAVE_DIR: ~/Shots  # trailing comment
+EDITOR: "satty --filename"
+DEDUP: off
+SAVE_LEVEL: 9
+TRACE: yes
+"""
+
+
+def test_parse_yaml(tmp_path):
+    path = tmp_path / 'settings.yaml'
+    path.write_text(SETTINGS_YAML)
+    assert _parse(str(path)) == {'SAVE_DIR': '~/Shots', 'EDITOR': 'satty --filename', 'DEDUP': False,
+                                 'SAVE_LEVEL': 9, 'TRACE': True}
+
+
+def test_parse_without_pyyaml(tmp_path, monkeypatch):
+    path = tmp_path / 'settings.yaml'
+    path.write_text(SETTINGS_YAML)
+    monkeypatch.setitem(sys.modules, 'yaml', None)  # import yaml raises ImportError
+    assert _parse(str(path)) == {'SAVE_DIR': '~/Shots', 'EDITOR': 'satty --filename', 'DEDUP': 'off',
+                                 'SAVE_LEVEL': '9', 'TRACE': 'yes'}
+
+
+def test_parse_empty_file(tmp_path):
+    path = tmp_path / 'settings.yaml'
+    path.write_text('# nothing set\n')
+    assert _parse(str(path)) == {}
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('yes', True), ('Off', False), ('1', True), (' false ', False), (True, True), (0, False),
+])
+def test_coerce_bool(value, expected):
+    assert _coerce('TRACE', value) is expected
+
+
+def test_coerce_int_and_choices():
+    assert _coerce('SAVE_LEVEL', '4') == 4
+    assert _coerce('SAVE_LEVEL', 0) == 0
+    assert _coerce('RECORD_FPS', '1') == 1
+    assert _coerce('DEDUP', 'perceptual') == 'perceptual'
+    # YAML reads an unquoted off as False
+    assert _coerce('DEDUP', False) == 'off'
+    assert _coerce('SAVE_DIR', '~/Pictures') == '~/Pictures'
+
+
+@pytest.mark.parametrize('key, value', [
+    ('TRACE', 'maybe'), ('SAVE_LEVEL', -1), ('SAVE_LEVEL', 'fast'), ('DEDUP', 'fuzzy'), ('SAVE_FORMAT', 'bmp'),
+    ('RECORD_FPS', 0),
+])
+def test_coerce_rejects(key, value):
+    with pytest.raises(ValueError):
+        _coerce(key, value)